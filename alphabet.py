@@ -0,0 +1,255 @@
+"""Integer-coded base alphabets, including modified bases (5mC, 6mA).
+
+Every base is a small integer symbol, so modified bases cost the same as natural
+ones: text is translated to symbols with one lookup table and back with another,
+and no per-base string handling is needed. Multi-character tokens are only used at
+the text boundary; internally (and in FASTA output) 5mC and 6mA are written with
+the single letters ``E`` and ``F``, which are not IUPAC codes and do not clash
+with the unnatural bases P, Z, B and S.
+"""
+import math
+import re
+
+import numpy as np
+
+SYMBOLS = ["A", "T", "C", "G", "P", "Z", "B", "S", "5mC", "6mA"]
+SYMBOL_CODES = {token: code for code, token in enumerate(SYMBOLS)}
+MODIFIED_BASES = {"5mC": "E", "6mA": "F"}
+# Single-letter form of every symbol, indexed by symbol code
+CHARS = np.frombuffer("ATCGPZBSEF".encode("ascii"), dtype=np.uint8)
+
+# Text byte -> symbol code (255 = not a base)
+CHAR_TO_CODE = np.full(256, 255, dtype=np.uint8)
+CHAR_TO_CODE[CHARS] = np.arange(len(CHARS), dtype=np.uint8)
+
+_TOKEN_PATTERN = re.compile(r"5mC|6mA|[ATCGPZBS]")
+
+# Unconstrained base-k packing with TableCodec; GC and homopolymer settings do not apply
+TABLE_METHOD = "Lookup Table"
+# Methods implemented in this repository; all others are run by ``methods.Encode``,
+# which only handles natural and unnatural bases
+IN_PROCESS_METHODS = (TABLE_METHOD, "HybridCode")
+
+
+def parse_letters(letters):
+    """Symbols named by an encoding-letter string such as "A,T,C,G,5mC,6mA" or "ATCGPZ"."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(letters):
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def has_modified_bases(letters):
+    return any(token in MODIFIED_BASES for token in parse_letters(letters))
+
+
+def to_codes(text):
+    """Translate sequence text (token or single-letter form) to a uint8 symbol array."""
+    for token, char in MODIFIED_BASES.items():
+        text = text.replace(token, char)
+    codes = CHAR_TO_CODE[np.frombuffer(text.encode("ascii"), dtype=np.uint8)]
+    if (codes == 255).any():
+        raise ValueError("Sequence contains characters outside the base alphabet")
+    return codes
+
+
+def to_text(codes, tokens=False):
+    """Translate symbol codes to text; ``tokens=True`` spells out 5mC / 6mA."""
+    text = CHARS[codes].tobytes().decode("ascii")
+    if tokens:
+        for token, char in MODIFIED_BASES.items():
+            text = text.replace(char, token)
+    return text
+
+
+class TableCodec:
+    """Maps bytes to sequences over an arbitrary alphabet with lookup tables.
+
+    Groups of ``group_bytes`` bytes are written as ``group_digits`` base-k digits
+    (k = alphabet size), with the group size chosen to waste as little capacity as
+    possible; e.g. six symbols store 5 bytes in 16 bases (2.5 bits/base). The
+    conversion runs on whole arrays of groups at once.
+    """
+
+    INDEX_BYTES = 4  # strand index prefix used by encode_strands
+
+    def __init__(self, letters):
+        self.tokens = parse_letters(letters) if isinstance(letters, str) else list(letters)
+        if len(self.tokens) < 2:
+            raise ValueError(f"Alphabet needs at least two symbols: {letters!r}")
+        self.radix = len(self.tokens)
+        # digit -> symbol code, symbol code -> digit (255 = not in this alphabet)
+        self.digit_to_code = np.array([SYMBOL_CODES[t] for t in self.tokens], dtype=np.uint8)
+        self.code_to_digit = np.full(256, 255, dtype=np.uint8)
+        self.code_to_digit[self.digit_to_code] = np.arange(self.radix, dtype=np.uint8)
+
+        best = None
+        for group_bytes in range(1, 8):
+            digits = math.ceil(8 * group_bytes / math.log2(self.radix))
+            if best is None or 8 * group_bytes / digits > 8 * best[0] / best[1] + 1e-9:
+                best = (group_bytes, digits)
+        self.group_bytes, self.group_digits = best
+        self.bits_per_base = 8 * self.group_bytes / self.group_digits
+        self._weights = (256 ** np.arange(self.group_bytes - 1, -1, -1, dtype=np.uint64)).astype(np.uint64)
+
+    def encode_codes(self, data):
+        """Bytes -> symbol codes (the input is zero-padded to whole groups)."""
+        buf = np.frombuffer(bytes(data), dtype=np.uint8)
+        pad = -len(buf) % self.group_bytes
+        if pad:
+            buf = np.concatenate([buf, np.zeros(pad, dtype=np.uint8)])
+        values = buf.reshape(-1, self.group_bytes).astype(np.uint64) @ self._weights
+        digits = np.empty((len(values), self.group_digits), dtype=np.uint8)
+        radix = np.uint64(self.radix)
+        for i in range(self.group_digits - 1, -1, -1):
+            digits[:, i] = values % radix
+            values //= radix
+        return self.digit_to_code[digits.ravel()]
+
+    def decode_codes(self, codes, length=None):
+        """Symbol codes -> bytes; ``length`` trims the padding added by encoding."""
+        digits = self.code_to_digit[np.asarray(codes, dtype=np.uint8)]
+        if (digits == 255).any():
+            raise ValueError("Sequence contains symbols outside this alphabet")
+        if len(digits) % self.group_digits:
+            raise ValueError("Sequence length is not a whole number of symbol groups")
+        values = np.zeros(len(digits) // self.group_digits, dtype=np.uint64)
+        radix = np.uint64(self.radix)
+        for column in digits.reshape(-1, self.group_digits).T:
+            values = values * radix + column
+        out = np.empty((len(values), self.group_bytes), dtype=np.uint8)
+        for i in range(self.group_bytes - 1, -1, -1):
+            out[:, i] = values & np.uint64(0xFF)
+            values >>= np.uint64(8)
+        data = out.tobytes()
+        return data[:length] if length is not None else data
+
+    def encode(self, data, tokens=False):
+        return to_text(self.encode_codes(data), tokens)
+
+    def decode(self, text, length=None):
+        return self.decode_codes(to_codes(text), length)
+
+    def _payload_bytes(self, payload_bytes):
+        """Payload size rounded down to whole byte groups (at least one group)."""
+        return max(payload_bytes - payload_bytes % self.group_bytes, self.group_bytes)
+
+    def _index_width(self):
+        return -(-self.INDEX_BYTES // self.group_bytes) * self.group_bytes
+
+    def encode_strands(self, data, payload_bytes=30):
+        """Split ``data`` into indexed strands.
+
+        Each strand carries a 4-byte index followed by ``payload_bytes`` of data;
+        strand 0's payload starts with the total length so padding can be removed.
+        All strands are translated in a single vectorized pass.
+        """
+        payload_bytes = self._payload_bytes(payload_bytes)
+        framed = len(data).to_bytes(8, "big") + bytes(data)
+        framed += bytes(-len(framed) % payload_bytes)
+        count = len(framed) // payload_bytes
+
+        index_width = self._index_width()
+        rows = np.zeros((count, index_width + payload_bytes), dtype=np.uint8)
+        indices = np.arange(count, dtype=">u4").view(np.uint8).reshape(count, 4)
+        rows[:, index_width - 4:index_width] = indices
+        rows[:, index_width:] = np.frombuffer(framed, dtype=np.uint8).reshape(count, payload_bytes)
+
+        text = to_text(self.encode_codes(rows.tobytes()))
+        width = len(text) // count
+        return [text[i * width:(i + 1) * width] for i in range(count)]
+
+    def decode_strands(self, strands, weights=None, payload_bytes=30, fill_missing=False):
+        """Reassemble data from (possibly shuffled / duplicated) indexed strands.
+
+        Strands whose length or symbols do not fit this codec are skipped. Where
+        several strands carry the same index, the one with the highest ``weights``
+        entry (e.g. its read count after deduplication) is used, else the first
+        one. Missing strands raise ``StrandDecodeError`` unless ``fill_missing``
+        is set, in which case their bytes are zero-filled (see ``reassemble``).
+        """
+        payload_bytes = self._payload_bytes(payload_bytes)
+        index_width = self._index_width()
+        width = (index_width + payload_bytes) // self.group_bytes * self.group_digits
+        keep = [i for i, s in enumerate(strands) if len(s) == width]
+        if not keep:
+            raise StrandDecodeError(f"No strand has the expected length of {width} bases")
+        text = "".join([strands[i] for i in keep]).encode("ascii")
+        codes = CHAR_TO_CODE[np.frombuffer(text, dtype=np.uint8)].reshape(len(keep), width)
+        # Reads with symbols outside this alphabet cannot be translated; skip them
+        valid = (self.code_to_digit[codes] != 255).all(axis=1)
+        keep = np.array(keep)[valid]
+        if not len(keep):
+            raise StrandDecodeError("No strand uses only symbols of this alphabet")
+        rows = np.frombuffer(self.decode_codes(codes[valid].ravel()), dtype=np.uint8).reshape(len(keep), -1)
+        indices = rows[:, index_width - 4:index_width].copy().view(">u4").ravel()
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)[keep]
+        return reassemble(indices, rows[:, index_width:], weights, fill_missing)
+
+
+class StrandDecodeError(ValueError):
+    """Raised when indexed strands cannot be reassembled (missing or corrupted strands)."""
+
+
+def reassemble(indices, payloads, weights=None, fill_missing=False, count=None):
+    """Join the payloads of indexed strands back into the original data.
+
+    ``payloads`` holds one row per strand and strand 0's payload starts with the
+    8-byte data length, which fixes the number of strands. Of several copies of
+    an index the heaviest (else the first) is used; indices beyond the strand
+    count are corrupted and ignored. Missing strands raise ``StrandDecodeError``,
+    or are zero-filled at their offsets with ``fill_missing``. Pass ``count`` when
+    the strand count has already been checked against the length header.
+    """
+    payloads = np.asarray(payloads, dtype=np.uint8)
+    payload_bytes = payloads.shape[1]
+    if weights is None:
+        order = np.unique(indices, return_index=True)[1]  # first copy of every index
+    else:
+        # Heaviest copy of every index: sort by index, then by descending weight
+        ranked = np.lexsort((-np.asarray(weights, dtype=np.float64), indices))
+        order = ranked[np.unique(indices[ranked], return_index=True)[1]]
+    indices = indices[order].astype(np.int64)
+    payloads = payloads[order]
+    if not len(indices) or indices[0] != 0:
+        raise StrandDecodeError("Strand 0, which holds the data length, is missing")
+    length = int.from_bytes(payloads[0, :8].tobytes(), "big")
+    if count is None:
+        count = -(-(8 + length) // payload_bytes)
+        if count > 4 * int(indices[-1]) + 64:
+            # Missing strands are expected, but not a count far beyond every index that was read
+            raise StrandDecodeError(f"Length header claims {count} strands, "
+                                    f"but the highest index read is {indices[-1]}")
+    present = indices < count
+    missing = count - int(present.sum())
+    if missing and not fill_missing:
+        raise StrandDecodeError(f"{missing} of {count} strands are missing")
+    framed = np.zeros((count, payload_bytes), dtype=np.uint8)
+    framed[indices[present]] = payloads[present]
+    return framed.tobytes()[8:8 + length]
+
+
+def check_method(letters, method):
+    """Raise ValueError if ``method`` cannot encode the alphabet named by ``letters``."""
+    if has_modified_bases(letters) and method not in IN_PROCESS_METHODS:
+        raise ValueError(f"{method} does not support modified bases (5mC / 6mA); "
+                         f"use {TABLE_METHOD} or HybridCode")
+
+
+def codec_for(letters, method=None, gc_content=50, homopolymer_limit=4):
+    """In-process codec for ``method``, or None for methods run by ``methods.Encode``.
+
+    HybridCode gets its constrained codec (see ``hybrid_code``) and
+    ``TABLE_METHOD`` the unconstrained lookup-table codec. Raises ValueError for
+    combinations that cannot be encoded (see ``check_method``).
+    """
+    check_method(letters, method)
+    if method == "HybridCode":
+        from hybrid_code import hybrid_code
+
+        return hybrid_code(letters, gc_content, homopolymer_limit)
+    if method == TABLE_METHOD:
+        return TableCodec(letters)
+    return None
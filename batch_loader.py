@@ -0,0 +1,74 @@
+"""Concurrent loading and hashing of many input files for batch jobs."""
+import hashlib
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+LoadedFile = namedtuple("LoadedFile", ["path", "data", "sha256"])
+
+
+def expand_paths(paths):
+    """Expand directories into the files they contain (recursively), keeping order.
+
+    A file reached twice (e.g. dropped together with its directory) is listed once.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif os.path.isfile(path):
+            files.append(path)
+    unique, seen = [], set()
+    for path in files:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def load_file(path):
+    """Read one file and hash its content."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return LoadedFile(path, data, hashlib.sha256(data).hexdigest())
+
+
+def load_files(paths, workers=None, progress=None):
+    """Load and hash files concurrently.
+
+    File reads and SHA-256 both release the GIL, so a thread pool keeps the disk
+    and several cores busy. ``progress(done, total)`` is called after each file.
+    Returns ``(loaded, duplicates, errors)``: every readable file in input order,
+    the paths whose content repeats an earlier file, and ``(path, message)`` pairs
+    for files that could not be read. Files with the same content share one
+    ``data`` object, so a repeated file is held in memory once but keeps its own
+    name (and archive entry, see ``archive.pack``).
+    """
+    paths = expand_paths(paths)
+    results = [None] * len(paths)
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        futures = {pool.submit(load_file, path): i for i, path in enumerate(paths)}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except OSError as e:
+                errors.append((paths[index], str(e)))
+            if progress:
+                progress(done, len(paths))
+
+    loaded, duplicates, first = [], [], {}
+    for item in results:
+        if item is None:
+            continue
+        if item.sha256 in first:
+            duplicates.append(item.path)
+            item = item._replace(data=first[item.sha256].data)
+        else:
+            first[item.sha256] = item
+        loaded.append(item)
+    return loaded, duplicates, errors
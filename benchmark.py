@@ -0,0 +1,164 @@
+"""Throughput benchmarks for the codec building blocks.
+
+Run with ``python benchmark.py`` (optionally followed by benchmark names).
+"""
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+# Time from interpreter start to the first painted main window that GUI startup
+# should stay under
+STARTUP_TARGET = 1.5
+
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+import main
+window = main.MBioStorageApp()
+window.show()
+app.processEvents()
+print(time.perf_counter() - start, int("numpy" in sys.modules), int("methods" in sys.modules))
+"""
+
+
+def _throughput(nbytes, seconds):
+    return nbytes / seconds / 1e6 if seconds > 0 else float("inf")
+
+
+def bench_reed_solomon():
+    """Reed-Solomon outer code encode/decode MB/s."""
+    import numpy as np
+    from rs_code import StrandOuterCode
+
+    results = []
+    rng = np.random.default_rng(0)
+    for bits, n_strands, nsym in [(8, 200, 20), (16, 1000, 100)]:
+        code = StrandOuterCode(nsym, bits)
+        strands = [rng.integers(0, 256, 200, dtype=np.uint8).tobytes() for _ in range(n_strands)]
+        nbytes = sum(len(s) for s in strands)
+
+        start = time.perf_counter()
+        coded = code.encode(strands)
+        encode_time = time.perf_counter() - start
+
+        # Drop half of the parity budget worth of strands
+        for i in range(0, len(coded), len(coded) // (nsym // 2)):
+            coded[i] = None
+        start = time.perf_counter()
+        code.decode(coded)
+        decode_time = time.perf_counter() - start
+
+        results.append((f"RS GF(2^{bits}) encode", _throughput(nbytes, encode_time), "MB/s"))
+        results.append((f"RS GF(2^{bits}) decode", _throughput(nbytes, decode_time), "MB/s"))
+    return results
+
+
+def bench_alphabet_codec():
+    """Lookup-table codec MB/s per alphabet, natural vs. modified bases."""
+    import os
+    from alphabet import TableCodec
+
+    results = []
+    data = os.urandom(4 * 1024 * 1024)
+    for letters in ["A, T, C, G", "A,T,C,G,5mC,6mA", "A,T,C,G,P,Z,B,S"]:
+        codec = TableCodec(letters)
+        start = time.perf_counter()
+        strands = codec.encode_strands(data)
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        codec.decode_strands(strands)
+        decode_time = time.perf_counter() - start
+        results.append((f"Table codec {letters} encode", _throughput(len(data), encode_time), "MB/s"))
+        results.append((f"Table codec {letters} decode", _throughput(len(data), decode_time), "MB/s"))
+    return results
+
+
+def bench_read_dedup():
+    """Decode time of a 20x-coverage read set with and without collapsing duplicates."""
+    import os
+    from alphabet import TableCodec
+    from dedup import collapse_reads, duplication_factor
+    from simulator import simulate
+
+    codec = TableCodec("A,T,C,G,5mC,6mA")
+    reads = simulate(codec.encode_strands(os.urandom(1024 * 1024)), coverage=20.0, seed=0)
+    start = time.perf_counter()
+    codec.decode_strands(reads)
+    plain_time = time.perf_counter() - start
+    start = time.perf_counter()
+    records = collapse_reads(reads)
+    collapse_time = time.perf_counter() - start
+    codec.decode_strands([r.sequence for r in records], weights=[r.count for r in records])
+    dedup_time = time.perf_counter() - start
+    return [("Read duplication factor", duplication_factor(records), "x"),
+            ("Decode all reads", plain_time, "s"),
+            ("Collapse reads", collapse_time, "s"),
+            ("Collapse + decode distinct reads", dedup_time, "s"),
+            ("Dedup speed-up", plain_time / dedup_time, "x")]
+
+
+def bench_hybrid_code():
+    """HybridCode MB/s and bits per base per alphabet (GC 50%, homopolymer limit 4)."""
+    import os
+    from hybrid_code import hybrid_code
+
+    results = []
+    data = os.urandom(1024 * 1024)
+    for letters in ["A, T, C, G", "ATCGPZ", "A,T,C,G,5mC,6mA", "A,T,C,G,P,Z,B,S"]:
+        start = time.perf_counter()
+        codec = hybrid_code(letters, 50, 4)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        strands = codec.encode_strands(data)
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        codec.decode_strands(strands)
+        decode_time = time.perf_counter() - start
+        results.append((f"HybridCode {letters} tables", build_time * 1e3, "ms"))
+        results.append((f"HybridCode {letters} encode", _throughput(len(data), encode_time), "MB/s"))
+        results.append((f"HybridCode {letters} decode", _throughput(len(data), decode_time), "MB/s"))
+        results.append((f"HybridCode {letters} density", 8 * len(data) / sum(map(len, strands)), "bits/base"))
+    return results
+
+
+def bench_gui_startup(runs=3):
+    """Seconds from a fresh interpreter to the first paint of MBioStorageApp (best of ``runs``)."""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], cwd=here, env=env,
+                                 capture_output=True, text=True)
+        if process.returncode:
+            raise RuntimeError(f"GUI startup failed:\n{process.stderr}")
+        seconds, numpy_loaded, codecs_loaded = process.stdout.split()[-3:]
+        timings.append(float(seconds))
+    if int(numpy_loaded) or int(codecs_loaded):
+        warnings.warn("NumPy or codec modules are imported at GUI startup")
+    best = min(timings)
+    if best > STARTUP_TARGET:
+        warnings.warn(f"GUI startup took {best:.2f} s, above the {STARTUP_TARGET:.2f} s target")
+    return [(f"GUI startup (target {STARTUP_TARGET:.2f} s)", best, "s")]
+
+
+BENCHMARKS = {
+    "reed_solomon": bench_reed_solomon,
+    "alphabet_codec": bench_alphabet_codec,
+    "read_dedup": bench_read_dedup,
+    "hybrid_code": bench_hybrid_code,
+    "gui_startup": bench_gui_startup,
+}
+
+
+def main(names=None):
+    for name in names or BENCHMARKS:
+        for label, value, unit in BENCHMARKS[name]():
+            print(f"{label:<40} {value:>10.2f} {unit}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
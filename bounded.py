@@ -0,0 +1,488 @@
+"""Bounded-memory encoding and decoding of inputs larger than RAM.
+
+Under a memory budget the input is cut into blocks that are coded independently,
+so only the blocks currently being worked on are held in memory. Encoded strands
+are streamed to the output FASTA as soon as their block finishes, with every
+record tagged by its block (``>b{block}_{index}``). Decoding first spills the
+reads to disk-backed arrays, clusters them by block tag, and then decodes the
+blocks one cluster at a time. Blocks are processed on a process pool with no more
+blocks in flight than the budget allows.
+
+The tags are not trusted on their own: every block's payload starts with a
+header carrying the block index, a last-block flag, the block length and a
+CRC-32, so reads that lost their tags or were mixed across blocks fail with
+``BlockError`` instead of decoding to the wrong bytes::
+
+    MAGIC (4 bytes) | version (1 byte) | flags (1 byte) | block index (4 bytes)
+    | block length (8 bytes) | CRC-32 of the block (4 bytes), big endian
+
+The flags mark the last block and blocks that ``encode_block`` compressed; only
+those are decompressed again, so an input that was compressed as a whole before
+it was cut into blocks passes through as opaque bytes.
+
+Inputs encoded in memory are cut into blocks as well (``encode_blocks``, at most
+``BLOCK_SIZE`` bytes each), which makes a block the unit of checkpointing: a
+crashed encode or decode of one large file resumes from its last finished block.
+
+Run with ``python bounded.py encode INPUT OUTPUT --memory-budget 512M`` (or
+``decode``); the peak resident set size is printed at the end.
+"""
+import argparse
+import array
+import hashlib
+import itertools
+import os
+import re
+import struct
+import sys
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Working memory per input byte while one block is coded: the block itself, the
+# strand text (several bases per byte) and the codec's intermediate arrays
+EXPANSION = 24
+MIN_BLOCK_SIZE = 64 * 1024
+MAX_BLOCK_SIZE = 64 * 1024 * 1024
+BLOCK_SIZE = 4 * 1024 * 1024  # Blocks of in-memory encoding (encode_blocks), the unit of checkpointing
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+_BLOCK_TAG = re.compile(r"^b(\d+)_")
+
+BLOCK_MAGIC = b"MMDB"
+BLOCK_VERSION = 1
+BLOCK_HEADER = struct.Struct(">4sBBIQI")
+LAST_BLOCK = 0x01
+COMPRESSED_BLOCK = 0x02
+
+
+class BlockError(Exception):
+    """Raised for blocks that are missing, out of order, mixed up or fail their checksum."""
+
+
+def parse_size(text):
+    """Byte count from a size such as "1048576", "512M" or "2GB"."""
+    match = _SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def peak_rss():
+    """Peak resident set size in bytes as ``(this process, worker processes)``.
+
+    Returns ``(None, None)`` where the platform has no ``resource`` module.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def block_seed(seed, index):
+    """Seed of one block (or shard), derived from the job seed so every block differs."""
+    digest = hashlib.sha256(f"{seed}:{index}".encode("ascii")).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+def block_length(size, block_size=BLOCK_SIZE):
+    """Length of the blocks ``size`` bytes are split into: at most ``block_size``, as even as possible.
+
+    Even blocks let one set of per-block parameters (e.g. tuned DNA Fountain
+    overhead) fit every block, including the last one.
+    """
+    count = max(1, -(-size // block_size))
+    return max(1, -(-size // count))
+
+
+def plan_blocks(budget, workers=None):
+    """Block size and number of blocks in flight that fit in ``budget`` bytes.
+
+    One extra block is reserved for the block being written out or collected.
+    Raises ``ValueError`` if the budget cannot hold two blocks of ``MIN_BLOCK_SIZE``.
+    """
+    minimum = 2 * EXPANSION * MIN_BLOCK_SIZE
+    if budget < minimum:
+        raise ValueError(f"Memory budget of {budget} bytes is too small; at least {minimum} bytes "
+                         f"({minimum / 2 ** 20:g} MiB) are needed")
+    workers = max(1, min(workers or os.cpu_count(), budget // (EXPANSION * MIN_BLOCK_SIZE) - 1))
+    block_size = budget // (EXPANSION * (workers + 1))
+    return min(block_size, MAX_BLOCK_SIZE), workers
+
+
+class SpillArray:
+    """Append-only array of strings stored in a temporary file.
+
+    Only the offsets stay in memory; items are read back from the file on access.
+    """
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(suffix=".spill", dir=directory)
+        self._file = os.fdopen(fd, "w+b")
+        self._offsets = array.array("q", [0])
+
+    def append(self, text):
+        data = text.encode("ascii")
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def extend(self, items):
+        for text in items:
+            self.append(text)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        self._file.seek(start)
+        return self._file.read(end - start).decode("ascii")
+
+    def __iter__(self):
+        self._file.flush()
+        self._file.seek(0)
+        for i in range(len(self)):
+            yield self._file.read(self._offsets[i + 1] - self._offsets[i]).decode("ascii")
+
+    def take(self, indices):
+        """Items at ``indices`` as a list."""
+        return [self[int(i)] for i in indices]
+
+    def close(self):
+        """Close and delete the backing file."""
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self.path)
+
+
+def is_block(payload):
+    """True if ``payload`` starts with a block header."""
+    return len(payload) >= BLOCK_HEADER.size and payload[:4] == BLOCK_MAGIC
+
+
+def read_block(payload):
+    """Parse a decoded block payload into ``(index, last, data)``.
+
+    Raises ``BlockError`` if the header is missing or the data does not match its
+    length and checksum, e.g. because reads of several blocks were decoded together.
+    """
+    from compression import decompress
+
+    if not is_block(payload):
+        raise BlockError("Decoded data has no block header; reads may be untagged or from several blocks")
+    _, version, flags, index, length, crc = BLOCK_HEADER.unpack_from(payload)
+    if version != BLOCK_VERSION:
+        raise BlockError(f"Unsupported block version: {version}")
+    data = bytes(payload[BLOCK_HEADER.size:])
+    if flags & COMPRESSED_BLOCK:
+        data = decompress(data, workers=1)
+    # Codecs may pad the payload to whole strands; the header length is authoritative
+    data = data[:length]
+    if len(data) != length or zlib.crc32(data) != crc:
+        raise BlockError(f"Block {index} fails its checksum; reads may be untagged or from several blocks")
+    return index, bool(flags & LAST_BLOCK), data
+
+
+def unwrap_block(payload):
+    """Data of a payload decoded without block clustering.
+
+    Payloads without a block header are returned unchanged. A block header is only
+    accepted for input that holds a single block; anything else raises ``BlockError``.
+    """
+    if not is_block(payload):
+        return payload
+    index, last, data = read_block(payload)
+    if index != 0 or not last:
+        raise BlockError(f"Input holds more than one block (decoded block {index}); "
+                         "decode it block by block with a memory budget")
+    return data
+
+
+def encode_block(data, alphabet, method, gc_content=50, homopolymer_limit=4, compress=False, seed=None,
+                 index=0, last=True, extra=None):
+    """Encode one block into a list of strands (runs in a worker process).
+
+    ``compress`` is True (adaptive codec) or a codec name from ``compression.CODECS``;
+    ``seed`` is passed on to seeded encoders such as DNA Fountain and ``extra`` holds
+    keyword arguments ``methods.Encode`` must accept (see ``external.encode``).
+    ``index`` and ``last`` go into the block header in front of the payload.
+    """
+    from alphabet import codec_for
+
+    flags = (LAST_BLOCK if last else 0) | (COMPRESSED_BLOCK if compress else 0)
+    header = BLOCK_HEADER.pack(BLOCK_MAGIC, BLOCK_VERSION, flags, index, len(data), zlib.crc32(data))
+    if compress:
+        from compression import compress as compress_data
+
+        data = compress_data(data, None if compress is True else compress, workers=1)
+    data = header + data
+    codec = codec_for(alphabet, method, gc_content, homopolymer_limit)
+    if codec:
+        return list(codec.encode_strands(data))
+    import external
+
+    return external.encode(data, alphabet, method, gc_content, homopolymer_limit, seed, extra)
+
+
+def encode_blocks(data, alphabet, method, gc_content=50, homopolymer_limit=4, seed=0, extra=None, checkpoint=None,
+                  unit=0, block_size=BLOCK_SIZE):
+    """Encode ``data`` in this process as blocks of ``block_length``; returns one strand list per block.
+
+    Every block gets its own ``block_seed``. With a ``checkpoint`` each finished
+    block is recorded as unit ``(unit, block)``, so an interrupted encode of a large
+    input resumes from its last finished block.
+    """
+    from checkpoint import run_units
+
+    length = block_length(len(data), block_size)
+    count = max(1, -(-len(data) // length))
+
+    def encode(index):
+        return encode_block(data[index * length:(index + 1) * length], alphabet, method, gc_content,
+                            homopolymer_limit, seed=block_seed(seed, index), index=index, last=index == count - 1,
+                            extra=extra)
+
+    if checkpoint is None:
+        return [encode(index) for index in range(count)]
+    return run_units((((unit, index), index) for index in range(count)), encode, checkpoint)
+
+
+def block_fasta(blocks, prefix=""):
+    """FASTA text of per-block strand lists, every record tagged ``>{prefix}b{block}_{index}``."""
+    return "".join(f">{prefix}b{block}_{i}\n{seq}\n" for block, strands in enumerate(blocks)
+                   for i, seq in enumerate(strands))
+
+
+def decode_block(sequences, alphabet, method, gc_content=50, homopolymer_limit=4):
+    """Decode the strands of one block; returns ``(index, last, data)`` (runs in a worker process)."""
+    from dedup import decode_reads
+
+    data, _ = decode_reads(sequences, alphabet, method, gc_content, homopolymer_limit)
+    return read_block(bytes(data))
+
+
+def _bounded_map(func, jobs, workers, consume):
+    """Run ``func(*args)`` for each item of ``jobs`` with at most ``workers`` in flight.
+
+    Results are passed to ``consume`` in job order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for args in jobs:
+            if len(pending) >= workers:
+                consume(pending.popleft().result())
+            pending.append(pool.submit(func, *args))
+        while pending:
+            consume(pending.popleft().result())
+
+
+def encode_stream(stream, out, alphabet, method, budget, workers=None, **options):
+    """Encode a binary stream block by block and write tagged FASTA records to ``out``.
+
+    ``options`` are passed to ``encode_block`` (constraints, ``compress``). Returns a
+    stats dict with the block layout, strand count and peak RSS.
+    """
+    block_size, workers = plan_blocks(budget, workers)
+    stats = {"block_size": block_size, "workers": workers, "blocks": 0, "strands": 0}
+
+    def blocks():
+        # One block is read ahead so the last block can be flagged; an empty input is one empty block
+        data = stream.read(block_size)
+        for index in itertools.count():
+            following = stream.read(block_size)
+            yield data, alphabet, method, options.get("gc_content", 50), \
+                options.get("homopolymer_limit", 4), options.get("compress", False), None, index, not following
+            if not following:
+                return
+            data = following
+
+    def write(strands):
+        block = stats["blocks"]
+        out.write("".join(f">b{block}_{i}\n{seq}\n" for i, seq in enumerate(strands)))
+        stats["blocks"] += 1
+        stats["strands"] += len(strands)
+
+    _bounded_map(encode_block, blocks(), workers, write)
+    stats["peak_rss"], stats["peak_rss_workers"] = peak_rss()
+    return stats
+
+
+def is_tagged(fasta_path):
+    """True if the first record of a FASTA file carries a block tag (``>b{block}_``)."""
+    with open(fasta_path) as f:
+        for line in f:
+            if line.strip():
+                return line.startswith(">") and bool(_BLOCK_TAG.match(line[1:]))
+    return False
+
+
+def read_tagged(fasta_path):
+    """``(sequences, blocks)`` of a FASTA file held in memory, with the block tag of every record.
+
+    ``blocks`` is None if no record is tagged; otherwise untagged records belong to
+    block 0, as in ``cluster_reads``.
+    """
+    sequences = []
+    blocks = []
+    block = None
+    with open(fasta_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                match = _BLOCK_TAG.match(line[1:])
+                block = int(match.group(1)) if match else None
+            else:
+                sequences.append(line)
+                blocks.append(block)
+    if all(block is None for block in blocks):
+        return sequences, None
+    return sequences, [block or 0 for block in blocks]
+
+
+def cluster_reads(fasta_path, directory=None):
+    """Spill the reads of a FASTA file to disk and group them by block tag.
+
+    Returns ``(reads, clusters)``: a ``SpillArray`` of all reads and a list of
+    ``(block, read indices)`` in block order. Untagged reads belong to block 0.
+    """
+    import numpy as np  # Imported here so the GUI can use parse_size without loading NumPy
+
+    reads = SpillArray(directory)
+    blocks = array.array("q")
+    block = 0
+    with open(fasta_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                match = _BLOCK_TAG.match(line[1:])
+                block = int(match.group(1)) if match else 0
+            else:
+                reads.append(line)
+                blocks.append(block)
+    blocks = np.frombuffer(blocks, dtype=np.int64)
+    order = np.argsort(blocks, kind="stable")
+    ids, starts = np.unique(blocks[order], return_index=True)
+    bounds = list(starts[1:]) + [len(order)]
+    return reads, [(int(b), order[s:e]) for b, s, e in zip(ids, starts, bounds)]
+
+
+def decode_file(fasta_path, out, alphabet, method, budget=None, workers=None, gc_content=50, homopolymer_limit=4,
+                checkpoint=None):
+    """Decode a tagged FASTA file block by block, writing the bytes to ``out``.
+
+    Without a ``budget``, blocks are decoded on ``workers`` processes (default 1).
+    With a ``checkpoint``, the end offset of every written block is recorded and
+    blocks already in ``out`` are not decoded again; ``out`` must then be the
+    seekable file of the interrupted run (see ``resume_output``). Raises
+    ``BlockError`` unless the blocks decode to indices 0, 1, ... in order and the
+    final one carries the last-block flag.
+    """
+    workers = plan_blocks(budget, workers)[1] if budget else workers or 1
+    reads, clusters = cluster_reads(fasta_path)
+    stats = {"workers": workers, "blocks": len(clusters), "reads": len(reads), "bytes": 0, "resumed": 0}
+    decoded = {"next": 0, "last": False}
+
+    if checkpoint is not None:
+        # Blocks are written (and recorded) in order, so the restored blocks are a prefix of the input
+        size = out.seek(0, os.SEEK_END)
+        while decoded["next"] in checkpoint.done and not decoded["last"]:
+            last, end = checkpoint.done[decoded["next"]]
+            if end > size:
+                break
+            decoded.update(next=decoded["next"] + 1, last=last)
+            stats["bytes"] = end
+        out.seek(stats["bytes"])
+        out.truncate()
+        stats["resumed"] = decoded["next"]
+
+    def write(block):
+        index, last, data = block
+        if decoded["last"]:
+            raise BlockError(f"Block {index} follows the last block")
+        if index != decoded["next"]:
+            raise BlockError(f"Block {decoded['next']} is missing (decoded block {index} in its place)")
+        out.write(data)
+        stats["bytes"] += len(data)
+        decoded.update(next=index + 1, last=last)
+        if checkpoint is not None:
+            out.flush()
+            checkpoint.record(index, (last, stats["bytes"]))
+
+    try:
+        _bounded_map(decode_block, ((reads.take(indices), alphabet, method, gc_content, homopolymer_limit)
+                                    for _, indices in clusters[stats["resumed"]:]), workers, write)
+    finally:
+        reads.close()
+    if not decoded["last"]:
+        raise BlockError(f"Input ends after {decoded['next']} blocks without the last block")
+    stats["peak_rss"], stats["peak_rss_workers"] = peak_rss()
+    return stats
+
+
+def resume_output(checkpoint, suffix=".decoded"):
+    """``(path, file)`` to pass to a checkpointed ``decode_file`` as ``out``.
+
+    Reopens the output file of the interrupted run recorded in ``checkpoint`` if it
+    still exists, otherwise creates a temporary file and records its path.
+    """
+    path = checkpoint.state.get("output")
+    if path and os.path.exists(path):
+        return path, open(path, "r+b")
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    checkpoint.save_state("output", path)
+    return path, os.fdopen(fd, "w+b")
+
+
+def format_rss(stats):
+    """One-line peak RSS summary of a stats dict."""
+    if stats.get("peak_rss") is None:
+        return "Peak RSS: not available on this platform"
+    return (f"Peak RSS: {stats['peak_rss'] / 2 ** 20:.1f} MiB "
+            f"(workers {stats['peak_rss_workers'] / 2 ** 20:.1f} MiB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode or decode files larger than RAM under a memory budget.")
+    parser.add_argument("mode", choices=["encode", "decode"])
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--alphabet", default="A, T, C, G")
+    parser.add_argument("--method", default="DNA Fountain")
+    parser.add_argument("--gc-content", type=int, default=50)
+    parser.add_argument("--homopolymer-limit", type=int, default=4)
+    parser.add_argument("--compress", action="store_true", help="Compress every block before encoding")
+    parser.add_argument("--memory-budget", type=parse_size, default="1G", help="e.g. 512M, 2G (default: 1G)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "encode":
+        with open(args.input, "rb") as stream, open(args.output, "w") as out:
+            stats = encode_stream(stream, out, args.alphabet, args.method, args.memory_budget, args.workers,
+                                  gc_content=args.gc_content, homopolymer_limit=args.homopolymer_limit,
+                                  compress=args.compress)
+        print(f"Encoded {stats['blocks']} blocks of {stats['block_size']} bytes into {stats['strands']} strands")
+    else:
+        with open(args.output, "wb") as out:
+            stats = decode_file(args.input, out, args.alphabet, args.method, args.memory_budget, args.workers,
+                                args.gc_content, args.homopolymer_limit)
+        print(f"Decoded {stats['blocks']} blocks ({stats['reads']} reads) into {stats['bytes']} bytes")
+    print(format_rss(stats))
+
+
+if __name__ == "__main__":
+    main()
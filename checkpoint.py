@@ -0,0 +1,131 @@
+"""Checkpoint / resume support for long-running encode, simulate and decode jobs.
+
+A job is split into units (input files, blocks of an input, simulator chunks,
+...). Every finished unit is appended to a per-job log file together with any
+state needed to continue (e.g. the PRNG state), so after a crash the job is
+resumed from the last finished unit instead of from scratch. Records are only appended and the file is fsync'ed
+at most every ``interval`` seconds, which keeps the checkpoint cost small compared
+to the work done per unit.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+CHECKPOINT_DIR = os.environ.get(
+    "MMDNA_CHECKPOINT_DIR", os.path.join(os.path.expanduser("~"), ".mmdna", "checkpoints"))
+SYNC_INTERVAL = 10.0
+
+
+def job_key(*parts):
+    """Stable identifier of a job from its parameters and inputs.
+
+    ``bytes`` parts are hashed by content; other parts are hashed as JSON. File
+    paths found in dict parts under ``file_path`` also contribute their size and
+    modification time, so a changed input file does not resume a stale job.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(bytes(part))
+            continue
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        entries = part.get("files", [part]) if isinstance(part, dict) else []
+        for entry in entries:
+            path = entry.get("file_path") if isinstance(entry, dict) else None
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class Checkpoint:
+    """Append-only progress log of one job.
+
+    ``done`` maps unit ids to their recorded results and ``state`` holds extra
+    named values; both are restored from disk when the checkpoint is opened.
+    """
+
+    def __init__(self, key, directory=None, interval=SYNC_INTERVAL):
+        self.path = os.path.join(directory or CHECKPOINT_DIR, f"{key}.ckpt")
+        self.interval = interval
+        self.done = {}
+        self.state = {}
+        self._file = None
+        self._last_sync = time.monotonic()
+        self._load()
+        self.resumed = len(self.done)  # Units restored from a previous run
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    kind, name, value = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    # Torn last record from a crash mid-write; drop it
+                    break
+                good = f.tell()
+                if kind == "unit":
+                    self.done[name] = value
+                else:
+                    self.state[name] = value
+        if good != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _append(self, record):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "ab")
+        pickle.dump(record, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        # Flushing hands the record to the OS (survives an application crash); the
+        # more expensive fsync (survives a power loss) is rate limited
+        self._file.flush()
+        if time.monotonic() - self._last_sync >= self.interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+
+    def record(self, unit, result):
+        """Mark ``unit`` as finished with ``result``."""
+        self.done[unit] = result
+        self._append(("unit", unit, result))
+
+    def save_state(self, name, value):
+        self.state[name] = value
+        self._append(("state", name, value))
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Remove the checkpoint once the job has completed."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run_units(units, func, checkpoint):
+    """Call ``func(value)`` for every ``(unit_id, value)`` not already in the checkpoint.
+
+    Results are returned in unit order, mixing restored and freshly computed ones.
+    """
+    results = []
+    for unit, value in units:
+        if unit not in checkpoint.done:
+            checkpoint.record(unit, func(value))
+        results.append(checkpoint.done[unit])
+    return results
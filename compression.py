@@ -0,0 +1,155 @@
+"""Adaptive compression applied to the input before it is encoded into sequences.
+
+A few samples of the input are compressed with every candidate codec; the codec
+with the best trade-off between estimated size and CPU time is then applied to
+the whole input in independent blocks on a thread pool (zlib, bz2 and lzma all
+release the GIL). The chosen codec is recorded in a small frame header so
+``decompress`` can reverse it without any side information.
+
+Frame layout::
+
+    MAGIC (4 bytes) | version (1) | codec id (1) | block count (4)
+    | block table: (compressed length, raw length) x block count (4 + 4 each)
+    | compressed blocks
+"""
+import bz2
+import lzma
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b"MMDZ"
+VERSION = 1
+HEADER = struct.Struct(">4sBBI")
+BLOCK_ENTRY = struct.Struct(">II")
+
+BLOCK_SIZE = 1024 * 1024
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 4
+# Size fraction that one second of CPU per MB of input is worth; bases are paid per
+# strand, so a modest CPU cost is accepted for a better ratio
+CPU_WEIGHT = 0.02
+# Inputs that do not shrink below this fraction of their size are stored as-is
+STORE_THRESHOLD = 0.97
+
+# codec id -> (name, compress, decompress)
+CODECS = {
+    0: ("store", lambda b: b, lambda b: b),
+    1: ("zlib-6", lambda b: zlib.compress(b, 6), zlib.decompress),
+    2: ("zlib-9", lambda b: zlib.compress(b, 9), zlib.decompress),
+    3: ("bz2-9", lambda b: bz2.compress(b, 9), bz2.decompress),
+    4: ("lzma-6", lambda b: lzma.compress(b, preset=6), lzma.decompress),
+    5: ("lzma-9e", lambda b: lzma.compress(b, preset=9 | lzma.PRESET_EXTREME), lzma.decompress),
+}
+CODEC_IDS = {name: codec_id for codec_id, (name, _, _) in CODECS.items()}
+
+
+class CompressionError(Exception):
+    """Raised for malformed compression frames."""
+
+
+def is_compressed(data):
+    """True if ``data`` starts with a compression frame header."""
+    return len(data) >= HEADER.size and data[:4] == MAGIC
+
+
+def _samples(data, sample_size=SAMPLE_SIZE, count=SAMPLE_COUNT):
+    if len(data) <= sample_size * count:
+        return [data]
+    step = (len(data) - sample_size) // (count - 1)
+    return [data[i * step:i * step + sample_size] for i in range(count)]
+
+
+def choose_codec(data, cpu_weight=CPU_WEIGHT):
+    """Pick a codec name for ``data`` from compressing evenly spaced samples.
+
+    Returns ``(name, estimates)`` where ``estimates`` maps every candidate to its
+    estimated (size fraction, seconds per MB).
+    """
+    samples = _samples(data)
+    sampled = sum(len(s) for s in samples)
+    if not sampled:
+        return "store", {}
+
+    estimates = {}
+    for codec_id, (name, compress, _) in CODECS.items():
+        if codec_id == 0:
+            continue
+        start = time.perf_counter()
+        size = sum(len(compress(s)) for s in samples)
+        elapsed = time.perf_counter() - start
+        estimates[name] = (size / sampled, elapsed / sampled * 1e6)
+        if name == "zlib-6" and estimates[name][0] > STORE_THRESHOLD:
+            # Incompressible for the fastest codec; the slower ones are not worth probing
+            return "store", estimates
+
+    best = min(estimates, key=lambda n: estimates[n][0] + cpu_weight * estimates[n][1])
+    if estimates[best][0] > STORE_THRESHOLD:
+        return "store", estimates
+    return best, estimates
+
+
+def compress(data, codec=None, block_size=BLOCK_SIZE, workers=None):
+    """Compress ``data`` into a self-describing frame.
+
+    ``codec`` is a name from ``CODECS``; by default it is chosen adaptively.
+    """
+    data = bytes(data)
+    if codec is None:
+        codec, _ = choose_codec(data)
+    codec_id = CODEC_IDS[codec]
+    _, compress_block, _ = CODECS[codec_id]
+
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        compressed = list(pool.map(compress_block, blocks))
+
+    table = b"".join(BLOCK_ENTRY.pack(len(c), len(b)) for c, b in zip(compressed, blocks))
+    return HEADER.pack(MAGIC, VERSION, codec_id, len(blocks)) + table + b"".join(compressed)
+
+
+def compress_with_stats(data, codec=None):
+    """``compress`` plus a summary dict (codec, raw_bytes, compressed_bytes) for display."""
+    frame = compress(data, codec)
+    return frame, {"codec": frame_codec(frame), "raw_bytes": len(data), "compressed_bytes": len(frame)}
+
+
+def frame_codec(frame):
+    """Name of the codec recorded in a frame header."""
+    if not is_compressed(frame):
+        raise CompressionError("Not a compression frame")
+    return CODECS[HEADER.unpack_from(frame)[2]][0]
+
+
+def decompress(frame, workers=None):
+    """Reverse ``compress``; bytes after the frame (e.g. decoder padding) are ignored."""
+    if not is_compressed(frame):
+        raise CompressionError("Not a compression frame")
+    _, version, codec_id, count = HEADER.unpack_from(frame)
+    if version != VERSION or codec_id not in CODECS:
+        raise CompressionError(f"Unsupported frame (version {version}, codec {codec_id})")
+    _, _, decompress_block = CODECS[codec_id]
+
+    offset = HEADER.size + count * BLOCK_ENTRY.size
+    if len(frame) < offset:
+        raise CompressionError("Truncated frame")
+    blocks = []
+    sizes = []
+    for i in range(count):
+        length, raw_length = BLOCK_ENTRY.unpack_from(frame, HEADER.size + i * BLOCK_ENTRY.size)
+        blocks.append(frame[offset:offset + length])
+        sizes.append(raw_length)
+        offset += length
+    if len(frame) < offset:
+        raise CompressionError("Truncated frame")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            raw = list(pool.map(decompress_block, blocks))
+    except (zlib.error, OSError, EOFError, lzma.LZMAError) as e:
+        raise CompressionError(f"Corrupted block: {e}") from None
+    if [len(r) for r in raw] != sizes:
+        raise CompressionError("Block size mismatch")
+    return b"".join(raw)
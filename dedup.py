@@ -0,0 +1,163 @@
+"""Read deduplication and abundance collapsing, the first stage of decoding.
+
+High-coverage runs contain many identical reads. Each batch of reads is counted
+with ``collections.Counter`` on the read text and merged into an exact-match table,
+and every distinct read is collapsed into one ``ReadRecord(sequence, count, quality)``
+that keeps the best quality string seen. Later stages then work on distinct reads
+with ``count`` as their weight.
+
+While reads are counted, the table holds at most ``max_entries`` distinct reads.
+When the next batch could overflow it, its entries are spilled to partition files
+on disk by key hash and each partition is merged on its own at the end, so the
+counting memory does not grow with the number of reads. The result itself is one
+record per distinct read and is held in memory, like the reads a decoder needs.
+"""
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+from collections import Counter, namedtuple
+
+import numpy as np
+
+ReadRecord = namedtuple("ReadRecord", ["sequence", "count", "quality"])
+
+MAX_ENTRIES = 1_000_000
+PARTITIONS = 64
+BATCH_SIZE = 262144
+
+
+def read_records(path):
+    """Yield ``(sequence, quality)`` from a FASTA or FASTQ file (quality is None for FASTA)."""
+    with open(path) as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == "@":
+            while True:
+                header = f.readline()
+                if not header:
+                    return
+                sequence = f.readline().strip()
+                f.readline()
+                yield sequence, f.readline().strip()
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(">"):
+                yield line, None
+
+
+def _mean_qualities(qualities):
+    """Mean Phred character code of every FASTQ quality string (0 for empty ones)."""
+    lengths = np.fromiter(map(len, qualities), dtype=np.int64, count=len(qualities))
+    codes = np.frombuffer("".join(qualities).encode("ascii"), dtype=np.uint8)
+    totals = np.concatenate([[0], np.cumsum(codes, dtype=np.int64)])
+    ends = np.cumsum(lengths)
+    return ((totals[ends] - totals[ends - lengths]) / np.maximum(lengths, 1)).tolist()
+
+
+def _merge(table, key, count, quality, score):
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [count, quality, score]
+        return
+    entry[0] += count
+    if score > entry[2]:
+        entry[1], entry[2] = quality, score
+
+
+def collapse_reads(reads, max_entries=MAX_ENTRIES, partitions=PARTITIONS, directory=None):
+    """Collapse identical reads into ``ReadRecord`` entries, most abundant first.
+
+    ``reads`` is an iterable of sequences or ``(sequence, quality)`` pairs and is
+    consumed in batches, so it can be a generator over a file larger than RAM; the
+    returned list still holds every distinct read.
+    """
+    counts = Counter()
+    best = {}  # sequence -> (quality, score) of its best-quality copy; score is the mean quality
+    spill_dir = None
+    spill_files = []
+
+    def spill():
+        nonlocal spill_dir
+        if spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix="dedup-", dir=directory)
+            spill_files.extend(open(os.path.join(spill_dir, f"{p}.part"), "w+b") for p in range(partitions))
+        for key, count in counts.items():
+            pickle.dump((key, count, *best.get(key, (None, -1.0))), spill_files[hash(key) % partitions],
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        counts.clear()
+        best.clear()
+
+    reads = iter(reads)
+    batch_size = max(1, min(BATCH_SIZE, max_entries // 2))
+    while True:
+        batch = list(itertools.islice(reads, batch_size))
+        if not batch:
+            break
+        if set(map(type, batch)) == {str}:
+            counts.update(batch)
+        else:
+            pairs = [read for read in batch if not isinstance(read, str)]
+            counts.update([read for read in batch if isinstance(read, str)])
+            counts.update([sequence for sequence, _ in pairs])
+            pairs = [(sequence, quality) for sequence, quality in pairs if quality is not None]
+            if pairs:
+                qualities = [quality for _, quality in pairs]
+                for (sequence, quality), score in zip(pairs, _mean_qualities(qualities)):
+                    kept = best.get(sequence)
+                    if kept is None or score > kept[1]:
+                        best[sequence] = (quality, score)
+        # A batch adds at most batch_size distinct reads, so spilling now keeps the table within max_entries
+        if len(counts) + batch_size > max_entries:
+            spill()
+
+    if spill_dir is None:
+        records = [ReadRecord(key, count, best.get(key, (None,))[0]) for key, count in counts.items()]
+    else:
+        spill()
+        records = []
+        try:
+            for f in spill_files:
+                f.seek(0)
+                partition = {}
+                while True:
+                    try:
+                        key, *entry = pickle.load(f)
+                    except EOFError:
+                        break
+                    _merge(partition, key, *entry)
+                records.extend(ReadRecord(key, count, quality) for key, (count, quality, _) in partition.items())
+        finally:
+            for f in spill_files:
+                f.close()
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    records.sort(key=lambda r: (-r.count, r.sequence))
+    return records
+
+
+def decode_reads(reads, alphabet, method, gc_content=50, homopolymer_limit=4, fill_missing=False):
+    """Collapse ``reads`` and decode the distinct ones; returns ``(data, records)``.
+
+    The in-process codecs weigh every distinct read by its count; HybridCode needs
+    the constraints the strands were encoded with, and ``fill_missing`` zero-fills
+    lost strands instead of raising. Other methods get the distinct reads, most
+    abundant first, with their counts as weights where ``methods.Decode`` takes
+    them (see ``external.decode``), so they also do the work once per distinct read.
+    """
+    from alphabet import codec_for
+
+    records = collapse_reads(reads)
+    sequences = [r.sequence for r in records]
+    codec = codec_for(alphabet, method, gc_content, homopolymer_limit)
+    if codec:
+        return codec.decode_strands(sequences, weights=[r.count for r in records], fill_missing=fill_missing), records
+    import external
+
+    return external.decode(sequences, alphabet, method, weights=[r.count for r in records]), records
+
+
+def duplication_factor(records):
+    """Reads per distinct read."""
+    return sum(r.count for r in records) / len(records) if records else 1.0
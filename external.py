@@ -0,0 +1,62 @@
+"""Calls into the external ``methods`` package (DNA Fountain, YYC, HEDGES, Huffman).
+
+The package is only known to provide ``Encode(data, letters, method)``. Further
+options are passed only where its functions accept them: the constraints and the
+seed are best effort (encoders that do not take them ignore them, as before),
+while options a job cannot do without, such as tuned DNA Fountain parameters,
+raise ``ValueError`` up front instead of being dropped silently.
+"""
+import inspect
+
+
+def _accepts(func, name):
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(p.kind is p.VAR_KEYWORD for p in parameters.values())
+
+
+def _function(name):
+    import methods
+
+    func = getattr(methods, name, None)
+    if func is None:
+        raise ValueError(f"The installed methods package has no {name}")
+    return func
+
+
+def check_options(names, function="Encode"):
+    """Raise ValueError unless ``methods.<function>`` accepts every keyword in ``names``."""
+    func = _function(function)
+    missing = [name for name in names if not _accepts(func, name)]
+    if missing:
+        raise ValueError(f"methods.{function} does not accept {', '.join(missing)}")
+
+
+def encode(data, letters, method, gc_content=None, homopolymer_limit=None, seed=None, extra=None):
+    """Strands of ``data`` from ``methods.Encode``.
+
+    ``gc_content``, ``homopolymer_limit`` and ``seed`` are passed if the encoder
+    takes them; every keyword in ``extra`` must be accepted (see ``check_options``).
+    """
+    func = _function("Encode")
+    options = {name: value for name, value in
+               (("gc_content", gc_content), ("homopolymer_limit", homopolymer_limit), ("seed", seed))
+               if value is not None and _accepts(func, name)}
+    if extra:
+        check_options(extra)
+        options.update(extra)
+    return list(func(data, letters, method, **options))
+
+
+def decode(reads, letters, method, weights=None):
+    """Data decoded by ``methods.Decode`` from distinct ``reads``.
+
+    ``weights`` (e.g. read counts) are passed if the decoder takes them; otherwise
+    it sees every distinct read once.
+    """
+    func = _function("Decode")
+    if weights is not None and _accepts(func, "weights"):
+        return func(reads, letters, method, weights=weights)
+    return func(reads, letters, method)
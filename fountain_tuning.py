@@ -0,0 +1,238 @@
+"""Automatic overhead and degree-distribution tuning for DNA Fountain.
+
+Instead of guessing how many droplets to synthesize, the channel is first run
+through the in-process simulator to estimate how many droplets are lost (dropped
+out, or only read with more errors than the per-droplet Reed-Solomon code can
+correct). Monte-Carlo trials of the fountain decoder then find, for every
+candidate robust-soliton ``(c, delta)``, the droplet count that decodes with the
+target probability, and the cheapest candidate is kept.
+
+Each trial streams droplets into an incremental peeling decoder until every
+segment is recovered, so one trial yields the number of droplets that decoding
+needed; the required count is the target quantile over all trials. Trials run in
+parallel on a process pool, and tuned parameters are cached per (segment count
+bucket, technology, coverage, target).
+
+Run with ``python fountain_tuning.py SIZE --sequencing Illumina``.
+"""
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SEGMENT_BYTES = 32  # Payload bytes per droplet
+STRAND_LENGTH = 152  # Droplet length in bases (seed + payload + Reed-Solomon parity)
+CORRECTABLE_BASES = 4  # Substitutions the per-droplet Reed-Solomon code corrects
+# Tuning runs on at most this many segments; the overhead of a robust-soliton code
+# shrinks as the segment count grows, so the result is conservative for larger files
+MAX_TUNE_SEGMENTS = 1024
+C_VALUES = (0.025, 0.05, 0.1)
+DELTA_VALUES = (0.05, 0.5)
+TRIALS = 200
+TARGET = 0.99
+
+CACHE_PATH = os.environ.get(
+    "MMDNA_FOUNTAIN_CACHE", os.path.join(os.path.expanduser("~"), ".mmdna", "fountain_tuning.json"))
+
+
+def robust_soliton(k, c, delta):
+    """Robust soliton degree probabilities for degrees 1..k (index 0 is degree 1)."""
+    degrees = np.arange(1, k + 1, dtype=np.float64)
+    rho = np.empty(k)
+    rho[0] = 1.0 / k
+    rho[1:] = 1.0 / (degrees[1:] * (degrees[1:] - 1))
+    s = c * math.log(k / delta) * math.sqrt(k)
+    pivot = max(1, min(k, int(round(k / s))))
+    tau = np.zeros(k)
+    tau[:pivot - 1] = s / (k * degrees[:pivot - 1])
+    tau[pivot - 1] = s * math.log(s / delta) / k
+    mu = rho + tau
+    return mu / mu.sum()
+
+
+def estimate_loss(synthesis="None", storage="None", sequencing="None", coverage=10.0, sample=2000, seed=0):
+    """Fraction of droplets that cannot be recovered from the simulated channel.
+
+    A droplet is recovered if at least one of its reads has the original length
+    and at most ``CORRECTABLE_BASES`` substitutions.
+    """
+    from simulator import apply_errors, combined_profile
+
+    rng = np.random.default_rng(seed)
+    profile = combined_profile(synthesis, storage, sequencing)
+    strands = np.frombuffer(b"ATCG", dtype=np.uint8)[rng.integers(0, 4, (sample, STRAND_LENGTH))]
+    copies = rng.poisson(coverage, sample) * (rng.random(sample) >= profile["dropout"])
+    origin = np.repeat(np.arange(sample), copies)
+    reads = apply_errors([strands[i].tobytes().decode("ascii") for i in origin.tolist()],
+                         profile["sub"], profile["ins"], profile["del"], rng)
+
+    recovered = np.zeros(sample, dtype=bool)
+    same_length = [i for i, read in enumerate(reads) if len(read) == STRAND_LENGTH]
+    if same_length:
+        data = np.frombuffer("".join(reads[i] for i in same_length).encode("ascii"), dtype=np.uint8)
+        mismatches = (data.reshape(-1, STRAND_LENGTH) != strands[origin[same_length]]).sum(axis=1)
+        recovered[origin[same_length][mismatches <= CORRECTABLE_BASES]] = True
+    return float(1.0 - recovered.mean())
+
+
+def droplets_needed(k, probs, loss, rng):
+    """Droplets synthesized until an incremental peeling decoder recovers all ``k`` segments.
+
+    Every droplet is lost with probability ``loss``. Each received droplet keeps
+    the count and XOR of its unresolved segments; a droplet with one unresolved
+    segment resolves it, which is propagated to the droplets waiting on it.
+    """
+    picker = random.Random(int(rng.integers(1 << 63)))
+    known = bytearray(k)
+    waiting = [[] for _ in range(k)]
+    count = []
+    xor = []
+    recovered = 0
+    synthesized = 0
+    while True:
+        # Degrees and losses are drawn in batches; the loop below consumes them one droplet at a time
+        degrees = (rng.choice(k, size=k, p=probs) + 1).tolist()
+        lost = (rng.random(k) < loss).tolist()
+        for degree, is_lost in zip(degrees, lost):
+            synthesized += 1
+            if is_lost:
+                continue
+            pending = [s for s in picker.sample(range(k), degree) if not known[s]]
+            if not pending:
+                continue
+            droplet = len(count)
+            count.append(len(pending))
+            value = 0
+            for s in pending:
+                value ^= s
+                waiting[s].append(droplet)
+            xor.append(value)
+            stack = [droplet] if len(pending) == 1 else []
+            while stack:
+                d = stack.pop()
+                if count[d] != 1:
+                    continue
+                s = xor[d]
+                known[s] = 1
+                recovered += 1
+                for e in waiting[s]:
+                    count[e] -= 1
+                    xor[e] ^= s
+                    if count[e] == 1:
+                        stack.append(e)
+                waiting[s] = []
+            if recovered == k:
+                return synthesized
+
+
+def _run_trials(k, c, delta, loss, trials, seed):
+    """Worker: ``droplets_needed`` for a batch of trials."""
+    rng = np.random.default_rng(seed)
+    probs = robust_soliton(k, c, delta)
+    return [droplets_needed(k, probs, loss, rng) for _ in range(trials)]
+
+
+def required_droplets(k, c, delta, loss, target=TARGET, trials=TRIALS, seed=0, pool=None, workers=None):
+    """Droplets that decode with probability ``target``, from parallel Monte-Carlo trials."""
+    workers = workers or os.cpu_count()
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [trials // workers + (i < trials % workers) for i in range(workers)]
+    jobs = [(k, c, delta, loss, n, s) for n, s in zip(sizes, seeds) if n]
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            needed = [n for batch in pool.map(_run_trials, *zip(*jobs)) for n in batch]
+    else:
+        needed = [n for batch in pool.map(_run_trials, *zip(*jobs)) for n in batch]
+    return int(np.ceil(np.quantile(needed, target)))
+
+
+def segment_bucket(file_size, segment_bytes=SEGMENT_BYTES):
+    """Segment count tuned for a file: its own count rounded up to a power of two, capped."""
+    segments = max(1, -(-file_size // segment_bytes))
+    return min(MAX_TUNE_SEGMENTS, 1 << (segments - 1).bit_length())
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def tune(file_size, synthesis="None", storage="None", sequencing="None", coverage=10.0, target=TARGET,
+         trials=TRIALS, workers=None, seed=0, cache_path=CACHE_PATH):
+    """Tuned DNA Fountain parameters for a file of ``file_size`` bytes.
+
+    Returns a dict with the robust-soliton ``c`` and ``delta``, the estimated
+    ``loss``, the droplet ``overhead`` (fraction beyond the segment count) and the
+    ``droplets`` to synthesize for this file. Results are cached in ``cache_path``
+    (pass None to disable the cache).
+    """
+    k = segment_bucket(file_size)
+    key = f"{k}|{synthesis}|{storage}|{sequencing}|{coverage}|{target}"
+    cache = _load_cache(cache_path) if cache_path else {}
+    if key not in cache:
+        loss = estimate_loss(synthesis, storage, sequencing, coverage, seed=seed)
+        if loss >= 0.95:
+            raise ValueError(f"Channel loses {loss:.0%} of droplets; increase coverage")
+        best = None
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for c in C_VALUES:
+                for delta in DELTA_VALUES:
+                    n = required_droplets(k, c, delta, loss, target, trials, seed, pool, workers)
+                    if best is None or n < best["droplets"]:
+                        best = {"segments": k, "c": c, "delta": delta, "droplets": n}
+        cache[key] = dict(best, loss=loss, overhead=best["droplets"] / k - 1.0, trials=trials)
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(cache, f, indent=1, sort_keys=True)
+
+    params = dict(cache[key])
+    segments = max(1, -(-file_size // SEGMENT_BYTES))
+    params.update(segments=segments, droplets=math.ceil(segments * (1.0 + params["overhead"])))
+    return params
+
+
+ENCODE_OPTIONS = ("c_dist", "delta", "alpha")  # Options of the reference DNA Fountain encoder
+
+
+def encode_kwargs(params):
+    """Tuned parameters as ``ENCODE_OPTIONS`` keywords for ``methods.Encode``.
+
+    ``external.encode`` raises ValueError if the installed encoder does not take
+    them; call ``external.check_options(ENCODE_OPTIONS)`` before tuning to fail early.
+    """
+    return {"c_dist": params["c"], "delta": params["delta"], "alpha": params["overhead"]}
+
+
+def main(argv=None):
+    from bounded import parse_size
+
+    parser = argparse.ArgumentParser(description="Tune DNA Fountain overhead for a file size and channel.")
+    parser.add_argument("size", type=parse_size, help="File size, e.g. 1M")
+    parser.add_argument("--synthesis", default="None")
+    parser.add_argument("--storage", default="None")
+    parser.add_argument("--sequencing", default="None")
+    parser.add_argument("--coverage", type=float, default=10.0)
+    parser.add_argument("--target", type=float, default=TARGET, help="Decode success probability")
+    parser.add_argument("--trials", type=int, default=TRIALS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    params = tune(args.size, args.synthesis, args.storage, args.sequencing, args.coverage, args.target,
+                  args.trials, args.workers, cache_path=None if args.no_cache else CACHE_PATH)
+    print(f"Segments: {params['segments']} (tuned at {min(params['segments'], MAX_TUNE_SEGMENTS)} bucket)")
+    print(f"Estimated droplet loss: {params['loss']:.2%}")
+    print(f"Robust soliton: c={params['c']}, delta={params['delta']}")
+    print(f"Droplets: {params['droplets']} (overhead {params['overhead']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""HybridCode: constraint-aware mapping of bytes onto natural and unnatural bases.
+
+Strands are produced by a finite-state machine. Its state is the last base, that
+base's run length and the running GC surplus. A base is only allowed if it
+keeps the run within the homopolymer limit and the GC count within
+``GC_SLACK`` bases of the target at every point of the strand. States whose
+allowed bases all lead to dead ends are pruned. Each state writes its allowed
+bases with a truncated binary code: with m choices, some bases carry
+floor(log2 m) bits and the rest one bit more, so every choice is used.
+
+All tables depend only on (alphabet, GC target, homopolymer limit), so they are
+built once per configuration and cached. Encoding and decoding advance every
+segment of the input by one base per step, with table lookups over whole
+arrays.
+
+Strands are protected by an interleaved Reed-Solomon outer code
+(``rs_code.StrandOuterCode``). Data strands are coded in groups of up to
+``MAX_GROUP_STRANDS``, each followed by its parity strands, so a lost or
+corrupted strand costs one erasure or error in its group. It does not shift the
+data. Every strand starts with a 4-byte index: group (2 bytes), position in the
+group (1 byte) and data strands per group (1 byte).
+"""
+import functools
+import math
+
+import numpy as np
+
+from alphabet import CHARS, CHAR_TO_CODE, SYMBOL_CODES, StrandDecodeError, parse_letters, reassemble
+from rs_code import ReedSolomonError, StrandOuterCode
+
+GC_SLACK = 3  # Largest GC surplus or deficit, in bases, allowed at any point of a strand
+GC_SYMBOLS = ("G", "C", "5mC")
+INDEX_BYTES = 4
+MAX_GROUP_STRANDS = 230  # Data strands per outer-code group (data + parity stay below 255)
+OUTER_REDUNDANCY = 0.1  # Parity strands per data strand
+MAX_GROUPS = 1 << 16
+
+
+def outer_layout(rows):
+    """``(groups, data strands per group, parity strands per group)`` for ``rows`` data strands."""
+    groups = max(1, -(-rows // MAX_GROUP_STRANDS))
+    if groups > MAX_GROUPS:
+        raise ValueError(f"Input needs {groups} outer-code groups; at most {MAX_GROUPS} are supported")
+    per_group = -(-rows // groups)
+    return groups, per_group, parity_strands(per_group)
+
+
+def parity_strands(per_group):
+    return max(2, math.ceil(per_group * OUTER_REDUNDANCY))
+
+
+class HybridCode:
+    """Constrained strand codec for one (alphabet, GC, homopolymer) configuration.
+
+    Use ``hybrid_code`` to get a cached instance.
+    """
+
+    def __init__(self, letters, gc_content=50, homopolymer_limit=4):
+        self.tokens = parse_letters(letters) if isinstance(letters, str) else list(letters)
+        if len(self.tokens) < 2:
+            raise ValueError(f"Alphabet needs at least two symbols: {letters!r}")
+        self.gc_content = gc_content
+        self.homopolymer_limit = homopolymer_limit
+        self.digit_to_code = np.array([SYMBOL_CODES[t] for t in self.tokens], dtype=np.uint8)
+        self.code_to_digit = np.full(256, 255, dtype=np.uint8)
+        self.code_to_digit[self.digit_to_code] = np.arange(len(self.tokens), dtype=np.uint8)
+        self._build_tables()
+
+    def _build_tables(self):
+        radix = len(self.tokens)
+        strong = [token in GC_SYMBOLS for token in self.tokens]
+        # GC surplus in hundredths of a base: +(100 - gc) per GC base, -gc per other base
+        bound = 100 * GC_SLACK
+        states = [(-1, 0, 0)]
+        index = {states[0]: 0}
+        rows = []
+        for last, run, surplus in states:
+            row = []
+            for digit in range(radix):
+                next_run = run + 1 if digit == last else 1
+                next_surplus = surplus + (100 - self.gc_content if strong[digit] else -self.gc_content)
+                if next_run > self.homopolymer_limit or abs(next_surplus) > bound:
+                    row.append(-1)
+                    continue
+                key = (digit, next_run, next_surplus)
+                if key not in index:
+                    index[key] = len(states)
+                    states.append(key)
+                row.append(index[key])
+            rows.append(row)
+        next_state = np.array(rows, dtype=np.int64)
+
+        # Drop transitions into states that cannot continue, until nothing changes
+        alive = np.ones(len(states), dtype=bool)
+        while True:
+            allowed = (next_state >= 0) & alive[np.maximum(next_state, 0)]
+            still_alive = alive & allowed.any(axis=1)
+            if (still_alive == alive).all():
+                break
+            alive = still_alive
+        if not alive[0]:
+            raise ValueError(self._infeasible())
+
+        # Renumber the live states and build the per-state code tables
+        renumber = np.full(len(states), -1, dtype=np.int64)
+        renumber[alive] = np.arange(alive.sum())
+        next_state = np.where(allowed, renumber[np.maximum(next_state, 0)], -1)[alive]
+        allowed = allowed[alive]
+        counts = allowed.sum(axis=1)
+
+        # Input is only consumed in states with a choice of base. A reachable cycle of
+        # states with a single choice (e.g. two symbols that must alternate) carries 0 bits
+        reachable = np.zeros(len(counts), dtype=bool)
+        reachable[0] = True
+        while True:
+            grown = reachable.copy()
+            grown[next_state[reachable][allowed[reachable]]] = True
+            if (grown == reachable).all():
+                break
+            reachable = grown
+        forced_next = next_state[np.arange(len(counts)), allowed.argmax(axis=1)]
+        escapes = counts > 1  # States from which a choice of base is eventually reached
+        while True:
+            grown = escapes | escapes[forced_next]
+            if (grown == escapes).all():
+                break
+            escapes = grown
+        if (reachable & ~escapes).any():
+            raise ValueError(self._infeasible() + " that carries any data")
+
+        self.next_state = next_state
+        self.bits = np.floor(np.log2(counts)).astype(np.int64)  # short codeword length
+        self.short = (1 << (self.bits + 1)) - counts  # choices with the short codeword
+        # choice -> digit and digit -> choice (-1 = not allowed) per state
+        self.choice_digit = np.zeros((len(counts), radix), dtype=np.int64)
+        self.digit_choice = np.full((len(counts), radix), -1, dtype=np.int64)
+        for state, row in enumerate(allowed):
+            digits = np.flatnonzero(row)
+            self.choice_digit[state, :len(digits)] = digits
+            self.digit_choice[state, digits] = np.arange(len(digits))
+        self.max_bits = int(self.bits.max()) + 1
+        self.states = len(counts)
+
+    def _infeasible(self):
+        return (f"No strand satisfies GC {self.gc_content}% and homopolymer limit "
+                f"{self.homopolymer_limit} over {self.tokens}")
+
+    def encode_segments(self, segments):
+        """Encode rows of a (count, bytes) uint8 array into symbol codes.
+
+        Returns ``(codes, lengths)``: a (count, steps) array and the strand length
+        of every row.
+        """
+        segments = np.asarray(segments, dtype=np.uint8)
+        count = len(segments)
+        total = segments.shape[1] * 8
+        bits = np.zeros((count, total + 2 * self.max_bits), dtype=np.int64)  # room to peek past the end
+        bits[:, :total] = np.unpackbits(segments, axis=1)
+        offsets = np.arange(self.max_bits)
+        weights = 1 << offsets[::-1]
+
+        state = np.zeros(count, dtype=np.int64)
+        pos = np.zeros(count, dtype=np.int64)
+        rows = np.arange(count)
+        steps = []
+        active = pos < total
+        while active.any():
+            if len(steps) > 16 * total + 64:
+                raise RuntimeError("HybridCode encoder did not make progress")
+            k = self.bits[state]
+            # The next max_bits input bits as one integer; the codeword is its top k or k + 1 bits
+            peek = bits[rows[:, None], pos[:, None] + offsets] @ weights
+            short_value = peek >> (self.max_bits - k)
+            long_value = peek >> (self.max_bits - k - 1)
+            is_long = short_value >= self.short[state]
+            choice = np.where(is_long, long_value - self.short[state], short_value)
+            digit = self.choice_digit[state, choice]
+            steps.append(np.where(active, digit, -1))
+            state = np.where(active, self.next_state[state, digit], state)
+            pos += np.where(active, k + is_long, 0)
+            active = pos < total
+        digits = np.stack(steps, axis=1) if steps else np.zeros((count, 0), dtype=np.int64)
+        lengths = (digits >= 0).sum(axis=1)
+        codes = self.digit_to_code[np.maximum(digits, 0)]
+        return codes, lengths
+
+    def decode_segments(self, digits, lengths, segment_bytes):
+        """Reverse ``encode_segments`` on digit rows; returns ``(segments, valid)``.
+
+        Rows that break the constraints or end before ``segment_bytes`` are not valid.
+        """
+        count = len(digits)
+        total = segment_bytes * 8
+        width = digits.shape[1] * self.max_bits + 1
+        bits = np.zeros((count, max(width, total)), dtype=np.uint8)
+        state = np.zeros(count, dtype=np.int64)
+        pos = np.zeros(count, dtype=np.int64)
+        valid = np.ones(count, dtype=bool)
+        rows = np.arange(count)
+        for step in range(digits.shape[1]):
+            active = (step < lengths) & valid
+            digit = digits[:, step]
+            choice = self.digit_choice[state, digit]
+            valid &= ~active | (choice >= 0)
+            active &= choice >= 0
+            k = self.bits[state]
+            is_long = choice >= self.short[state]
+            length = k + is_long
+            value = np.where(is_long, choice + self.short[state], choice)
+            for b in range(self.max_bits):
+                write = active & (b < length)
+                bits[rows[write], pos[write] + b] = (value[write] >> (length[write] - 1 - b)) & 1
+            pos += np.where(active, length, 0)
+            state = np.where(active, self.next_state[state, digit], state)
+        valid &= pos >= total
+        return np.packbits(bits[:, :total], axis=1), valid
+
+    def encode_strands(self, data, payload_bytes=30):
+        """Split ``data`` into indexed strands and encode all of them in one batched pass.
+
+        Data strands carry ``payload_bytes`` each; strand 0's payload starts with
+        the total length so padding can be removed. Every group of data strands is
+        followed by its Reed-Solomon parity strands.
+        """
+        framed = len(data).to_bytes(8, "big") + bytes(data)
+        framed += bytes(-len(framed) % payload_bytes)
+        rows = len(framed) // payload_bytes
+        groups, per_group, parity = outer_layout(rows)
+        payloads = np.zeros((groups * per_group, payload_bytes), dtype=np.uint8)
+        payloads[:rows] = np.frombuffer(framed, dtype=np.uint8).reshape(rows, payload_bytes)
+        coded = StrandOuterCode(parity).encode_groups(payloads.reshape(groups, per_group, payload_bytes))
+
+        width = per_group + parity
+        segments = np.zeros((groups, width, INDEX_BYTES + payload_bytes), dtype=np.uint8)
+        segments[:, :, :2] = np.arange(groups, dtype=">u2").view(np.uint8).reshape(groups, 1, 2)
+        segments[:, :, 2] = np.arange(width, dtype=np.uint8)
+        segments[:, :, 3] = per_group
+        segments[:, :, INDEX_BYTES:] = coded
+        codes, lengths = self.encode_segments(segments.reshape(groups * width, -1))
+        text = CHARS[codes].tobytes().decode("ascii")
+        steps = codes.shape[1]
+        return [text[i * steps:i * steps + n] for i, n in enumerate(lengths.tolist())]
+
+    def decode_strands(self, strands, weights=None, payload_bytes=30, fill_missing=False):
+        """Reassemble data from (possibly shuffled / duplicated / corrupted) strands.
+
+        Strands that violate the constraints are discarded. Where several strands
+        carry the same index the one with the highest ``weights`` entry is used,
+        else the first one. Each group is then corrected by the outer code, with
+        missing strands as erasures. Groups that cannot be corrected raise
+        ``StrandDecodeError``, unless ``fill_missing`` is set, in which case
+        their bytes are zero-filled.
+        """
+        if not strands:
+            raise StrandDecodeError("No strands to decode")
+        lengths = np.array([len(s) for s in strands], dtype=np.int64)
+        width = int(lengths.max())
+        padded = "".join(s.ljust(width, "A") for s in strands).encode("ascii")
+        digits = self.code_to_digit[CHAR_TO_CODE[np.frombuffer(padded, dtype=np.uint8)]].reshape(len(strands), width)
+        # Symbols outside the alphabet are mapped to digit 0; their strands are dropped below
+        bad = ((digits == 255) & (np.arange(width) < lengths[:, None])).any(axis=1)
+        digits = np.where(digits == 255, 0, digits).astype(np.int64)
+
+        segments, valid = self.decode_segments(digits, lengths, INDEX_BYTES + payload_bytes)
+        keep = np.flatnonzero(valid & ~bad)
+        if not len(keep):
+            raise StrandDecodeError("No strand satisfies the HybridCode constraints")
+        rows = segments[keep]
+        group = rows[:, :2].copy().view(">u2").ravel().astype(np.int64)
+        position = rows[:, 2].astype(np.int64)
+        # The group size is repeated in every strand; a corrupted copy is outvoted
+        per_group = int(np.bincount(rows[:, 3]).argmax())
+        if not per_group:
+            raise StrandDecodeError("Strand indices are corrupted")
+        parity = parity_strands(per_group)
+        total = per_group + parity
+        fits = (rows[:, 3] == per_group) & (position < total)
+        rows, group, position = rows[fits], group[fits], position[fits]
+        key = group * total + position
+        if weights is None:
+            order = np.unique(key, return_index=True)[1]  # first copy of every strand
+        else:
+            ranked = np.lexsort((-np.asarray(weights, dtype=np.float64)[keep][fits], key))
+            order = ranked[np.unique(key[ranked], return_index=True)[1]]
+
+        groups = {}
+        for g, p, i in zip(group[order].tolist(), position[order].tolist(), order.tolist()):
+            groups.setdefault(g, {})[p] = i
+        code = StrandOuterCode(parity)
+        payloads = rows[:, INDEX_BYTES:]
+
+        def correct(ids):
+            """Corrected data rows of the groups in ``ids`` (groups that fail are left out)."""
+            by_erasures = {}
+            for g in ids:
+                present = groups.get(g, {})
+                erased = tuple(p for p in range(total) if p not in present)
+                if len(erased) <= parity:
+                    by_erasures.setdefault(erased, []).append(g)
+            corrected = {}
+            for erased, batch in by_erasures.items():
+                matrix = np.zeros((len(batch), total, payload_bytes), dtype=np.uint8)
+                for j, g in enumerate(batch):
+                    for p, i in groups[g].items():
+                        matrix[j, p] = payloads[i]
+                try:
+                    data = code.decode_groups(matrix, list(erased))
+                    corrected.update(zip(batch, data))
+                except ReedSolomonError:
+                    # Isolate the groups that cannot be corrected
+                    for j, g in enumerate(batch):
+                        try:
+                            corrected[g] = code.decode_groups(matrix[j:j + 1], list(erased))[0]
+                        except ReedSolomonError:
+                            pass
+            return corrected
+
+        # Group 0 holds the length header, which fixes how many groups there are
+        first = correct([0])
+        if 0 not in first:
+            raise StrandDecodeError("Outer-code group 0, which holds the data length, cannot be recovered")
+        length = int.from_bytes(first[0][0, :8].tobytes(), "big")
+        count = -(-(8 + length) // payload_bytes)
+        expected = -(-count // per_group)
+        if expected > MAX_GROUPS or outer_layout(count)[1:] != (per_group, parity):
+            raise StrandDecodeError("Length header does not match the outer-code layout")
+        corrected = {**first, **correct(range(1, expected))}
+        failed = expected - len(corrected)
+        if failed and not fill_missing:
+            raise StrandDecodeError(f"{failed} of {expected} outer-code groups cannot be recovered")
+        ids = sorted(corrected)
+        indices = (np.array(ids)[:, None] * per_group + np.arange(per_group)).ravel()
+        data = np.concatenate([corrected[g] for g in ids]).astype(np.uint8)
+        return reassemble(indices, data, fill_missing=True, count=count)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached(tokens, gc_content, homopolymer_limit):
+    return HybridCode(tokens, gc_content, homopolymer_limit)
+
+
+def hybrid_code(letters, gc_content=50, homopolymer_limit=4):
+    """Cached ``HybridCode`` for a configuration; its transition tables are built once."""
+    return _cached(tuple(parse_letters(letters)), int(gc_content), int(homopolymer_limit))
@@ -0,0 +1,678 @@
+"""Local job server shared by several MBioStorageApp instances on one workstation.
+
+Jobs (encode / simulate / decode) are submitted as HTTP requests and run on a
+bounded process pool. Each user has their own priority queue; when a worker frees
+up, the user with the fewest running jobs (ties broken by who was served least
+recently) gets the slot, so one user cannot starve the others.
+
+By default the server listens on a Unix socket. Every request is attributed to
+the user the kernel reports for the connecting process (``SO_PEERCRED``), so users
+cannot claim to be someone else, only see their own jobs, and may only submit
+``file_path`` inputs they can read themselves. A TCP listener (``--host``) has no
+such identity: it requires a shared ``--token``, treats all its clients as one
+user and only accepts inline data. Request bodies larger than ``--max-request-mb``
+are refused before they are read.
+
+A worker process that dies (e.g. killed for running out of memory) fails the
+jobs it was running, and the pool is replaced so later jobs still run.
+
+Start the server with ``python job_server.py --workers 4`` and point the GUI at it
+with ``python main.py --job-server unix:///tmp/mmdna-jobs.sock``.
+"""
+import argparse
+import base64
+import heapq
+import hmac
+import http.client
+import itertools
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "mmdna-jobs.sock")
+DEFAULT_URL = f"unix://{DEFAULT_SOCKET}"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_ENV = "MMDNA_JOB_TOKEN"
+TCP_USER = "tcp"  # The one user all token holders share on a TCP listener
+JOB_KINDS = ("encode", "simulate", "decode")
+RESULT_TTL = 3600.0  # Seconds a finished job and its result are kept
+MAX_FINISHED_JOBS = 1000
+MAX_REQUEST_BYTES = 256 * 1024 * 1024  # Largest request body; inline data is base64, so about 190 MiB of input
+
+
+def _load_sequences(params):
+    """``(sequences, blocks)`` of a job's strands; ``blocks`` is None unless they carry block tags."""
+    if "sequences" in params:
+        return params["sequences"], params.get("blocks")
+    from bounded import read_tagged
+
+    return read_tagged(params["file_path"])
+
+
+def peer_credentials(sock):
+    """``(pid, uid, gid)`` of the process at the other end of a Unix socket (Linux ``SO_PEERCRED``)."""
+    return struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+
+
+def user_name(uid):
+    """Login name of ``uid`` (the uid itself if it has no passwd entry)."""
+    import pwd
+
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def readable_by(path, uid):
+    """True if the user ``uid`` may read the regular file ``path``.
+
+    Checks the permission bits of the file and the search bit of every directory
+    above it for that user instead of the server's own permissions (ACLs are not
+    consulted, so they can only make this stricter).
+    """
+    import pwd
+
+    if uid == 0:
+        return True
+    try:
+        entry = pwd.getpwuid(uid)
+        groups = set(os.getgrouplist(entry.pw_name, entry.pw_gid))
+    except KeyError:
+        groups = set()
+
+    def allowed(info, user_bit, group_bit, other_bit):
+        if info.st_uid == uid:
+            return bool(info.st_mode & user_bit)
+        if info.st_gid in groups:
+            return bool(info.st_mode & group_bit)
+        return bool(info.st_mode & other_bit)
+
+    path = os.path.realpath(path)
+    try:
+        directory = os.path.dirname(path)
+        while True:
+            if not allowed(os.stat(directory), stat.S_IXUSR, stat.S_IXGRP, stat.S_IXOTH):
+                return False
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        info = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(info.st_mode) and allowed(info, stat.S_IRUSR, stat.S_IRGRP, stat.S_IROTH)
+
+
+def run_job(kind, params):
+    """Execute one job in a worker process and return a JSON-serializable result.
+
+    A ``files`` list in ``params`` turns the job into a batch: every entry is run
+    with the shared parameters and the results are returned under ``files``.
+    Batches, simulations and the blocks of every encoded or decoded input are
+    checkpointed, so resubmitting a job that was interrupted (e.g. by a server
+    restart) continues where it stopped.
+    """
+    from checkpoint import Checkpoint, job_key, run_units
+
+    if "files" in params:
+        shared = {k: v for k, v in params.items() if k != "files"}
+        checkpoint = Checkpoint(job_key(kind, params))
+
+        def run_entry(entry):
+            return dict(run_job(kind, {**shared, **entry}), name=entry.get("name", entry.get("file_path")))
+
+        results = run_units(enumerate(params["files"]), run_entry, checkpoint)
+        checkpoint.discard()
+        return {"files": results}
+
+    if kind == "encode":
+        from alphabet import codec_for
+        from bounded import block_length, encode_blocks
+
+        if "data" in params:
+            # Base64 text from a client, or bytes when the GUI runs the job in-process
+            file_data = params["data"]
+            if isinstance(file_data, str):
+                file_data = base64.b64decode(file_data)
+        else:
+            with open(params["file_path"], "rb") as f:
+                file_data = f.read()
+        result = {}
+        if params.get("compress"):
+            from compression import compress_with_stats
+
+            # The whole input is compressed once; "decode" decompresses the joined blocks again
+            file_data, result["compression"] = compress_with_stats(file_data)
+        # Raises for alphabet / method combinations that cannot be encoded
+        codec = codec_for(params["alphabet"], params["method"], params.get("gc_content", 50),
+                          params.get("homopolymer_limit", 4))
+        extra = None
+        if not codec and params.get("fountain_channel") and params["method"] == "DNA Fountain":
+            # Droplet overhead tuned for the channel the strands will go through (blocks are of even size)
+            import external
+            from fountain_tuning import ENCODE_OPTIONS, encode_kwargs, tune
+
+            external.check_options(ENCODE_OPTIONS)  # Before the tuning, not after it
+            result["fountain"] = tune(block_length(len(file_data)), **params["fountain_channel"])
+            extra = encode_kwargs(result["fountain"])
+        checkpoint = Checkpoint(job_key(kind, params))
+        result["blocks"] = encode_blocks(file_data, params["alphabet"], params["method"],
+                                         params.get("gc_content", 50), params.get("homopolymer_limit", 4),
+                                         extra=extra, checkpoint=checkpoint)
+        if checkpoint.resumed:
+            result["resumed"] = checkpoint.resumed
+        checkpoint.discard()
+        return result
+
+    if kind == "simulate":
+        from simulator import simulate
+
+        sequences, blocks = _load_sequences(params)
+        checkpoint = Checkpoint(job_key(kind, params))
+        reads = simulate(sequences, params.get("synthesis", "None"), params.get("storage", "None"),
+                         params.get("sequencing", "None"), params.get("coverage"), params.get("seed"),
+                         checkpoint=checkpoint, blocks=blocks)
+        checkpoint.discard()
+        if blocks is None:
+            return {"reads": reads}
+        # Reads of a multi-block input keep their block, so they can be tagged and decoded block by block
+        reads, read_blocks = reads
+        return {"reads": reads, "blocks": read_blocks}
+
+    if kind == "decode":
+        from bounded import decode_file, is_tagged, resume_output, unwrap_block
+        from compression import decompress, is_compressed
+        from dedup import decode_reads, read_records
+
+        if "file_path" in params and is_tagged(params["file_path"]):
+            # Multi-block FASTA: decode block by block, recording every finished block
+            checkpoint = Checkpoint(job_key(kind, params))
+            path, out = resume_output(checkpoint)
+            with out:
+                stats = decode_file(params["file_path"], out, params["alphabet"], params["method"],
+                                    gc_content=params.get("gc_content", 50),
+                                    homopolymer_limit=params.get("homopolymer_limit", 4), checkpoint=checkpoint)
+                out.seek(0)
+                data = out.read()
+            checkpoint.discard()
+            os.remove(path)
+            if is_compressed(data):
+                # Compressed as a whole before it was cut into blocks (see "encode")
+                data = decompress(data)
+            return {"data": base64.b64encode(data).decode("ascii"), "reads": stats["reads"],
+                    "blocks": stats["blocks"]}
+
+        # Identical reads are collapsed first; FASTQ input keeps the best quality per read
+        reads = params["sequences"] if "sequences" in params else read_records(params["file_path"])
+        data, records = decode_reads(reads, params["alphabet"], params["method"], params.get("gc_content", 50),
+                                     params.get("homopolymer_limit", 4))
+        # Single-block output of the bounded encoder carries a block header; multi-block input raises
+        data = unwrap_block(bytes(data))
+        if is_compressed(data):
+            data = decompress(data)
+        return {"data": base64.b64encode(data).decode("ascii"),
+                "reads": sum(r.count for r in records), "unique_reads": len(records)}
+
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+class JobScheduler:
+    """Priority queues per user with fair sharing over a bounded process pool.
+
+    Finished jobs and their results are forgotten ``result_ttl`` seconds after they
+    end, and at most ``max_finished`` of them are kept.
+    """
+
+    def __init__(self, workers=None, result_ttl=RESULT_TTL, max_finished=MAX_FINISHED_JOBS):
+        self.workers = workers or os.cpu_count()
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.jobs = {}
+        self.results = {}
+        self.queues = defaultdict(list)  # user -> heap of (-priority, seq, job_id)
+        self.running = defaultdict(int)
+        self.last_served = defaultdict(float)
+        self.active = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, kind, params, user="default", priority=0):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self.condition:
+            self.jobs[job_id] = {
+                "id": job_id, "kind": kind, "user": user, "priority": priority, "state": "queued",
+                "submitted": time.time(), "started": None, "finished": None, "error": None,
+                "params": params,
+            }
+            heapq.heappush(self.queues[user], (-priority, next(self._sequence), job_id))
+            self._evict()
+            self.condition.notify_all()
+        return job_id
+
+    def _job(self, job_id, user):
+        """The job ``job_id`` if ``user`` owns it (None for any user), else ``KeyError``."""
+        job = self.jobs[job_id]
+        if user is not None and job["user"] != user:
+            raise KeyError(job_id)
+        return job
+
+    def status(self, job_id, user=None):
+        with self.condition:
+            job = self._job(job_id, user)
+            status = {k: v for k, v in job.items() if k != "params"}
+            if job["state"] == "queued":
+                status["position"] = self._queue_position(job_id)
+            return status
+
+    def list_jobs(self, user=None):
+        with self.condition:
+            return [
+                {k: v for k, v in job.items() if k != "params"}
+                for job in self.jobs.values() if user is None or job["user"] == user
+            ]
+
+    def result(self, job_id, user=None):
+        with self.condition:
+            if self._job(job_id, user)["state"] != "done":
+                raise KeyError(job_id)
+            return self.results[job_id]
+
+    def cancel(self, job_id, user=None):
+        """Cancel a queued job; running jobs are left to finish."""
+        with self.condition:
+            job = self._job(job_id, user)
+            if job["state"] != "queued":
+                return False
+            job["state"] = "cancelled"
+            job["finished"] = time.time()
+            queue = self.queues[job["user"]]
+            queue[:] = [entry for entry in queue if entry[2] != job_id]
+            heapq.heapify(queue)
+            self._evict()
+            return True
+
+    def shutdown(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _evict(self):
+        """Forget finished jobs past ``result_ttl`` and the oldest beyond ``max_finished``."""
+        finished = sorted((job for job in self.jobs.values() if job["finished"] is not None),
+                          key=lambda job: job["finished"])
+        excess = len(finished) - self.max_finished
+        expired = time.time() - self.result_ttl
+        for i, job in enumerate(finished):
+            if i < excess or job["finished"] < expired:
+                del self.jobs[job["id"]]
+                self.results.pop(job["id"], None)
+
+    @staticmethod
+    def _pick_user(queues, running, last_served):
+        """User whose queue is served next: fewest running jobs, then least recently served."""
+        users = [user for user, queue in queues.items() if queue]
+        if not users:
+            return None
+        return min(users, key=lambda u: (running[u], last_served[u]))
+
+    def _queue_position(self, job_id):
+        """Number of queued jobs that will start before ``job_id``.
+
+        Replays the fair-share choice of ``_next_job`` on copies of the queues,
+        assuming no running job finishes in the meantime.
+        """
+        queues = {user: sorted(queue, reverse=True) for user, queue in self.queues.items() if queue}
+        running = defaultdict(int, self.running)
+        last_served = defaultdict(float, self.last_served)
+        clock = max(last_served.values(), default=0.0)
+        for position in itertools.count():
+            user = self._pick_user(queues, running, last_served)
+            if user is None:
+                raise KeyError(job_id)
+            if queues[user].pop()[2] == job_id:
+                return position
+            running[user] += 1
+            clock += 1.0
+            last_served[user] = clock
+
+    def _next_job(self):
+        user = self._pick_user(self.queues, self.running, self.last_served)
+        if user is None:
+            return None
+        _, _, job_id = heapq.heappop(self.queues[user])
+        return job_id
+
+    def _dispatch_loop(self):
+        while True:
+            with self.condition:
+                while not self.closed and (self.active >= self.workers or not any(self.queues.values())):
+                    self.condition.wait()
+                if self.closed:
+                    return
+                job_id = self._next_job()
+                job = self.jobs[job_id]
+                job["state"] = "running"
+                job["started"] = time.time()
+                self.active += 1
+                self.running[job["user"]] += 1
+                self.last_served[job["user"]] = job["started"]
+                pool = self.pool
+                try:
+                    future = pool.submit(run_job, job["kind"], job["params"])
+                except BrokenProcessPool:
+                    # A worker died since the last job ended; run this one on a new pool
+                    pool = self._replace_pool(pool)
+                    future = pool.submit(run_job, job["kind"], job["params"])
+            future.add_done_callback(lambda f, job_id=job_id, pool=pool: self._finished(job_id, f, pool))
+
+    def _replace_pool(self, broken):
+        """Swap a fresh pool in for ``broken`` unless that already happened; call with the condition held."""
+        if self.pool is broken:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool
+
+    def _finished(self, job_id, future, pool):
+        with self.condition:
+            job = self.jobs[job_id]
+            job["finished"] = time.time()
+            try:
+                self.results[job_id] = future.result()
+                job["state"] = "done"
+            except BrokenProcessPool:
+                # Every job of the pool fails with this, not only the one whose worker died
+                job["state"] = "failed"
+                job["error"] = "A worker process died while the job was running"
+                if not self.closed:
+                    self._replace_pool(pool)
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e)
+            job.pop("params", None)
+            self.active -= 1
+            self.running[job["user"]] -= 1
+            self._evict()
+            self.condition.notify_all()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /jobs, GET /jobs, GET /jobs/<id>, GET /jobs/<id>/result, DELETE /jobs/<id>.
+
+    Every request acts as the user returned by ``_identity``; other users' jobs
+    answer 404.
+    """
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parts(self):
+        return [p for p in self.path.split("?")[0].split("/") if p]
+
+    def _identity(self):
+        """``(user, uid)`` of the client; raises ``PermissionError`` for a bad token over TCP.
+
+        On the Unix socket the kernel reports the uid of the connecting process;
+        over TCP every holder of the server token is ``TCP_USER`` with no uid.
+        """
+        if isinstance(self.server, UnixJobServer):
+            _, uid, _ = peer_credentials(self.request)
+            return user_name(uid), uid
+        if not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {self.server.token}"):
+            raise PermissionError("Missing or invalid token")
+        return TCP_USER, None
+
+    @staticmethod
+    def _authorize_files(params, uid):
+        """Check every ``file_path`` in ``params`` against the submitting user and resolve it.
+
+        The worker opens the files with the server's permissions, so a path is only
+        accepted if the user could read it themselves; without a uid (TCP) none is.
+        """
+        files = params.get("files", [])
+        if not isinstance(files, list) or not all(isinstance(entry, dict) for entry in files):
+            raise ValueError("'files' must be a list of objects")
+        for entry in [params, *files]:
+            if "file_path" not in entry:
+                continue
+            if uid is None:
+                raise PermissionError("file_path is only accepted on the Unix socket; send the data inline")
+            if not isinstance(entry["file_path"], str) or not readable_by(entry["file_path"], uid):
+                raise PermissionError(f"{entry['file_path']!r} is not a file the submitting user can read")
+            entry["file_path"] = os.path.realpath(entry["file_path"])
+
+    def do_POST(self):
+        if self._parts() != ["jobs"]:
+            return self._send(404, {"error": "Not found"})
+        try:
+            user, uid = self._identity()
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError("Invalid Content-Length")
+            if length > self.server.max_request:
+                # The body is never read, so the connection cannot be reused
+                self.close_connection = True
+                return self._send(413, {"error": f"Request body over {self.server.max_request} bytes"})
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict) or not isinstance(request.get("params", {}), dict):
+                raise ValueError("Request body must be a JSON object whose 'params' is an object")
+            params = request.get("params", {})
+            self._authorize_files(params, uid)
+            # Any "user" in the request is ignored: jobs belong to the authenticated user
+            job_id = self.server.scheduler.submit(request["kind"], params, user, int(request.get("priority", 0)))
+        except PermissionError as e:
+            return self._send(403, {"error": str(e)})
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(201, {"id": job_id})
+
+    def do_GET(self):
+        parts = self._parts()
+        scheduler = self.server.scheduler
+        try:
+            user, _ = self._identity()
+            if parts == ["jobs"]:
+                return self._send(200, scheduler.list_jobs(user))
+            if len(parts) == 2 and parts[0] == "jobs":
+                return self._send(200, scheduler.status(parts[1], user))
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+                return self._send(200, scheduler.result(parts[1], user))
+        except PermissionError as e:
+            return self._send(403, {"error": str(e)})
+        except KeyError:
+            return self._send(404, {"error": "Job not found or not finished"})
+        self._send(404, {"error": "Not found"})
+
+    def do_DELETE(self):
+        parts = self._parts()
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._send(404, {"error": "Not found"})
+        try:
+            user, _ = self._identity()
+            self._send(200, {"cancelled": self.server.scheduler.cancel(parts[1], user)})
+        except PermissionError as e:
+            self._send(403, {"error": str(e)})
+        except KeyError:
+            self._send(404, {"error": "Job not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixJobServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP job server on a Unix socket; clients are identified by their peer credentials."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            # Replace a socket left behind by a crashed server, but never a running one
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.server_address)
+            except OSError:
+                os.remove(self.server_address)
+            else:
+                raise OSError(f"A job server is already listening on {self.server_address}")
+            finally:
+                probe.close()
+        super().server_bind()
+        # Every local user may connect: requests are attributed by uid, not by who can open the socket
+        os.chmod(self.server_address, 0o666)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def start_server(socket_path=DEFAULT_SOCKET, workers=None, host=None, port=DEFAULT_PORT, token=None,
+                 max_request=MAX_REQUEST_BYTES):
+    """Create the server and its scheduler (call ``serve_forever`` to run it).
+
+    Listens on the Unix socket ``socket_path`` unless ``host`` is given, in which
+    case it listens on TCP and requires ``token`` from every client. Request
+    bodies over ``max_request`` bytes are refused.
+    """
+    if host is None:
+        if not hasattr(socket, "SO_PEERCRED"):
+            raise OSError("The Unix socket server needs SO_PEERCRED (Linux); use a TCP host with a token")
+        server = UnixJobServer(socket_path, JobRequestHandler)
+    else:
+        if not token:
+            raise ValueError(f"A TCP job server needs a token (--token or {TOKEN_ENV})")
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+        server.token = token
+    server.max_request = max_request
+    server.scheduler = JobScheduler(workers)
+    return server
+
+
+class JobServerError(Exception):
+    """Raised by ``JobClient`` for error responses of the job server."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class JobClient:
+    """Thin client used by the GUI windows to talk to a running job server.
+
+    ``url`` is ``unix:///path/to/socket`` or ``http://host:port`` (which needs the
+    server's ``token``, by default from the ``MMDNA_JOB_TOKEN`` environment variable).
+    """
+
+    def __init__(self, url=DEFAULT_URL, token=None, timeout=10):
+        self.url = url.rstrip("/")
+        self.token = token or os.environ.get(TOKEN_ENV)
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.url.startswith("unix://"):
+            return _UnixHTTPConnection(self.url[len("unix://"):], self.timeout), ""
+        parts = urllib.parse.urlsplit(self.url)
+        return http.client.HTTPConnection(parts.hostname, parts.port, timeout=self.timeout), parts.path
+
+    def _request(self, method, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        connection, prefix = self._connection()
+        try:
+            try:
+                connection.request(method, prefix + path, body=data, headers=headers)
+            except (BrokenPipeError, ConnectionResetError):
+                # The server answers and closes without reading a body it refuses (e.g. over its size limit)
+                pass
+            response = connection.getresponse()
+            body = json.loads(response.read())
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise JobServerError(f"{response.status}: {body.get('error', response.reason)}")
+        return body
+
+    def submit(self, kind, params, priority=0):
+        payload = {"kind": kind, "params": params, "priority": priority}
+        return self._request("POST", "/jobs", payload)["id"]
+
+    def status(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def result(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}/result")
+
+    def cancel(self, job_id):
+        return self._request("DELETE", f"/jobs/{job_id}")["cancelled"]
+
+    def wait(self, job_id, interval=0.5):
+        """Block until the job ends and return its result."""
+        while True:
+            status = self.status(job_id)
+            if status["state"] == "done":
+                return self.result(job_id)
+            if status["state"] in ("failed", "cancelled"):
+                raise RuntimeError(status["error"] or f"Job {status['state']}")
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local MMDNA job server.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--host", default=None, help="Listen on TCP at this host instead (requires --token)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"Shared secret of TCP clients (default: ${TOKEN_ENV})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-request-mb", type=float, default=MAX_REQUEST_BYTES / 2 ** 20,
+                        help="Largest accepted request body in MiB (default: %(default)g)")
+    args = parser.parse_args(argv)
+
+    server = start_server(args.socket, args.workers, args.host, args.port, args.token,
+                          int(args.max_request_mb * 2 ** 20))
+    url = f"unix://{args.socket}" if args.host is None else f"http://{args.host}:{args.port}"
+    print(f"Job server listening on {url} with {server.scheduler.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.scheduler.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,159 @@
+import argparse
+import base64
+import io
+import os
+import shutil
 import sys
+import tempfile
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame, QStackedLayout,
     QDesktopWidget, QRadioButton, QTextEdit, QCheckBox, QFileDialog, QButtonGroup, QComboBox, QFormLayout, QSpinBox,
     QMessageBox, QLineEdit, QScrollArea
 )
-from PyQt5.QtGui import QFont, QPixmap
-from PyQt5.QtCore import Qt
-from methods import Encode
+from PyQt5.QtGui import QFont, QImage, QPixmap
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from job_server import JobClient, run_job
+from batch_loader import load_files
+from checkpoint import Checkpoint, job_key
+from bounded import parse_size
+# Codec modules (methods, alphabet, archive, compression, bounded) and NumPy are
+# imported when a job starts, so they do not delay the first paint
+
+# URL of a local job server, e.g. unix:///tmp/mmdna-jobs.sock (see job_server.py; http:// URLs also
+# need MMDNA_JOB_TOKEN); when unset jobs run in-process
+JOB_SERVER_URL = os.environ.get("MMDNA_JOB_SERVER")
+# Default memory budget in bytes for in-process encoding / decoding (0 = unlimited, see bounded.py)
+MEMORY_BUDGET = parse_size(os.environ.get("MMDNA_MEMORY_BUDGET", "0"))
+
+# Technologies offered for every stage of the storage channel (see simulator.ERROR_PROFILES)
+PROCESS_METHODS = {
+    "合成": ["ErrASE", "HT-Electrochemical", "Inkjet", "None"],
+    "保存": ["Cold Storage", "Room Temperature Storage", "None"],
+    "测序": ["Nanopore", "Illumina", "PacBio", "None"]
+}
+
+def memory_budget_spinbox():
+    """Spin box for the memory budget in MiB, where 0 means unlimited."""
+    spinbox = QSpinBox()
+    spinbox.setRange(0, 1024 * 1024)
+    spinbox.setSingleStep(256)
+    spinbox.setSpecialValueText("Unlimited")
+    spinbox.setSuffix(" MiB")
+    spinbox.setValue(MEMORY_BUDGET // 2 ** 20)
+    return spinbox
+
+class JobWatcher:
+    """Polls the job server for one job and reports back on the GUI thread."""
+
+    def __init__(self, client, job_id, on_done, on_error, interval=500):
+        self.client = client
+        self.job_id = job_id
+        self.on_done = on_done
+        self.on_error = on_error
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(interval)
+
+    def poll(self):
+        try:
+            status = self.client.status(self.job_id)
+            if status["state"] == "done":
+                self.timer.stop()
+                self.on_done(self.client.result(self.job_id))
+            elif status["state"] in ("failed", "cancelled"):
+                self.timer.stop()
+                self.on_error(status["error"] or f"Job {status['state']}")
+        except Exception as e:
+            self.timer.stop()
+            self.on_error(str(e))
+
+class ImageLoaderThread(QThread):
+    """Loads and scales an image off the GUI thread (QImage, unlike QPixmap, is thread safe)."""
+    loaded = pyqtSignal(QImage)
+
+    def __init__(self, path, width, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.width = width
+
+    def run(self):
+        image = QImage(self.path)
+        if not image.isNull():
+            image = image.scaledToWidth(min(self.width, image.width()), Qt.SmoothTransformation)
+        self.loaded.emit(image)
+
+# Top-level windows, built on first use and reused afterwards
+_windows = {}
+
+def show_window(window_class):
+    """Show the cached instance of ``window_class``, constructing it only once."""
+    window = _windows.get(window_class)
+    if window is None:
+        window = _windows[window_class] = window_class()
+    window.show()
+    window.raise_()
+    window.activateWindow()
+    return window
+
+class FileLoaderThread(QThread):
+    """Loads and hashes dropped or browsed files off the GUI thread."""
+    progress = pyqtSignal(int, int)
+    loaded = pyqtSignal(list, list, list)
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+
+    def run(self):
+        loaded, duplicates, errors = load_files(self.paths, progress=self.progress.emit)
+        self.loaded.emit(loaded, duplicates, errors)
+
+class TaskThread(QThread):
+    """Runs ``func(*args)`` off the GUI thread, e.g. ``run_job`` the way a job server worker would."""
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            self.done.emit(self.func(*self.args))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def spill_encoding(data, encode_letter, method, budget, gc_content, homopolymer_limit, compress):
+    """Encode ``data`` block by block within ``budget`` bytes into a temporary FASTA; returns ``(path, stats)``."""
+    from bounded import encode_stream
+
+    fd, path = tempfile.mkstemp(suffix=".fasta")
+    with os.fdopen(fd, "w") as out:
+        stats = encode_stream(io.BytesIO(data), out, encode_letter, method, budget, gc_content=gc_content,
+                              homopolymer_limit=homopolymer_limit, compress=compress)
+    return path, stats
+
+def describe_loaded_files(loaded, duplicates, errors):
+    """Summary text for the file drop area."""
+    if len(loaded) == 1 and not duplicates and not errors:
+        return f"Loaded file: {loaded[0].path}"
+    text = f"Loaded {len(loaded)} files"
+    if duplicates:
+        text += f", {len(duplicates)} with duplicate content (stored once)"
+    if errors:
+        text += f", {len(errors)} failed"
+    return text
+
+def simulated_fasta(name, reads, blocks=None):
+    """FASTA records of simulated reads; reads of a multi-block input are tagged ``b{block}_`` again."""
+    name = os.path.basename(name)
+    if blocks is None:
+        return [f">{name}_read_{i}\n{read}" for i, read in enumerate(reads)]
+    return [f">b{block}_{name}_read_{i}\n{read}" for i, (read, block) in enumerate(zip(reads, blocks))]
 
 class EncodingWindow(QWidget):
-    def __init__(self, file_data, encode_letter, parent=None):
+    def __init__(self, file_data, encode_letter, parent=None, batch_files=None):
         super().__init__()
         try:
             self.setWindowTitle("编码")
@@ -17,6 +161,7 @@ class EncodingWindow(QWidget):
 
             self.file_data = file_data  # Binary array from loaded file
             self.encode_letter = encode_letter  # Encoding letter selected in EncodeWindow
+            self.batch_files = batch_files or []  # LoadedFile entries when several files were dropped
 
             # Main layout
             main_layout = QVBoxLayout()
@@ -27,7 +172,10 @@ class EncodingWindow(QWidget):
             main_layout.addWidget(encoding_method_label)
 
             self.encoding_method_combobox = QComboBox()
-            self.encoding_method_combobox.addItems(["DNA Fountain", "YYC", "HybridCode", "HEDGES", "6-Huffman", "8-Huffman"])
+            # Lookup Table is the unconstrained in-process codec; it is the only choice besides
+            # HybridCode for modified bases (5mC / 6mA)
+            self.encoding_method_combobox.addItems(["DNA Fountain", "YYC", "HybridCode", "HEDGES", "6-Huffman", "8-Huffman",
+                                                    "Lookup Table"])
             main_layout.addWidget(self.encoding_method_combobox)
 
             # Set encoding constraints
@@ -46,6 +194,37 @@ class EncodingWindow(QWidget):
             self.homopolymer_limit_spinbox.setValue(4)
             constraints_form.addRow("Homopolymer Limit", self.homopolymer_limit_spinbox)
 
+            # Inputs larger than RAM are coded in independent blocks within this budget
+            self.memory_budget_spinbox = memory_budget_spinbox()
+            constraints_form.addRow("Memory Budget", self.memory_budget_spinbox)
+
+            # DNA Fountain: tune droplet overhead and degree distribution for the expected channel
+            self.fountain_tune_checkbox = QCheckBox("Auto-tune DNA Fountain overhead for the channel below")
+            constraints_form.addRow(self.fountain_tune_checkbox)
+            self.fountain_channel_comboboxes = {}
+            for process, default in (("合成", "None"), ("保存", "None"), ("测序", "Illumina")):
+                combobox = QComboBox()
+                combobox.addItems(PROCESS_METHODS[process])
+                combobox.setCurrentText(default)
+                constraints_form.addRow(f"{process} 技术", combobox)
+                self.fountain_channel_comboboxes[process] = combobox
+            self.fountain_coverage_spinbox = QSpinBox()
+            self.fountain_coverage_spinbox.setRange(1, 1000)
+            self.fountain_coverage_spinbox.setValue(10)
+            constraints_form.addRow("Sequencing Coverage", self.fountain_coverage_spinbox)
+            main_layout.addLayout(constraints_form)
+
+            # Batch input: pack all files into one deduplicated archive before encoding
+            self.pack_checkbox = QCheckBox(f"Pack {len(self.batch_files)} files into one deduplicated archive")
+            self.pack_checkbox.setChecked(True)
+            self.pack_checkbox.setVisible(bool(self.batch_files))
+            main_layout.addWidget(self.pack_checkbox)
+
+            # Adaptive compression of the input before it is mapped to bases
+            self.compress_checkbox = QCheckBox("Compress input before encoding (adaptive)")
+            self.compress_checkbox.setChecked(True)
+            main_layout.addWidget(self.compress_checkbox)
+
             # Display results
             result_label = QLabel("Encoded Sequence")
             result_label.setFont(QFont("Arial", 12))
@@ -70,27 +249,165 @@ class EncodingWindow(QWidget):
 
             # Placeholder for encoded sequences
             self.encoded_sequences = []
+            self.encoded_files = []  # (file path, strand list per block) per input file
+            self.archive_stats = None
+            self.compression_stats = []  # (file path, codec summary) per compressed input
+            self.spilled_fasta = None  # Temporary FASTA written in bounded-memory mode
+            self.fountain_params = []  # (file path, tuned DNA Fountain parameters) per input
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error during window initialization: {e}")
 
     def perform_encoding(self):
-        # Example encoding logic (replace with actual implementation)
-        selected_method = self.encoding_method_combobox.currentText()
-        gc_content = self.gc_content_spinbox.value()
-        homopolymer_limit = self.homopolymer_limit_spinbox.value()
-        encoded_sequence = Encode(self.file_data, self.encode_letter, selected_method)
-        encoded_sequence = f"Encoding performed using {selected_method}..."
-        # Format results for display
-        result_text = f"Encoding Method: {selected_method}\n"
-        result_text += f"GC Content: {gc_content}%\n"
-        result_text += f"Homopolymer Limit: {homopolymer_limit}\n\n"
-        result_text += "\n".join(self.encoded_sequences)
+        try:
+            from archive import pack, relative_names
+
+            selected_method = self.encoding_method_combobox.currentText()
+            gc_content = self.gc_content_spinbox.value()
+            homopolymer_limit = self.homopolymer_limit_spinbox.value()
+
+            inputs = [(f.path, f.data) for f in self.batch_files] or [(None, self.file_data)]
+            self.archive_stats = None
+            if self.batch_files and self.pack_checkbox.isChecked():
+                # Encode one archive instead of every file separately: shared chunks are stored once
+                # and the per-file strand overhead is paid only once
+                names = relative_names([f.path for f in self.batch_files])
+                archive, self.archive_stats = pack(zip(names, (f.data for f in self.batch_files)))
+                inputs = [(f"archive of {len(names)} files", archive)]
+
+            fountain_channel = None
+            if selected_method == "DNA Fountain" and self.fountain_tune_checkbox.isChecked():
+                fountain_channel = {
+                    "synthesis": self.fountain_channel_comboboxes["合成"].currentText(),
+                    "storage": self.fountain_channel_comboboxes["保存"].currentText(),
+                    "sequencing": self.fountain_channel_comboboxes["测序"].currentText(),
+                    "coverage": float(self.fountain_coverage_spinbox.value()),
+                }
+
+            params = {
+                "alphabet": self.encode_letter,
+                "method": selected_method,
+                "gc_content": gc_content,
+                "homopolymer_limit": homopolymer_limit,
+                "compress": self.compress_checkbox.isChecked(),
+                "fountain_channel": fountain_channel,
+            }
+            if JOB_SERVER_URL:
+                # Hand the job (all files as one batch) to the shared job server and poll for the result
+                if len(inputs) > 1:
+                    files = [{"file_path": path} for path, _ in inputs]
+                else:
+                    files = [{"name": inputs[0][0], "data": base64.b64encode(inputs[0][1]).decode("ascii")}]
+                try:
+                    client = JobClient(JOB_SERVER_URL)
+                    job_id = client.submit("encode", {"files": files, **params})
+                except Exception as e:
+                    QMessageBox.critical(self, "Error", f"Failed to submit encoding job: {e}")
+                    return
+                self.result_text.setPlainText(f"Encoding job {job_id} submitted, waiting for a worker...")
+                self.job_watcher = JobWatcher(client, job_id, self.show_encoding_job_result, self.encoding_failed)
+                return
+
+            budget = self.memory_budget_spinbox.value() * 2 ** 20
+            if budget:
+                self.encode_bounded(inputs, budget, selected_method, gc_content, homopolymer_limit)
+                return
+
+            # The same job a server worker runs (compression, DNA Fountain tuning, encoding in checkpointed
+            # blocks), on a background thread: tuning alone can take half a minute
+            files = [{"name": path, "data": data} for path, data in inputs]
+            self.result_text.setPlainText("Encoding...")
+            self.job_thread = TaskThread(run_job, "encode", {"files": files, **params}, parent=self)
+            self.job_thread.done.connect(self.show_encoding_job_result)
+            self.job_thread.failed.connect(self.encoding_failed)
+            self.job_thread.start()
+        except Exception as e:
+            # Slots must not raise: an unhandled exception here would abort the application
+            self.encoding_failed(str(e))
+
+    def encoding_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Encoding failed: {error}")
+
+    def encode_bounded(self, inputs, budget, selected_method, gc_content, homopolymer_limit):
+        """Encode within ``budget`` bytes on a background thread, streaming strands to a temporary FASTA."""
+        from archive import pack, relative_names
+
+        if len(inputs) > 1:
+            # Blocks are numbered per output file, so a batch is always encoded as one archive
+            names = relative_names([f.path for f in self.batch_files])
+            archive, self.archive_stats = pack(zip(names, (f.data for f in self.batch_files)))
+            inputs = [(f"archive of {len(names)} files", archive)]
+        self.result_text.setPlainText("Encoding...")
+        self.job_thread = TaskThread(spill_encoding, inputs[0][1], self.encode_letter, selected_method, budget,
+                                     gc_content, homopolymer_limit, self.compress_checkbox.isChecked(), parent=self)
+        self.job_thread.done.connect(self.show_spilled_encoding)
+        self.job_thread.failed.connect(self.encoding_failed)
+        self.job_thread.start()
+
+    def show_spilled_encoding(self, result):
+        """Preview the temporary FASTA written by ``spill_encoding``."""
+        from bounded import format_rss
+
+        self.spilled_fasta, stats = result
+        self.encoded_files = []
+        self.encoded_sequences = []
+        with open(self.spilled_fasta) as f:
+            preview = "".join(line for _, line in zip(range(200), f))
+        self.result_text.setPlainText(
+            f"Encoding Method: {self.encoding_method_combobox.currentText()}\n"
+            f"Bounded memory: {stats['blocks']} blocks of {stats['block_size']} bytes, "
+            f"{stats['workers']} in parallel, {stats['strands']} strands\n"
+            f"{format_rss(stats)}\n\n{preview}")
+
+    def show_encoding_job_result(self, result):
+        """Unpack the result of a finished encoding job."""
+        self.compression_stats = [(f["name"], f["compression"]) for f in result["files"] if "compression" in f]
+        self.fountain_params = [(f["name"], f["fountain"]) for f in result["files"] if "fountain" in f]
+        self.show_encoding_result([(f["name"], f["blocks"]) for f in result["files"]])
+        resumed = sum(f.get("resumed", 0) for f in result["files"])
+        if resumed:
+            self.result_text.setPlainText(f"Resumed {resumed} encoded blocks from checkpoint\n"
+                                          + self.result_text.toPlainText())
+
+    def show_encoding_result(self, encoded_files):
+        """Store the encoded blocks (strand lists) of every input file and format them for display."""
+        self.spilled_fasta = None
+        self.encoded_files = [(path, [list(strands) for strands in blocks]) for path, blocks in encoded_files]
+        self.encoded_sequences = [seq for _, blocks in self.encoded_files for strands in blocks for seq in strands]
+        from alphabet import TABLE_METHOD
+
+        method = self.encoding_method_combobox.currentText()
+        result_text = f"Encoding Method: {method}\n"
+        if method == TABLE_METHOD:
+            result_text += "GC Content / Homopolymer Limit: not applied (unconstrained lookup-table mapping)\n"
+        else:
+            result_text += f"GC Content: {self.gc_content_spinbox.value()}%\n"
+            result_text += f"Homopolymer Limit: {self.homopolymer_limit_spinbox.value()}\n"
+        if self.archive_stats:
+            stats = self.archive_stats
+            result_text += (f"Archive: {stats['files']} files, {stats['input_bytes']} -> {stats['packed_bytes']} bytes, "
+                            f"{stats['unique_chunks']}/{stats['total_chunks']} unique chunks\n")
+        for path, stats in self.compression_stats:
+            name = f"{path}: " if len(self.compression_stats) > 1 else ""
+            result_text += (f"Compression: {name}{stats['codec']}, "
+                            f"{stats['raw_bytes']} -> {stats['compressed_bytes']} bytes\n")
+        for path, params in self.fountain_params:
+            name = f"{path}: " if len(self.fountain_params) > 1 else ""
+            result_text += (f"DNA Fountain: {name}{params['droplets']} droplets for {params['segments']} segments "
+                             f"(overhead {params['overhead']:.1%}, c={params['c']}, delta={params['delta']}, "
+                             f"estimated loss {params['loss']:.1%})\n")
+        result_text += "\n"
+        if len(self.encoded_files) > 1:
+            for path, blocks in self.encoded_files:
+                sequences = [seq for strands in blocks for seq in strands]
+                result_text += f"# {path} ({len(sequences)} sequences)\n" + "\n".join(sequences) + "\n"
+        else:
+            result_text += "\n".join(self.encoded_sequences)
         self.result_text.setPlainText(result_text)
 
     def download_fasta(self):
         """Save encoded sequences to a FASTA file."""
-        if not self.encoded_sequences:
+        if not self.encoded_sequences and not self.spilled_fasta:
             QMessageBox.warning(self, "Warning", "No encoded sequences to save.")
             return
 
@@ -99,8 +416,25 @@ class EncodingWindow(QWidget):
             return
 
         try:
+            if self.spilled_fasta:
+                shutil.copyfile(self.spilled_fasta, file_path)
+                QMessageBox.information(self, "Success", "Encoded sequences saved successfully.")
+                return
+            from bounded import block_fasta
+
             with open(file_path, "w") as fasta_file:
-                fasta_file.write("\n".join(self.encoded_sequences))
+                if len(self.encoded_files) > 1:
+                    # Tag every record with its source file (and block) so the batch can be split again
+                    fasta_file.write("".join(
+                        block_fasta(blocks, f"{os.path.basename(path)}_") if len(blocks) > 1 else
+                        "".join(f">{os.path.basename(path)}_{i}\n{seq}\n" for i, seq in enumerate(blocks[0]))
+                        for path, blocks in self.encoded_files
+                    ))
+                elif len(self.encoded_files[0][1]) > 1:
+                    # Several blocks: tag every record with its block so it can be decoded block by block
+                    fasta_file.write(block_fasta(self.encoded_files[0][1]))
+                else:
+                    fasta_file.write("\n".join(self.encoded_sequences))
             QMessageBox.information(self, "Success", "Encoded sequences saved successfully.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save file: {e}")
@@ -115,6 +449,7 @@ class EncodeWindow(QWidget):
         self.file_path = None
         self.selected_method = None
         self.file_data = None
+        self.loaded_files = []
 
         # Main layout
         main_layout = QVBoxLayout()
@@ -268,13 +603,10 @@ class EncodeWindow(QWidget):
         self.setLayout(main_layout)
 
     def browse_file(self):
-        """Opens a file dialog to select a file."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*)")
-        if file_path:
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
-            with open(file_path, "rb") as f:
-                self.file_data = f.read()
+        """Opens a file dialog to select one or more files."""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Files", "", "All Files (*)")
+        if file_paths:
+            self.start_loading(file_paths)
 
     def drag_enter_event(self, event):
         """Handles drag enter event to verify if the dragged item is a file."""
@@ -284,14 +616,28 @@ class EncodeWindow(QWidget):
             event.ignore()
 
     def drop_event(self, event):
-        """Handles drop event to load the dropped file."""
+        """Handles drop event to load every dropped file or directory."""
         urls = event.mimeData().urls()
         if urls:
-            file_path = urls[0].toLocalFile()
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
-            with open(file_path, "rb") as f:
-                self.file_data = f.read()
+            self.start_loading([url.toLocalFile() for url in urls])
+
+    def start_loading(self, paths):
+        """Load and hash the selected files in the background."""
+        self.file_path_label.setText("Loading files...")
+        self.loader = FileLoaderThread(paths, self)
+        self.loader.progress.connect(
+            lambda done, total: self.file_path_label.setText(f"Loading files: {done}/{total}"))
+        self.loader.loaded.connect(self.files_loaded)
+        self.loader.start()
+
+    def files_loaded(self, loaded, duplicates, errors):
+        """Store the loaded files once the background loader finishes."""
+        self.loaded_files = loaded
+        self.file_path = loaded[0].path if loaded else None
+        self.file_data = loaded[0].data if loaded else None
+        self.file_path_label.setText(describe_loaded_files(loaded, duplicates, errors))
+        if errors:
+            QMessageBox.warning(self, "Warning", "Failed to load:\n" + "\n".join(f"{p}: {e}" for p, e in errors))
 
     def update_selection(self):
         """Update the selection label when an option is selected."""
@@ -316,17 +662,18 @@ class EncodeWindow(QWidget):
             QMessageBox.warning(self, "Warning", "Please load a file before proceeding.")
             return
 
-        encode_letter = self.encoding_letter_combobox.currentText()
+        encode_letter = ", ".join(
+            button.text() for group in (self.column1_group, self.column2_group, self.column3_group)
+            for button in [group.checkedButton()] if button
+        )
         if not encode_letter:  # 检查是否有选择
             QMessageBox.warning(self, "Warning", "Please select an encoding letter.")
             return
-            # 调试信息
-        print(f"Launching EncodingWindow with file_data of size: {len(self.file_data)} bytes")
-        print(f"Encoding letter: {encode_letter}")
 
         try:
-            encoding_window = EncodingWindow(self.file_data, encode_letter, self)
-            encoding_window.show()
+            batch_files = self.loaded_files if len(self.loaded_files) > 1 else None
+            self.encoding_window = EncodingWindow(self.file_data, encode_letter, self, batch_files)
+            self.encoding_window.show()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to launch EncodingWindow: {e}")
 
@@ -337,6 +684,7 @@ class SimulateWindow(QWidget):
         self.resize(1600, 1200)
 
         self.file_path = None
+        self.loaded_files = []
 
         # Main layout
         main_layout = QVBoxLayout()
@@ -416,11 +764,10 @@ class SimulateWindow(QWidget):
         self.setLayout(main_layout)
 
     def browse_file(self):
-        """Opens a file dialog to select a file."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*)")
-        if file_path:
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
+        """Opens a file dialog to select one or more files."""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Files", "", "All Files (*)")
+        if file_paths:
+            self.start_loading(file_paths)
 
     def drag_enter_event(self, event):
         """Handles drag enter event to verify if the dragged item is a file."""
@@ -430,25 +777,35 @@ class SimulateWindow(QWidget):
             event.ignore()
 
     def drop_event(self, event):
-        """Handles drop event to load the dropped file."""
+        """Handles drop event to load every dropped file or directory."""
         urls = event.mimeData().urls()
         if urls:
-            file_path = urls[0].toLocalFile()
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
+            self.start_loading([url.toLocalFile() for url in urls])
+
+    def start_loading(self, paths):
+        """Load and hash the selected files in the background."""
+        self.file_path_label.setText("Loading files...")
+        self.loader = FileLoaderThread(paths, self)
+        self.loader.progress.connect(
+            lambda done, total: self.file_path_label.setText(f"Loading files: {done}/{total}"))
+        self.loader.loaded.connect(self.files_loaded)
+        self.loader.start()
+
+    def files_loaded(self, loaded, duplicates, errors):
+        """Store the loaded files once the background loader finishes."""
+        self.loaded_files = loaded
+        self.file_path = loaded[0].path if loaded else None
+        self.file_path_label.setText(describe_loaded_files(loaded, duplicates, errors))
+        if errors:
+            QMessageBox.warning(self, "Warning", "Failed to load:\n" + "\n".join(f"{p}: {e}" for p, e in errors))
 
     def get_methods_for_process(self, process):
         """Return a list of methods for a given process."""
-        methods = {
-            "合成": ["ErrASE", "HT-Electrochemical", "Inkjet", "None"],
-            "保存": ["Cold Storage", "Room Temperature Storage", "None"],
-            "测序": ["Nanopore", "Illumina", "PacBio", "None"]
-        }
-        return methods.get(process, [])
+        return PROCESS_METHODS.get(process, [])
 
     def run_simulation(self):
         """Run the simulation based on the selected methods."""
-        file_path = self.file_path_edit.text()
+        file_path = self.file_path
         if not file_path:
             QMessageBox.warning(self, "Warning", "Please load a FASTA file before running the simulation.")
             return
@@ -456,13 +813,37 @@ class SimulateWindow(QWidget):
         try:
             selected_methods = {process: combobox.currentText() for process, combobox in
                                 self.process_comboboxes.items()}
-            # Example simulation logic
-            self.simulated_fasta = f"Simulated results based on:\n{selected_methods}\n"
-            self.simulated_fasta += f"Original file: {file_path}"
-            self.result_text.setPlainText(self.simulated_fasta)
-            QMessageBox.information(self, "Success", "Simulation completed successfully.")
+            params = {
+                "files": [{"file_path": f.path} for f in self.loaded_files],
+                "synthesis": selected_methods["合成"],
+                "storage": selected_methods["保存"],
+                "sequencing": selected_methods["测序"],
+            }
+            if JOB_SERVER_URL:
+                client = JobClient(JOB_SERVER_URL)
+                job_id = client.submit("simulate", params)
+                self.result_text.setPlainText(f"Simulation job {job_id} submitted, waiting for a worker...")
+                self.job_watcher = JobWatcher(client, job_id, self.show_simulation_result, self.simulation_failed)
+                return
+            # Same job as on the server (simulator.simulate, keeping block tags), on a background thread
+            self.result_text.setPlainText("Simulating...")
+            self.job_thread = TaskThread(run_job, "simulate", params, parent=self)
+            self.job_thread.done.connect(self.show_simulation_result)
+            self.job_thread.failed.connect(self.simulation_failed)
+            self.job_thread.start()
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Simulation failed: {e}")
+            self.simulation_failed(str(e))
+
+    def simulation_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Simulation failed: {error}")
+
+    def show_simulation_result(self, result):
+        """Format the simulated reads of a finished simulate job as FASTA."""
+        self.simulated_fasta = "\n".join(
+            record for f in result["files"] for record in simulated_fasta(f["name"], f["reads"], f.get("blocks"))
+        )
+        self.result_text.setPlainText(self.simulated_fasta)
+        QMessageBox.information(self, "Success", "Simulation completed successfully.")
 
     def download_simulated_fasta(self):
         """Save simulated FASTA results."""
@@ -487,6 +868,9 @@ class DecodeWindow(QWidget):
         self.setWindowTitle("解码")
         self.resize(1600, 1200)
 
+        self.file_path = None
+        self.loaded_files = []
+
         # Main layout
         main_layout = QVBoxLayout()
 
@@ -536,11 +920,33 @@ class DecodeWindow(QWidget):
         main_layout.addWidget(encoding_method_label)
 
         self.encoding_method_combobox = QComboBox()
-        self.encoding_method_combobox.addItems(["DNA Fountain", "YYC", "HybridCode", "6-Huffman", "8-Huffman"])
+        self.encoding_method_combobox.addItems(["DNA Fountain", "YYC", "HybridCode", "6-Huffman", "8-Huffman", "Lookup Table"])
         self.encoding_method_combobox.setFont(QFont("Arial", 12))
         self.encoding_method_combobox.setMinimumHeight(60)  # 设置最小高度
         main_layout.addWidget(self.encoding_method_combobox)
 
+        # HybridCode strands are decoded with the constraints they were encoded under
+        constraints_form = QFormLayout()
+        self.gc_content_spinbox = QSpinBox()
+        self.gc_content_spinbox.setRange(40, 60)
+        self.gc_content_spinbox.setValue(50)
+        constraints_form.addRow("GC Content (%)", self.gc_content_spinbox)
+
+        self.homopolymer_limit_spinbox = QSpinBox()
+        self.homopolymer_limit_spinbox.setRange(1, 6)
+        self.homopolymer_limit_spinbox.setValue(4)
+        constraints_form.addRow("Homopolymer Limit", self.homopolymer_limit_spinbox)
+        main_layout.addLayout(constraints_form)
+
+        # Reads larger than RAM are spilled to disk and decoded block by block within this budget
+        memory_budget_label = QLabel("内存预算")
+        memory_budget_label.setFont(QFont("Arial", 14))
+        main_layout.addWidget(memory_budget_label)
+
+        self.memory_budget_spinbox = memory_budget_spinbox()
+        self.memory_budget_spinbox.setFont(QFont("Arial", 12))
+        main_layout.addWidget(self.memory_budget_spinbox)
+
         # Step 4: Start decoding
         decode_button = QPushButton("开始解码")
         decode_button.setFont(QFont("Arial", 12))
@@ -577,6 +983,8 @@ class DecodeWindow(QWidget):
 
         # Placeholder for decoding results
         self.decoded_file_content = None
+        self.decoded_files = []  # (source path, decoded bytes) per input file
+        self.spilled_files = []  # (name, temporary path) per input decoded in bounded-memory mode
 
         # Step 6: Download decoded file
         download_button = QPushButton("下载解码文件")
@@ -589,11 +997,10 @@ class DecodeWindow(QWidget):
         self.setLayout(main_layout)
 
     def browse_file(self):
-        """Opens a file dialog to select a file."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*)")
-        if file_path:
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
+        """Opens a file dialog to select one or more files."""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Files", "", "All Files (*)")
+        if file_paths:
+            self.start_loading(file_paths)
 
     def drag_enter_event(self, event):
         """Handles drag enter event to verify if the dragged item is a file."""
@@ -603,16 +1010,31 @@ class DecodeWindow(QWidget):
             event.ignore()
 
     def drop_event(self, event):
-        """Handles drop event to load the dropped file."""
+        """Handles drop event to load every dropped file or directory."""
         urls = event.mimeData().urls()
         if urls:
-            file_path = urls[0].toLocalFile()
-            self.file_path = file_path
-            self.file_path_label.setText(f"Loaded file: {file_path}")
+            self.start_loading([url.toLocalFile() for url in urls])
+
+    def start_loading(self, paths):
+        """Load and hash the selected files in the background."""
+        self.file_path_label.setText("Loading files...")
+        self.loader = FileLoaderThread(paths, self)
+        self.loader.progress.connect(
+            lambda done, total: self.file_path_label.setText(f"Loading files: {done}/{total}"))
+        self.loader.loaded.connect(self.files_loaded)
+        self.loader.start()
+
+    def files_loaded(self, loaded, duplicates, errors):
+        """Store the loaded files once the background loader finishes."""
+        self.loaded_files = loaded
+        self.file_path = loaded[0].path if loaded else None
+        self.file_path_label.setText(describe_loaded_files(loaded, duplicates, errors))
+        if errors:
+            QMessageBox.warning(self, "Warning", "Failed to load:\n" + "\n".join(f"{p}: {e}" for p, e in errors))
 
     def start_decoding(self):
         """Start the decoding process."""
-        file_path = self.file_path_edit.text()
+        file_path = self.file_path
         if not file_path:
             QMessageBox.warning(self, "Warning", "Please load a DNA file before starting the decoding.")
             return
@@ -621,22 +1043,100 @@ class DecodeWindow(QWidget):
             # Retrieve selected encoding parameters
             encode_letter = self.encoding_letter_combobox.currentText()
             encode_method = self.encoding_method_combobox.currentText()
-
-            # Example decoding logic (replace with actual implementation)
-            self.decoded_file_content = f"Decoding completed with:\nEncoding Letter: {encode_letter}\nEncoding Method: {encode_method}\n"
-            self.decoded_file_content += f"Loaded file: {file_path}\nDecoded content here..."
-
-            # Update results
-            self.result_text.setPlainText(self.decoded_file_content)
-            self.data_recovery_rate_label.setText("Data Recovery Rate: 95%")  # Example value
-            self.base_error_rate_label.setText("Base Error Rate: 2%")  # Example value
-
-            # Example visualization (replace with actual graph or chart)
-            self.visualization_widget.setPlainText("Visualization placeholder. Replace with an actual chart.")
-
-            QMessageBox.information(self, "Success", "Decoding completed successfully.")
+            gc_content = self.gc_content_spinbox.value()
+            homopolymer_limit = self.homopolymer_limit_spinbox.value()
+            params = {
+                "files": [{"file_path": f.path} for f in self.loaded_files],
+                "alphabet": encode_letter,
+                "method": encode_method,
+                "gc_content": gc_content,
+                "homopolymer_limit": homopolymer_limit,
+            }
+
+            if JOB_SERVER_URL:
+                client = JobClient(JOB_SERVER_URL)
+                job_id = client.submit("decode", params)
+                self.visualization_widget.setPlainText(f"Decoding job {job_id} submitted, waiting for a worker...")
+                self.job_watcher = JobWatcher(client, job_id, self.show_decoding_result, self.decoding_failed)
+                return
+
+            budget = self.memory_budget_spinbox.value() * 2 ** 20
+            if budget:
+                self.decode_bounded(encode_letter, encode_method, budget, gc_content, homopolymer_limit)
+                return
+
+            # Same job as on the server: tagged FASTA is decoded block by block (bounded.decode_file), other
+            # reads are collapsed and decoded at once; either way the output is decompressed again
+            self.visualization_widget.setPlainText("Decoding...")
+            self.job_thread = TaskThread(run_job, "decode", params, parent=self)
+            self.job_thread.done.connect(self.show_decoding_result)
+            self.job_thread.failed.connect(self.decoding_failed)
+            self.job_thread.start()
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Decoding failed: {e}")
+            self.decoding_failed(str(e))
+
+    def decoding_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Decoding failed: {error}")
+
+    def decode_bounded(self, encode_letter, encode_method, budget, gc_content=50, homopolymer_limit=4):
+        """Decode every loaded file block by block within ``budget`` bytes into temporary files.
+
+        Every decoded block is checkpointed, so decoding a file again after a crash
+        continues from its last finished block.
+        """
+        from bounded import decode_file, format_rss, resume_output
+        from compression import decompress, is_compressed
+
+        self.decoded_files = []
+        self.spilled_files = []
+        summary = []
+        for f in self.loaded_files:
+            checkpoint = Checkpoint(job_key("decode", {"file_path": f.path}, encode_letter, encode_method,
+                                            gc_content, homopolymer_limit))
+            path, out = resume_output(checkpoint)
+            with out:
+                stats = decode_file(f.path, out, encode_letter, encode_method, budget, gc_content=gc_content,
+                                    homopolymer_limit=homopolymer_limit, checkpoint=checkpoint)
+                out.seek(0)
+                if is_compressed(out.read(16)):
+                    # Input compressed as a whole before in-memory encoding, so it fits in memory
+                    out.seek(0)
+                    data = decompress(out.read())
+                    out.seek(0)
+                    out.truncate()
+                    out.write(data)
+                    stats["bytes"] = len(data)
+            checkpoint.discard()
+            self.spilled_files.append((os.path.basename(f.path) + ".decoded", path))
+            resumed = f", {stats['resumed']} resumed from checkpoint" if stats["resumed"] else ""
+            summary.append(f"Decoded {stats['bytes']} bytes from {f.path} "
+                           f"({stats['blocks']} blocks{resumed}, {stats['reads']} reads)")
+        self.decoded_file_content = self.spilled_files[0][1] if self.spilled_files else None
+        self.visualization_widget.setPlainText("\n".join(summary + [format_rss(stats)]))
+        QMessageBox.information(self, "Success", "Decoding completed successfully.")
+
+    def show_decoding_result(self, result):
+        """Store the decoded bytes of a finished decode job."""
+        from archive import is_archive, unpack
+
+        self.decoded_files = []
+        self.spilled_files = []
+        for f in result["files"]:
+            # The job has already reversed any pre-encoding compression
+            data = base64.b64decode(f["data"])
+            if is_archive(data):
+                # Packed batch: rebuild the original files from the archive manifest
+                self.decoded_files.extend(unpack(data))
+            else:
+                self.decoded_files.append((os.path.basename(f["name"]) + ".decoded", data))
+        self.decoded_file_content = self.decoded_files[0][1] if self.decoded_files else None
+        summary = [f"Decoded {len(data)} bytes from {path}" for path, data in self.decoded_files]
+        for f in result["files"]:
+            if f.get("unique_reads"):
+                summary.append(f"{os.path.basename(f['name'])}: {f['reads']} reads collapsed to "
+                               f"{f['unique_reads']} distinct reads ({f['reads'] / f['unique_reads']:.1f}x duplication)")
+        self.visualization_widget.setPlainText("\n".join(summary))
+        QMessageBox.information(self, "Success", "Decoding completed successfully.")
 
     def download_decoded_file(self):
         """Save the decoded file."""
@@ -644,12 +1144,38 @@ class DecodeWindow(QWidget):
             QMessageBox.warning(self, "Warning", "No decoded file to download.")
             return
 
+        if len(self.decoded_files) > 1 or len(self.spilled_files) > 1:
+            directory = QFileDialog.getExistingDirectory(self, "Save Decoded Files")
+            if not directory:
+                return
+            try:
+                from archive import safe_name
+
+                # Names come from the decoded archive manifest: never let them escape the chosen directory
+                for name, data in self.decoded_files:
+                    target = os.path.join(directory, *safe_name(name).split("/"))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(target, "wb") as file:
+                        file.write(data)
+                for name, path in self.spilled_files:
+                    shutil.copyfile(path, os.path.join(directory, *safe_name(name).split("/")))
+                count = len(self.decoded_files) + len(self.spilled_files)
+                QMessageBox.information(self, "Success", f"{count} decoded files saved successfully.")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save files: {e}")
+            return
+
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Decoded File", "", "Text Files (*.txt);;All Files (*)")
         if not file_path:
             return
 
         try:
-            with open(file_path, "w") as file:
+            if self.spilled_files:
+                shutil.copyfile(self.spilled_files[0][1], file_path)
+                QMessageBox.information(self, "Success", "Decoded file saved successfully.")
+                return
+            mode = "wb" if isinstance(self.decoded_file_content, bytes) else "w"
+            with open(file_path, mode) as file:
                 file.write(self.decoded_file_content)
             QMessageBox.information(self, "Success", "Decoded file saved successfully.")
         except Exception as e:
@@ -822,23 +1348,19 @@ class TutorialWindow(QWidget):
 
     def open_encode_window(self):
         """打开编码界面"""
-        self.encode_window = EncodeWindow()
-        self.encode_window.show()
+        self.encode_window = show_window(EncodeWindow)
 
     def open_simulate_window(self):
         """打开模拟界面"""
-        self.simulate_window = SimulateWindow()
-        self.simulate_window.show()
+        self.simulate_window = show_window(SimulateWindow)
 
     def open_decode_window(self):
         """打开解码界面"""
-        self.decode_window = DecodeWindow()
-        self.decode_window.show()
+        self.decode_window = show_window(DecodeWindow)
 
     def open_tutorial_window(self):
         """打开介绍界面"""
-        self.tutorial_window = TutorialWindow()
-        self.tutorial_window.show()
+        self.tutorial_window = show_window(TutorialWindow)
 
 class MBioStorageApp(QMainWindow):
     def __init__(self):
@@ -927,17 +1449,11 @@ class MBioStorageApp(QMainWindow):
         # Placeholder for "流程介绍图"
         flowchart_label = QLabel(self)
         flowchart_label.setAlignment(Qt.AlignCenter)  # Center the image
-        pixmap = QPixmap("Figure1.png")  # Load the image
-        if not pixmap.isNull():
-            # Scale the image to 60% of the window width
-            scaled_width = int(self.width() * 0.6)
-            scaled_pixmap = pixmap.scaled(
-                scaled_width, pixmap.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            flowchart_label.setPixmap(scaled_pixmap)
-        else:
-            flowchart_label.setText("流程图加载失败")  # Error message if image not found
-            flowchart_label.setAlignment(Qt.AlignCenter)
+        self.flowchart_label = flowchart_label
+        # Load and scale the image to 60% of the window width in the background
+        self.image_loader = ImageLoaderThread("Figure1.png", int(self.width() * 0.6), self)
+        self.image_loader.loaded.connect(self.show_flowchart)
+        self.image_loader.start()
 
         content_layout.addWidget(flowchart_label, alignment=Qt.AlignCenter)
 
@@ -972,28 +1488,40 @@ class MBioStorageApp(QMainWindow):
         # Set the main layout
         self.central_widget.setLayout(main_layout)
 
+    def show_flowchart(self, image):
+        """Display the flowchart once the background loader has scaled it."""
+        if not image.isNull():
+            self.flowchart_label.setPixmap(QPixmap.fromImage(image))
+        else:
+            self.flowchart_label.setText("流程图加载失败")  # Error message if image not found
+
     def open_encode_window(self):
         """打开编码界面"""
-        self.encode_window = EncodeWindow()
-        self.encode_window.show()
+        self.encode_window = show_window(EncodeWindow)
 
     def open_simulate_window(self):
         """打开模拟界面"""
-        self.simulate_window = SimulateWindow()
-        self.simulate_window.show()
+        self.simulate_window = show_window(SimulateWindow)
 
     def open_decode_window(self):
         """打开解码界面"""
-        self.decode_window = DecodeWindow()
-        self.decode_window.show()
+        self.decode_window = show_window(DecodeWindow)
 
     def open_tutorial_window(self):
         """打开介绍界面"""
-        self.tutorial_window = TutorialWindow()
-        self.tutorial_window.show()
+        self.tutorial_window = show_window(TutorialWindow)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="MMDNA storage GUI.")
+    parser.add_argument("--job-server", default=JOB_SERVER_URL,
+                        help="Job server URL, e.g. unix:///tmp/mmdna-jobs.sock (default: $MMDNA_JOB_SERVER)")
+    parser.add_argument("--memory-budget", type=parse_size, default=MEMORY_BUDGET,
+                        help="Memory budget of in-process jobs, e.g. 512M (default: $MMDNA_MEMORY_BUDGET, unlimited)")
+    # Anything else (e.g. -style) is left to Qt
+    args, qt_args = parser.parse_known_args()
+    JOB_SERVER_URL = args.job_server
+    MEMORY_BUDGET = args.memory_budget
+    app = QApplication(sys.argv[:1] + qt_args)
     main_window = MBioStorageApp()
     main_window.show()
     sys.exit(app.exec_())
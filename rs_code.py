@@ -0,0 +1,363 @@
+"""Reed-Solomon outer code over GF(256) / GF(2^16) for strand-level error correction."""
+import numpy as np
+
+# Primitive polynomials for the supported field sizes
+PRIMITIVE_POLYNOMIALS = {8: 0x11D, 16: 0x1100B}
+
+
+class ReedSolomonError(Exception):
+    """Raised when a codeword has more errors than the code can correct."""
+
+
+class GaloisField:
+    """GF(2^bits) arithmetic backed by precomputed log/antilog tables."""
+
+    def __init__(self, bits=8):
+        if bits not in PRIMITIVE_POLYNOMIALS:
+            raise ValueError(f"Unsupported field size: GF(2^{bits})")
+        self.bits = bits
+        self.size = 1 << bits
+        self.order = self.size - 1
+        self.dtype = np.uint8 if bits == 8 else np.uint16
+
+        # exp table is doubled so that log[a] + log[b] never needs a modulo
+        exp = np.zeros(2 * self.order, dtype=np.int64)
+        log = np.zeros(self.size, dtype=np.int64)
+        x = 1
+        for i in range(self.order):
+            exp[i] = x
+            log[x] = i
+            x <<= 1
+            if x & self.size:
+                x ^= PRIMITIVE_POLYNOMIALS[bits]
+        exp[self.order:] = exp[:self.order]
+        self.exp = exp
+        self.log = log
+        # Plain lists are faster than NumPy for the scalar decoder paths
+        self._exp = exp.tolist()
+        self._log = log.tolist()
+
+    def mul(self, a, b):
+        """Element-wise product of two arrays (broadcasting)."""
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        product = self.exp[self.log[a] + self.log[b]]
+        return np.where((a == 0) | (b == 0), 0, product)
+
+    def smul(self, a, b):
+        """Scalar product."""
+        if a == 0 or b == 0:
+            return 0
+        return self._exp[self._log[a] + self._log[b]]
+
+    def sdiv(self, a, b):
+        """Scalar division."""
+        if b == 0:
+            raise ZeroDivisionError("Division by zero in Galois field")
+        if a == 0:
+            return 0
+        return self._exp[(self._log[a] + self.order - self._log[b]) % self.order]
+
+    def pow(self, a, power):
+        """Scalar exponentiation."""
+        if a == 0:
+            return 0
+        return self._exp[(self._log[a] * power) % self.order]
+
+    def inverse(self, a):
+        return self._exp[self.order - self._log[a]]
+
+    # Polynomial helpers (coefficients ordered from highest degree to lowest)
+
+    def poly_scale(self, p, x):
+        return [self.smul(c, x) for c in p]
+
+    def poly_add(self, p, q):
+        r = [0] * max(len(p), len(q))
+        for i, c in enumerate(p):
+            r[i + len(r) - len(p)] = c
+        for i, c in enumerate(q):
+            r[i + len(r) - len(q)] ^= c
+        return r
+
+    def poly_mul(self, p, q):
+        r = [0] * (len(p) + len(q) - 1)
+        for j, qc in enumerate(q):
+            for i, pc in enumerate(p):
+                r[i + j] ^= self.smul(pc, qc)
+        return r
+
+    def poly_eval(self, poly, x):
+        y = poly[0]
+        for c in poly[1:]:
+            y = self.smul(y, x) ^ c
+        return y
+
+
+class ReedSolomon:
+    """Systematic Reed-Solomon code with ``nsym`` parity symbols per codeword.
+
+    All public methods work on batches: a 2D array holds one codeword per row,
+    and encoding / syndrome computation run over every row at once.
+    """
+
+    def __init__(self, nsym, bits=8):
+        self.gf = GaloisField(bits)
+        if not 0 < nsym < self.gf.order:
+            raise ValueError(f"nsym must be between 1 and {self.gf.order - 1}")
+        self.nsym = nsym
+        self.max_length = self.gf.order
+
+        generator = [1]
+        for i in range(nsym):
+            generator = self.gf.poly_mul(generator, [1, self.gf.pow(2, i)])
+        self.generator = np.array(generator, dtype=np.int64)
+        # alpha^0 .. alpha^(nsym-1), the roots of the generator polynomial
+        self.roots = self.gf.exp[:nsym].copy()
+
+    def _as_batch(self, data):
+        data = np.asarray(data, dtype=np.int64)
+        return data[np.newaxis, :] if data.ndim == 1 else data
+
+    def encode(self, messages):
+        """Append ``nsym`` parity symbols to every message row."""
+        messages = self._as_batch(messages)
+        batch, k = messages.shape
+        if k + self.nsym > self.max_length:
+            raise ValueError(f"Codeword length {k + self.nsym} exceeds {self.max_length}")
+
+        # LFSR polynomial division, vectorized over the batch
+        remainder = np.zeros((batch, self.nsym), dtype=np.int64)
+        taps = self.generator[1:][np.newaxis, :]
+        for i in range(k):
+            feedback = messages[:, i] ^ remainder[:, 0]
+            remainder[:, :-1] = remainder[:, 1:]
+            remainder[:, -1] = 0
+            remainder ^= self.gf.mul(feedback[:, np.newaxis], taps)
+        return np.hstack([messages, remainder]).astype(self.gf.dtype)
+
+    def syndromes(self, codewords):
+        """Syndromes of every codeword row, shape (batch, nsym)."""
+        codewords = self._as_batch(codewords)
+        synd = np.zeros((codewords.shape[0], self.nsym), dtype=np.int64)
+        roots = self.roots[np.newaxis, :]
+        for i in range(codewords.shape[1]):
+            synd = self.gf.mul(synd, roots) ^ codewords[:, i:i + 1]
+        return synd
+
+    def decode(self, codewords, erase_pos=None):
+        """Correct every codeword row and return the message part.
+
+        ``erase_pos`` lists symbol positions known to be lost; they are shared by
+        all rows, which is how whole-strand dropouts appear after interleaving.
+        """
+        codewords = self._as_batch(codewords).copy()
+        erase_pos = sorted(set(erase_pos or []))
+        if len(erase_pos) > self.nsym:
+            raise ReedSolomonError("Too many erasures to correct")
+        if erase_pos:
+            codewords[:, erase_pos] = 0
+
+        synd = self.syndromes(codewords)
+        dirty = np.flatnonzero(synd.any(axis=1))
+        if erase_pos and len(dirty):
+            # Rows whose only damage is the shared erasures are fixed in one batch
+            clean = ~self._forney_syndromes(synd[dirty], erase_pos, codewords.shape[1]).any(axis=1)
+            rows = dirty[clean]
+            codewords[rows] = self._correct_erasures(codewords[rows], synd[rows], erase_pos)
+            dirty = dirty[~clean]
+        for row in dirty:
+            try:
+                codewords[row] = self._correct(codewords[row].tolist(), synd[row].tolist(), erase_pos)
+            except ReedSolomonError as e:
+                raise ReedSolomonError(f"Codeword {row}: {e}") from None
+        return codewords[:, :-self.nsym].astype(self.gf.dtype)
+
+    def _forney_syndromes(self, synd, erase_pos, n):
+        """Batched Forney syndromes; all-zero rows contain no errors besides the erasures."""
+        fsynd = synd.copy()
+        for p in erase_pos:
+            x = self.gf.pow(2, n - 1 - p)
+            fsynd[:, :-1] = self.gf.mul(fsynd[:, :-1], x) ^ fsynd[:, 1:]
+        return fsynd[:, :self.nsym - len(erase_pos)]
+
+    def _errata_locator(self, coef_pos):
+        errata_loc = [1]
+        for i in coef_pos:
+            errata_loc = self.gf.poly_mul(errata_loc, [self.gf.pow(2, i), 1])
+        return errata_loc
+
+    def _correct_erasures(self, codewords, synd, erase_pos):
+        """Forney algorithm for a batch of rows sharing the same erasure positions."""
+        gf = self.gf
+        n = codewords.shape[1]
+        coef_pos = [n - 1 - p for p in erase_pos]
+        errata_loc = self._errata_locator(coef_pos)
+        length = len(errata_loc)
+
+        # Error evaluator per row: last ``length`` coefficients of (S(x) * errata_loc(x))
+        padded = np.hstack([synd[:, ::-1], np.zeros((len(synd), 1), dtype=np.int64)])
+        err_eval = np.zeros((len(synd), length), dtype=np.int64)
+        for j, coef in enumerate(errata_loc):
+            for t in range(length):
+                i = self.nsym + t - j
+                if 0 <= i <= self.nsym:
+                    err_eval[:, t] ^= gf.mul(padded[:, i], coef)
+
+        X = [gf.pow(2, i) for i in coef_pos]
+        for i, Xi in enumerate(X):
+            Xi_inv = gf.inverse(Xi)
+            loc_prime = 1
+            for j, Xj in enumerate(X):
+                if j != i:
+                    loc_prime = gf.smul(loc_prime, 1 ^ gf.smul(Xi_inv, Xj))
+            y = err_eval[:, 0]
+            for t in range(1, length):
+                y = gf.mul(y, Xi_inv) ^ err_eval[:, t]
+            codewords[:, erase_pos[i]] ^= gf.mul(y, gf.sdiv(Xi, loc_prime))
+        return codewords
+
+    def _correct(self, msg, synd, erase_pos):
+        n = len(msg)
+
+        # Forney syndromes remove the known erasures before Berlekamp-Massey
+        fsynd = self._forney_syndromes(np.array([synd]), erase_pos, n)[0].tolist()
+
+        err_loc = self._find_error_locator(fsynd, len(erase_pos))
+        err_pos = self._find_errors(err_loc[::-1], n)
+        msg = self._correct_errata(msg, synd, erase_pos + err_pos)
+
+        if self.syndromes(msg).any():
+            raise ReedSolomonError("Could not correct message")
+        return msg
+
+    def _find_error_locator(self, synd, erase_count):
+        """Berlekamp-Massey on the (Forney) syndromes."""
+        gf = self.gf
+        err_loc = [1]
+        old_loc = [1]
+        for i in range(self.nsym - erase_count):
+            delta = synd[i]
+            for j in range(1, len(err_loc)):
+                delta ^= gf.smul(err_loc[-(j + 1)], synd[i - j])
+            old_loc = old_loc + [0]
+            if delta != 0:
+                if len(old_loc) > len(err_loc):
+                    new_loc = gf.poly_scale(old_loc, delta)
+                    old_loc = gf.poly_scale(err_loc, gf.inverse(delta))
+                    err_loc = new_loc
+                err_loc = gf.poly_add(err_loc, gf.poly_scale(old_loc, delta))
+
+        while len(err_loc) > 1 and err_loc[0] == 0:
+            del err_loc[0]
+        errs = len(err_loc) - 1
+        if errs * 2 + erase_count > self.nsym:
+            raise ReedSolomonError("Too many errors to correct")
+        return err_loc
+
+    def _find_errors(self, err_loc, n):
+        """Chien search, vectorized over all candidate positions."""
+        gf = self.gf
+        if len(err_loc) == 1:
+            return []
+        x = gf.exp[:n]
+        value = np.full(n, err_loc[0], dtype=np.int64)
+        for c in err_loc[1:]:
+            value = gf.mul(value, x) ^ c
+        roots = np.flatnonzero(value == 0)
+        if len(roots) != len(err_loc) - 1:
+            raise ReedSolomonError("Could not locate errors")
+        return [n - 1 - int(i) for i in roots]
+
+    def _correct_errata(self, msg, synd, err_pos):
+        """Forney algorithm for the error magnitudes at known positions."""
+        gf = self.gf
+        n = len(msg)
+        coef_pos = [n - 1 - p for p in err_pos]
+
+        errata_loc = self._errata_locator(coef_pos)
+
+        # Error evaluator: (S(x) * errata_loc(x)) mod x^(len(errata_loc))
+        product = gf.poly_mul(synd[::-1] + [0], errata_loc)
+        err_eval = product[-len(errata_loc):]
+
+        X = [gf.pow(2, i) for i in coef_pos]
+        for i, Xi in enumerate(X):
+            Xi_inv = gf.inverse(Xi)
+            loc_prime = 1
+            for j, Xj in enumerate(X):
+                if j != i:
+                    loc_prime = gf.smul(loc_prime, 1 ^ gf.smul(Xi_inv, Xj))
+            if loc_prime == 0:
+                raise ReedSolomonError("Could not find error magnitude")
+            y = gf.smul(Xi, gf.poly_eval(err_eval, Xi_inv))
+            msg[err_pos[i]] ^= gf.sdiv(y, loc_prime)
+        return msg
+
+
+class StrandOuterCode:
+    """Interleaved RS code across strands.
+
+    Symbol ``j`` of every strand forms one codeword, so a strand that drops out
+    completely becomes a single erasure in each codeword and up to ``nsym`` lost
+    strands can be recovered. Use ``bits=16`` when more than 255 strands are coded
+    together.
+    """
+
+    def __init__(self, nsym, bits=8):
+        self.rs = ReedSolomon(nsym, bits)
+        self.nsym = nsym
+        self.bits = bits
+
+    def _to_symbols(self, payload):
+        if self.bits == 8:
+            return np.frombuffer(payload, dtype=np.uint8)
+        if len(payload) % 2:
+            raise ValueError("Strand payload length must be even for GF(2^16)")
+        return np.frombuffer(payload, dtype=">u2")
+
+    def _to_bytes(self, symbols):
+        if self.bits == 8:
+            return symbols.astype(np.uint8).tobytes()
+        return symbols.astype(">u2").tobytes()
+
+    def encode(self, strands):
+        """Return the data strands followed by ``nsym`` parity strands."""
+        if not strands:
+            return []
+        if len({len(s) for s in strands}) != 1:
+            raise ValueError("All strand payloads must have the same length")
+        matrix = np.vstack([self._to_symbols(s) for s in strands])
+        coded = self.rs.encode(matrix.T).T
+        return [self._to_bytes(row) for row in coded]
+
+    def encode_groups(self, groups):
+        """Batched ``encode`` over a (groups, strands, symbols) array of independent groups.
+
+        Returns a (groups, strands + nsym, symbols) array; every group gets its own
+        parity strands, and all groups are coded in one pass.
+        """
+        groups = np.asarray(groups)
+        count, strands, width = groups.shape
+        columns = groups.transpose(0, 2, 1).reshape(count * width, strands)
+        coded = self.rs.encode(columns)
+        return coded.reshape(count, width, strands + self.nsym).transpose(0, 2, 1)
+
+    def decode_groups(self, groups, erased=None):
+        """Batched ``decode`` over groups that share the same ``erased`` strand positions."""
+        groups = np.asarray(groups)
+        count, strands, width = groups.shape
+        columns = groups.transpose(0, 2, 1).reshape(count * width, strands)
+        data = self.rs.decode(columns, erased)
+        return data.reshape(count, width, strands - self.nsym).transpose(0, 2, 1)
+
+    def decode(self, strands):
+        """Recover the data strands; missing strands are passed as ``None``."""
+        present = [s for s in strands if s is not None]
+        if not present:
+            raise ReedSolomonError("No strands to decode")
+        width = len(self._to_symbols(present[0]))
+        erased = [i for i, s in enumerate(strands) if s is None]
+        rows = [np.zeros(width, dtype=np.int64) if s is None else self._to_symbols(s) for s in strands]
+        data = self.rs.decode(np.vstack(rows).T, erased).T
+        return [self._to_bytes(row) for row in data]
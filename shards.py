@@ -0,0 +1,267 @@
+"""Sharded encoding and decoding for inputs too large for one process.
+
+The input is split into fixed-size shards that are encoded independently, each
+into its own FASTA part, so shards can run on a local process pool or on several
+machines that share a filesystem. A manifest (``manifest.json`` in the output
+directory) records every shard's input offset and length, its seed, its part file
+and the range of global strand IDs it holds, so decoding can likewise run per
+shard and write each shard's bytes back at its offset.
+
+A shard's strands depend only on its data and its seed, which is derived from the
+job seed and the shard index, and the compression codec is fixed for the whole
+job when it is planned (given explicitly, or chosen by compressed size alone,
+never by timing). The parts and manifest are therefore identical whether the
+shards run in one process or many, and across repeated runs.
+
+Local use::
+
+    python shards.py encode INPUT OUTDIR --shard-size 64M --seed 1
+    python shards.py decode OUTDIR OUTPUT
+
+On a cluster, run ``plan`` once, ``encode-shard OUTDIR INDEX`` for every shard
+(on any machine), then ``finalize``.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bounded import block_seed, decode_block, encode_block, parse_size
+
+MANIFEST_NAME = "manifest.json"
+VERSION = 2  # 2: every part carries a bounded block header (index, length, CRC-32)
+SHARD_SIZE = 64 * 1024 * 1024
+
+
+class ShardError(Exception):
+    """Raised for missing shards or shards that decode to the wrong content."""
+
+
+def _part_name(index):
+    return f"part-{index:05d}.fasta"
+
+
+def _result_name(index):
+    return f"part-{index:05d}.json"
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, value):
+    # Written to a temporary name first so readers on other machines never see a partial file
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(value, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _read_range(path, offset, length):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def plan(input_path, out_dir, alphabet, method, shard_size=SHARD_SIZE, seed=0, gc_content=50,
+         homopolymer_limit=4, compress=False):
+    """Split the input into shards and write the (not yet finalized) manifest.
+
+    ``compress`` is False, True (pick a codec from the start of the input) or a
+    codec name from ``compression.CODECS``.
+    """
+    size = os.path.getsize(input_path)
+    if compress is True:
+        # One codec for the whole job, chosen from the start of the input by compressed size alone:
+        # CPU timings vary between runs and machines, and the plan must be reproducible
+        from compression import SAMPLE_COUNT, SAMPLE_SIZE, choose_codec
+
+        compress = choose_codec(_read_range(input_path, 0, SAMPLE_SIZE * SAMPLE_COUNT), cpu_weight=0)[0]
+    elif compress:
+        from compression import CODEC_IDS
+
+        if compress not in CODEC_IDS:
+            raise ValueError(f"Unknown compression codec: {compress} (choose from {', '.join(CODEC_IDS)})")
+    manifest = {
+        "version": VERSION,
+        "input": os.path.basename(input_path),
+        "input_path": os.path.abspath(input_path),
+        "size": size,
+        "shard_size": shard_size,
+        "seed": seed,
+        "alphabet": alphabet,
+        "method": method,
+        "options": {"gc_content": gc_content, "homopolymer_limit": homopolymer_limit, "compress": compress},
+        "shards": [
+            {"index": i, "offset": offset, "length": min(shard_size, size - offset),
+             "seed": block_seed(seed, i), "part": _part_name(i)}
+            for i, offset in enumerate(range(0, size, shard_size))
+        ],
+        "finalized": False,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    _write_json(os.path.join(out_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def encode_shard(out_dir, index):
+    """Encode one shard into its FASTA part and record its result next to it."""
+    manifest = _read_json(os.path.join(out_dir, MANIFEST_NAME))
+    shard = manifest["shards"][index]
+    data = _read_range(manifest["input_path"], shard["offset"], shard["length"])
+    strands = encode_block(data, manifest["alphabet"], manifest["method"], seed=shard["seed"], index=index,
+                           last=index == len(manifest["shards"]) - 1, **manifest["options"])
+    part = os.path.join(out_dir, shard["part"])
+    with open(part + ".tmp", "w") as f:
+        f.write("".join(f">s{index}_{i}\n{seq}\n" for i, seq in enumerate(strands)))
+    os.replace(part + ".tmp", part)
+    result = {"index": index, "strands": len(strands), "sha256": hashlib.sha256(data).hexdigest()}
+    _write_json(os.path.join(out_dir, _result_name(index)), result)
+    return result
+
+
+def finalize(out_dir):
+    """Collect the shard results into the manifest and assign global strand ID ranges."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = _read_json(path)
+    first = 0
+    for shard in manifest["shards"]:
+        result_path = os.path.join(out_dir, _result_name(shard["index"]))
+        if not os.path.exists(result_path):
+            raise ShardError(f"Shard {shard['index']} has not been encoded")
+        result = _read_json(result_path)
+        shard.update(strands=result["strands"], sha256=result["sha256"], first_strand=first)
+        first += result["strands"]
+    manifest.update(strands=first, finalized=True)
+    _write_json(path, manifest)
+    for shard in manifest["shards"]:
+        os.remove(os.path.join(out_dir, _result_name(shard["index"])))
+    return manifest
+
+
+def encode_sharded(input_path, out_dir, alphabet, method, shard_size=SHARD_SIZE, seed=0, workers=None, **options):
+    """Plan, encode every shard on a local process pool, and finalize the manifest.
+
+    ``workers=1`` runs every shard in this process.
+    """
+    manifest = plan(input_path, out_dir, alphabet, method, shard_size, seed, **options)
+    indices = range(len(manifest["shards"]))
+    if workers == 1:
+        for index in indices:
+            encode_shard(out_dir, index)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(encode_shard, [out_dir] * len(indices), indices))
+    return finalize(out_dir)
+
+
+def read_part(path):
+    """Sequences of a FASTA part (headers skipped)."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith(">")]
+
+
+def decode_shard(out_dir, index, output_path):
+    """Decode one shard and write its bytes at the shard's offset in ``output_path``."""
+    manifest = _read_json(os.path.join(out_dir, MANIFEST_NAME))
+    shard = manifest["shards"][index]
+    options = manifest["options"]
+    decoded, _, data = decode_block(read_part(os.path.join(out_dir, shard["part"])), manifest["alphabet"],
+                                    manifest["method"], options["gc_content"], options["homopolymer_limit"])
+    if decoded != index:
+        raise ShardError(f"Part of shard {index} holds shard {decoded}")
+    if len(data) != shard["length"] or hashlib.sha256(data).hexdigest() != shard["sha256"]:
+        raise ShardError(f"Shard {index} decoded to the wrong content")
+    with open(output_path, "r+b") as f:
+        f.seek(shard["offset"])
+        f.write(data)
+    return len(data)
+
+
+def decode_sharded(out_dir, output_path, workers=None):
+    """Decode every shard in parallel into ``output_path``; returns the manifest."""
+    manifest = _read_json(os.path.join(out_dir, MANIFEST_NAME))
+    if manifest.get("version") != VERSION:
+        raise ShardError(f"Unsupported manifest version: {manifest.get('version')}")
+    if not manifest["finalized"]:
+        raise ShardError("Manifest is not finalized; run finalize after all shards are encoded")
+    # Shards write into a preallocated file, each at its own offset
+    with open(output_path, "wb") as f:
+        f.truncate(manifest["size"])
+    indices = range(len(manifest["shards"]))
+    if workers == 1:
+        for index in indices:
+            decode_shard(out_dir, index, output_path)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(decode_shard, [out_dir] * len(indices), indices, [output_path] * len(indices)))
+    return manifest
+
+
+def main(argv=None):
+    from compression import CODEC_IDS
+
+    parser = argparse.ArgumentParser(description="Sharded encoding and decoding across processes or machines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("encode", "plan"):
+        command = commands.add_parser(name)
+        command.add_argument("input")
+        command.add_argument("out_dir")
+        command.add_argument("--alphabet", default="A, T, C, G")
+        command.add_argument("--method", default="DNA Fountain")
+        command.add_argument("--gc-content", type=int, default=50)
+        command.add_argument("--homopolymer-limit", type=int, default=4)
+        command.add_argument("--compress", nargs="?", const=True, default=False, choices=list(CODEC_IDS),
+                             help="Compress every shard, with CODEC or a codec chosen from the input size ratio")
+        command.add_argument("--shard-size", type=parse_size, default=SHARD_SIZE, help="e.g. 64M (default)")
+        command.add_argument("--seed", type=int, default=0)
+        if name == "encode":
+            command.add_argument("--workers", type=int, default=None)
+
+    command = commands.add_parser("encode-shard")
+    command.add_argument("out_dir")
+    command.add_argument("index", type=int)
+
+    command = commands.add_parser("finalize")
+    command.add_argument("out_dir")
+
+    command = commands.add_parser("decode")
+    command.add_argument("out_dir")
+    command.add_argument("output")
+    command.add_argument("--workers", type=int, default=None)
+
+    command = commands.add_parser("decode-shard")
+    command.add_argument("out_dir")
+    command.add_argument("index", type=int)
+    command.add_argument("output", help="Preallocated output file shared by all shards")
+    args = parser.parse_args(argv)
+
+    if args.command in ("encode", "plan"):
+        options = {"gc_content": args.gc_content, "homopolymer_limit": args.homopolymer_limit,
+                   "compress": args.compress}
+        if args.command == "plan":
+            manifest = plan(args.input, args.out_dir, args.alphabet, args.method, args.shard_size, args.seed,
+                            **options)
+            print(f"Planned {len(manifest['shards'])} shards in {args.out_dir}")
+        else:
+            manifest = encode_sharded(args.input, args.out_dir, args.alphabet, args.method, args.shard_size,
+                                      args.seed, args.workers, **options)
+            print(f"Encoded {len(manifest['shards'])} shards into {manifest['strands']} strands")
+    elif args.command == "encode-shard":
+        result = encode_shard(args.out_dir, args.index)
+        print(f"Shard {args.index}: {result['strands']} strands")
+    elif args.command == "finalize":
+        manifest = finalize(args.out_dir)
+        print(f"Finalized {len(manifest['shards'])} shards, {manifest['strands']} strands")
+    elif args.command == "decode":
+        manifest = decode_sharded(args.out_dir, args.output, args.workers)
+        print(f"Decoded {len(manifest['shards'])} shards into {manifest['size']} bytes")
+    else:
+        print(f"Shard {args.index}: {decode_shard(args.out_dir, args.index, args.output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
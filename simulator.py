@@ -0,0 +1,174 @@
+"""Fast in-process simulation of the synthesis / storage / sequencing channel."""
+import numpy as np
+
+# Per-base substitution / insertion / deletion rates and per-strand dropout for each
+# technology offered in SimulateWindow. "None" skips the stage.
+ERROR_PROFILES = {
+    "合成": {
+        "ErrASE": {"sub": 2e-4, "ins": 1e-4, "del": 3e-4, "dropout": 0.0},
+        "HT-Electrochemical": {"sub": 1e-3, "ins": 5e-4, "del": 2e-3, "dropout": 0.005},
+        "Inkjet": {"sub": 5e-4, "ins": 2e-4, "del": 1e-3, "dropout": 0.002},
+        "None": {"sub": 0.0, "ins": 0.0, "del": 0.0, "dropout": 0.0},
+    },
+    "保存": {
+        "Cold Storage": {"sub": 0.0, "ins": 0.0, "del": 0.0, "dropout": 0.001},
+        "Room Temperature Storage": {"sub": 1e-4, "ins": 0.0, "del": 0.0, "dropout": 0.02},
+        "None": {"sub": 0.0, "ins": 0.0, "del": 0.0, "dropout": 0.0},
+    },
+    "测序": {
+        "Nanopore": {"sub": 0.04, "ins": 0.03, "del": 0.04, "dropout": 0.0},
+        "Illumina": {"sub": 2e-3, "ins": 5e-5, "del": 5e-5, "dropout": 0.0},
+        "PacBio": {"sub": 5e-3, "ins": 5e-3, "del": 5e-3, "dropout": 0.0},
+        "None": {"sub": 0.0, "ins": 0.0, "del": 0.0, "dropout": 0.0},
+    },
+}
+
+
+# Modified-base calling errors per sequencing technology: a 5mC / 6mA that is not
+# called is read as the plain base (miss), and a plain C / A can be called as
+# modified (false call). Illumina cannot see methylation without a bisulfite step.
+METHYLATION_CALLING = {
+    "Nanopore": {"miss_5mC": 0.05, "false_5mC": 0.02, "miss_6mA": 0.10, "false_6mA": 0.03},
+    "Illumina": {"miss_5mC": 1.0, "false_5mC": 0.0, "miss_6mA": 1.0, "false_6mA": 0.0},
+    "PacBio": {"miss_5mC": 0.10, "false_5mC": 0.01, "miss_6mA": 0.05, "false_6mA": 0.01},
+    "None": {"miss_5mC": 0.0, "false_5mC": 0.0, "miss_6mA": 0.0, "false_6mA": 0.0},
+}
+
+# Single-letter forms used for modified bases (see alphabet.py)
+_MODIFIED = {"5mC": (ord("E"), ord("C")), "6mA": (ord("F"), ord("A"))}
+
+# Strands simulated per step; also the unit of checkpointing
+CHUNK_SIZE = 50000
+
+
+def combined_profile(synthesis="None", storage="None", sequencing="None"):
+    """Merge the stage profiles into one set of channel error rates."""
+    stages = [ERROR_PROFILES["合成"][synthesis], ERROR_PROFILES["保存"][storage], ERROR_PROFILES["测序"][sequencing]]
+    profile = {}
+    for key in ("sub", "ins", "del", "dropout"):
+        keep = 1.0
+        for stage in stages:
+            keep *= 1.0 - stage[key]
+        profile[key] = 1.0 - keep
+    return profile
+
+
+def _pack(sequences):
+    """Concatenate sequences into one uint8 array plus their lengths."""
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    data = np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8)
+    return data, lengths
+
+
+def _unpack(data, lengths):
+    text = data.tobytes().decode("ascii")
+    bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+    return [text[bounds[i]:bounds[i + 1]] for i in range(len(lengths))]
+
+
+def apply_errors(sequences, sub=0.0, ins=0.0, dele=0.0, rng=None, alphabet=None):
+    """Introduce substitutions, insertions and deletions into every sequence.
+
+    The whole pool is processed as one array, so the cost is a handful of NumPy
+    passes rather than a Python loop per base.
+    """
+    if not sequences:
+        return []
+    rng = np.random.default_rng(rng)
+    data, lengths = _pack(sequences)
+    symbols = np.frombuffer((alphabet or "ATCG").encode("ascii"), dtype=np.uint8)
+
+    data = data.copy()
+    substituted = rng.random(len(data)) < sub
+    data[substituted] = symbols[rng.integers(0, len(symbols), substituted.sum())]
+
+    # Each base is emitted 0 (deleted), 1 or 2 (followed by an insertion) times
+    counts = np.ones(len(data), dtype=np.int64)
+    counts[rng.random(len(data)) < dele] = 0
+    inserted = (rng.random(len(data)) < ins) & (counts > 0)
+    counts[inserted] = 2
+
+    out = np.repeat(data, counts)
+    # The second copy of each inserted base is replaced with a random symbol
+    ends = np.cumsum(counts)
+    positions = ends[inserted] - 1
+    out[positions] = symbols[rng.integers(0, len(symbols), len(positions))]
+
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    emitted = np.concatenate([[0], ends])
+    new_lengths = emitted[bounds[1:]] - emitted[bounds[:-1]]
+    return _unpack(out, new_lengths)
+
+
+def methylation_calling_errors(sequences, rng=None, **rates):
+    """Apply missed and false modified-base calls to every read.
+
+    ``rates`` holds ``miss_5mC``, ``false_5mC``, ``miss_6mA`` and ``false_6mA``.
+    Works on the whole read pool as one array, like ``apply_errors``.
+    """
+    if not sequences:
+        return []
+    rng = np.random.default_rng(rng)
+    data, lengths = _pack(sequences)
+    data = data.copy()
+    draw = rng.random(len(data))
+    for base, (modified, plain) in _MODIFIED.items():
+        is_modified = data == modified
+        is_plain = data == plain
+        data[is_modified & (draw < rates.get(f"miss_{base}", 0.0))] = plain
+        data[is_plain & (draw < rates.get(f"false_{base}", 0.0))] = modified
+    return _unpack(data, lengths)
+
+
+def simulate(sequences, synthesis="None", storage="None", sequencing="None", coverage=None, seed=None,
+             alphabet=None, checkpoint=None, chunk_size=CHUNK_SIZE, blocks=None):
+    """Simulate the storage channel and return the list of reads.
+
+    Strands are dropped with the combined dropout rate and each read gets
+    independent errors. With ``coverage=None`` every surviving strand is read
+    exactly once; with a number it is sampled ``Poisson(coverage)`` times, so even
+    ``coverage=1.0`` leaves about 37% of the strands unread.
+    Pools that contain modified bases also go through the sequencer's
+    methylation-calling error model.
+
+    ``blocks`` gives the block of every strand (see ``bounded.block_fasta``); reads
+    keep the block of the strand they came from, and ``(reads, read_blocks)`` is
+    returned so the reads can be tagged and decoded block by block again.
+
+    The pool is processed in chunks of ``chunk_size`` strands. With a
+    ``checkpoint`` (see ``checkpoint.Checkpoint``) the reads of every chunk are
+    recorded together with the PRNG state, so an interrupted run resumes from the
+    last finished chunk and produces the same reads as an uninterrupted one.
+    """
+    rng = np.random.default_rng(seed)
+    profile = combined_profile(synthesis, storage, sequencing)
+    modified = any("E" in s or "F" in s for s in sequences)
+
+    reads = []
+    origins = []  # Strand index of every read
+    for start in range(0, len(sequences), chunk_size):
+        if checkpoint is not None and start in checkpoint.done:
+            chunk_reads, chunk_origins, rng.bit_generator.state = checkpoint.done[start]
+        else:
+            chunk = sequences[start:start + chunk_size]
+            survived = rng.random(len(chunk)) >= profile["dropout"]
+            if coverage is None:
+                copies = survived.astype(np.int64)
+            else:
+                copies = rng.poisson(coverage, len(chunk)) * survived
+            chunk_origins = np.repeat(np.arange(start, start + len(chunk)), copies)
+            pool = [sequences[i] for i in chunk_origins.tolist()]
+            chunk_reads = apply_errors(pool, profile["sub"], profile["ins"], profile["del"], rng, alphabet)
+            if modified:
+                chunk_reads = methylation_calling_errors(chunk_reads, rng, **METHYLATION_CALLING[sequencing])
+            if checkpoint is not None:
+                checkpoint.record(start, (chunk_reads, chunk_origins, rng.bit_generator.state))
+        reads.extend(chunk_reads)
+        origins.append(chunk_origins)
+
+    order = rng.permutation(len(reads))
+    reads = [reads[i] for i in order]
+    if blocks is None:
+        return reads
+    origins = np.concatenate(origins or [np.zeros(0, dtype=np.int64)])[order]
+    return reads, np.asarray(blocks, dtype=np.int64)[origins].tolist()
@@ -0,0 +1,280 @@
+"""Parallel parameter sweep over encoding method, alphabet, GC content and homopolymer limit.
+
+Every combination is encoded (and optionally simulated and decoded) in a process
+pool. The input file is placed in shared memory once and every worker reads it
+through a view of that segment, so it is neither pickled per job nor copied per
+process. The lookup-table method ignores GC content and homopolymer limit, so it
+is run once per alphabet with both left empty. Results are returned as a table
+together with the Pareto front of density (bits/base) vs. recovery vs. time.
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ENCODING_METHODS = ["DNA Fountain", "YYC", "HybridCode", "HEDGES", "6-Huffman", "8-Huffman", "Lookup Table"]
+ENCODING_LETTERS = ["A, T, C, G", "ATCGPZ", "ATCGBS", "A,T,C,G,P,Z,B,S", "A,T,C,G,5mC,6mA"]
+GC_CONTENT_RANGE = range(40, 61, 5)  # Same bounds as EncodingWindow.gc_content_spinbox
+HOMOPOLYMER_RANGE = range(1, 7)  # Same bounds as EncodingWindow.homopolymer_limit_spinbox
+
+RECOVERY_CHUNK = 16  # Bytes per piece of the input that recovery looks for in the decoded output
+
+TABLE_COLUMNS = ["method", "alphabet", "gc_content", "homopolymer_limit", "strands", "bases", "density",
+                 "constraint_rate", "recovery", "time", "error"]
+
+# Per-process view of the shared input, filled in by the pool initializer
+_worker_input = {}
+
+
+def gc_content(sequence):
+    """GC percentage of a sequence (5mC, written "E", pairs like C)."""
+    if not sequence:
+        return 0.0
+    return 100.0 * (sequence.count("G") + sequence.count("C") + sequence.count("E")) / len(sequence)
+
+
+def max_homopolymer(sequence):
+    """Length of the longest run of one repeated base."""
+    longest = run = 0
+    previous = None
+    for base in sequence:
+        run = run + 1 if base == previous else 1
+        previous = base
+        longest = max(longest, run)
+    return longest
+
+
+def _window_keys(data, width):
+    """64-bit hash of every ``width``-byte window of ``data`` (one per start offset)."""
+    buf = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+    count = len(buf) - width + 1
+    keys = np.zeros(max(count, 0), dtype=np.uint64)
+    for k in range(width):
+        keys = (keys * np.uint64(0x100000001B3)) ^ buf[k:k + count]
+    return keys
+
+
+def recovery(original, decoded, chunk=RECOVERY_CHUNK):
+    """Fraction of the ``chunk``-byte pieces of ``original`` found anywhere in ``decoded``.
+
+    Pieces are matched at any offset, so a lost strand, a shifted tail or a
+    truncated output only costs the pieces they actually destroy, unlike a
+    positional byte comparison.
+    """
+    if not original:
+        return 1.0
+    if len(original) <= chunk:
+        return float(bytes(original) in bytes(decoded))
+    starts = list(range(0, len(original) - chunk + 1, chunk))
+    if starts[-1] + chunk < len(original):
+        starts.append(len(original) - chunk)  # The tail, overlapping the previous piece
+    pieces = _window_keys(original, chunk)[starts]
+    return float(np.isin(pieces, _window_keys(decoded, chunk)).mean())
+
+
+def _attach_input(name, size):
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_input["shm"] = shm
+    _worker_input["data"] = shm.buf[:size]  # A view of the shared segment, not a copy
+
+
+def encode_job(config, simulate=False, gc_tolerance=5, fountain=None, **simulate_kwargs):
+    """Encode the shared input with one configuration and measure the result.
+
+    ``fountain`` holds tuned DNA Fountain parameters (see ``fountain_tuning.tune``).
+    """
+    from alphabet import codec_for
+
+    file_data = _worker_input["data"]
+    row = dict(config)
+    start = time.perf_counter()
+    try:
+        codec = codec_for(config["alphabet"], config["method"], config["gc_content"], config["homopolymer_limit"])
+        if codec:
+            sequences = codec.encode_strands(file_data)
+        else:
+            import external
+
+            extra = None
+            if fountain and config["method"] == "DNA Fountain":
+                from fountain_tuning import encode_kwargs
+
+                extra = encode_kwargs(fountain)
+            # The external encoder gets bytes, as it always has; the copy lives for this job only
+            sequences = external.encode(bytes(file_data), config["alphabet"], config["method"],
+                                        config["gc_content"], config["homopolymer_limit"], extra=extra)
+        bases = sum(len(s) for s in sequences)
+        row.update(strands=len(sequences), bases=bases, density=8 * len(file_data) / bases if bases else 0.0)
+        if config["gc_content"] is not None:
+            compliant = sum(
+                1 for s in sequences
+                if abs(gc_content(s) - config["gc_content"]) <= gc_tolerance
+                and max_homopolymer(s) <= config["homopolymer_limit"]
+            )
+            row["constraint_rate"] = compliant / len(sequences) if sequences else 0.0
+
+        if simulate:
+            from dedup import decode_reads
+            from simulator import simulate as run_channel
+
+            reads = run_channel(sequences, **simulate_kwargs)
+            # Lost strands are zero-filled so a partial decode still counts what it recovered
+            decoded = decode_reads(reads, config["alphabet"], config["method"], config["gc_content"],
+                                   config["homopolymer_limit"], fill_missing=True)[0] or b""
+            row["recovery"] = recovery(file_data, bytes(decoded))
+    except Exception as e:
+        row["error"] = str(e)
+    row["time"] = time.perf_counter() - start
+    return row
+
+
+def sweep_configs(methods=None, alphabets=None, gc_values=None, homopolymer_limits=None):
+    """All combinations of the design-space axes.
+
+    Methods that apply no constraints get one configuration per alphabet, with
+    ``gc_content`` and ``homopolymer_limit`` set to None.
+    """
+    from alphabet import TABLE_METHOD
+
+    configs = []
+    for m, a in itertools.product(methods or ENCODING_METHODS, alphabets or ENCODING_LETTERS):
+        if m == TABLE_METHOD:
+            configs.append({"method": m, "alphabet": a, "gc_content": None, "homopolymer_limit": None})
+            continue
+        configs.extend(
+            {"method": m, "alphabet": a, "gc_content": gc, "homopolymer_limit": h}
+            for gc, h in itertools.product(gc_values or GC_CONTENT_RANGE, homopolymer_limits or HOMOPOLYMER_RANGE)
+        )
+    return configs
+
+
+def run_sweep(file_data, configs=None, workers=None, simulate=False, progress=None, **job_kwargs):
+    """Run ``encode_job`` for every configuration across a process pool.
+
+    ``progress`` is called as ``progress(done, total)`` after each finished job.
+    """
+    configs = configs if configs is not None else sweep_configs()
+    shm = shared_memory.SharedMemory(create=True, size=max(len(file_data), 1))
+    try:
+        shm.buf[:len(file_data)] = file_data
+        rows = [None] * len(configs)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach_input,
+                                 initargs=(shm.name, len(file_data))) as pool:
+            futures = {pool.submit(encode_job, config, simulate, **job_kwargs): i for i, config in enumerate(configs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                rows[futures[future]] = future.result()
+                if progress:
+                    progress(done, len(futures))
+    finally:
+        shm.close()
+        shm.unlink()
+    return rows
+
+
+def pareto_front(rows):
+    """Rows not dominated on (max density, max recovery, min time).
+
+    Without simulation there is no recovery figure, so the constraint pass rate
+    is used as the quality axis instead (0 for unconstrained methods, which make
+    no promise about GC content or homopolymers).
+    """
+    candidates = [r for r in rows if not r.get("error")]
+
+    def key(r):
+        quality = r["recovery"] if r.get("recovery") is not None else r.get("constraint_rate") or 0.0
+        return r["density"], quality, -r["time"]
+
+    front = []
+    for r in candidates:
+        kr = key(r)
+        dominated = any(
+            all(a >= b for a, b in zip(key(o), kr)) and key(o) != kr
+            for o in candidates
+        )
+        if not dominated:
+            front.append(r)
+    return front
+
+
+def format_table(rows):
+    """Plain-text table of sweep results."""
+    header = f"{'Method':<14}{'Alphabet':<20}{'GC%':>5}{'Homo':>6}{'Strands':>9}{'bits/base':>11}" \
+             f"{'Constr.':>9}{'Recov.':>8}{'Time(s)':>9}"
+    lines = [header, "-" * len(header)]
+
+    def cell(value, spec=""):
+        return "-" if value is None else format(value, spec)
+
+    for r in rows:
+        config = (f"{r['method']:<14}{r['alphabet']:<20}{cell(r['gc_content']):>5}"
+                  f"{cell(r['homopolymer_limit']):>6}")
+        if r.get("error"):
+            lines.append(f"{config}  error: {r['error']}")
+            continue
+        lines.append(
+            f"{config}{r['strands']:>9}{r['density']:>11.3f}{cell(r.get('constraint_rate'), '.3f'):>9}"
+            f"{cell(r.get('recovery'), '.3f'):>8}{r['time']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep encoding parameters in parallel.")
+    parser.add_argument("input", help="File to encode")
+    parser.add_argument("--methods", nargs="+", default=None, choices=ENCODING_METHODS)
+    parser.add_argument("--alphabets", nargs="+", default=None, choices=ENCODING_LETTERS)
+    parser.add_argument("--gc", nargs="+", type=int, default=None, help="GC content targets (%%)")
+    parser.add_argument("--homopolymer", nargs="+", type=int, default=None, help="Homopolymer limits")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--simulate", action="store_true", help="Also simulate the channel and decode")
+    parser.add_argument("--synthesis", default="None")
+    parser.add_argument("--storage", default="None")
+    parser.add_argument("--sequencing", default="None")
+    parser.add_argument("--coverage", type=float, default=None,
+                        help="Mean reads per strand, Poisson sampled (default: every strand read once)")
+    parser.add_argument("--tune-fountain", action="store_true",
+                        help="Tune DNA Fountain overhead for the simulated channel before the sweep")
+    parser.add_argument("--csv", help="Write the full table to this CSV file")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "rb") as f:
+        file_data = f.read()
+
+    configs = sweep_configs(args.methods, args.alphabets, args.gc, args.homopolymer)
+    job_kwargs = {}
+    if args.simulate:
+        job_kwargs = {"synthesis": args.synthesis, "storage": args.storage, "sequencing": args.sequencing,
+                      "coverage": args.coverage}
+    if args.tune_fountain:
+        from fountain_tuning import tune
+
+        # Without a coverage every strand is read once; Poisson(1) sampling is the conservative stand-in
+        coverage = 1.0 if args.coverage is None else args.coverage
+        job_kwargs["fountain"] = tune(len(file_data), args.synthesis, args.storage, args.sequencing, coverage)
+        print(f"DNA Fountain: {job_kwargs['fountain']['droplets']} droplets "
+              f"(overhead {job_kwargs['fountain']['overhead']:.1%})")
+    rows = run_sweep(file_data, configs, args.workers, args.simulate,
+                     progress=lambda done, total: print(f"\r{done}/{total} jobs", end="", flush=True),
+                     **job_kwargs)
+    print()
+    print(format_table(rows))
+    print("\nPareto front (density vs. recovery vs. time):")
+    print(format_table(pareto_front(rows)))
+    if args.csv:
+        write_csv(rows, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from alphabet import StrandDecodeError, TableCodec, codec_for, parse_letters, to_codes, to_text
+
+DATA = bytes(random.Random(0).randrange(256) for _ in range(1000))
+
+
+@pytest.mark.parametrize("letters", ["A, T, C, G", "ATCGPZ", "A,T,C,G,P,Z,B,S", "A,T,C,G,5mC,6mA"])
+def test_table_codec_round_trip(letters):
+    codec = TableCodec(letters)
+    assert codec.decode(codec.encode(DATA), len(DATA)) == DATA
+    assert codec.decode(codec.encode(DATA, tokens=True), len(DATA)) == DATA
+
+
+def test_modified_base_tokens():
+    assert parse_letters("A,T,C,G,5mC,6mA") == ["A", "T", "C", "G", "5mC", "6mA"]
+    assert to_text(to_codes("A5mC6mAG"), tokens=True) == "A5mC6mAG"
+    with pytest.raises(ValueError):
+        to_codes("ACGN")
+
+
+def test_strands_round_trip_shuffled_and_duplicated():
+    codec = TableCodec("ATCGPZ")
+    strands = codec.encode_strands(DATA)
+    reads = strands + strands[:5]
+    random.Random(1).shuffle(reads)
+    assert codec.decode_strands(reads) == DATA
+
+
+def test_heaviest_copy_wins():
+    codec = TableCodec("A, T, C, G")
+    strands = codec.encode_strands(DATA)
+    # A corrupted copy of strand 3 that keeps its index but changes its payload
+    corrupt = strands[3][:-4] + ("A" if strands[3][-4] != "A" else "T") + strands[3][-3:]
+    assert codec.decode_strands(strands + [corrupt], weights=[5] * len(strands) + [1]) == DATA
+    assert codec.decode_strands([corrupt] + strands) != DATA
+
+
+def test_dropped_strands():
+    codec = TableCodec("A, T, C, G")
+    strands = codec.encode_strands(DATA)
+    with pytest.raises(StrandDecodeError, match="2 of .* strands are missing"):
+        codec.decode_strands(strands[:4] + strands[6:])
+    filled = codec.decode_strands(strands[:4] + strands[6:], fill_missing=True)
+    assert len(filled) == len(DATA)
+    assert filled[:80] == DATA[:80]
+    with pytest.raises(StrandDecodeError, match="Strand 0"):
+        codec.decode_strands(strands[1:])
+
+
+def test_mixed_length_reads_are_skipped():
+    codec = TableCodec("A, T, C, G")
+    strands = codec.encode_strands(DATA)
+    reads = [s[:-1] for s in strands[:3]] + strands + [s + "A" for s in strands[-3:]] + ["ACGT"]
+    assert codec.decode_strands(reads) == DATA
+    with pytest.raises(StrandDecodeError, match="expected length"):
+        codec.decode_strands([s[:-1] for s in strands])
+
+
+def test_reads_outside_the_alphabet_are_skipped():
+    codec = TableCodec("A, T, C, G")
+    strands = codec.encode_strands(DATA)
+    assert codec.decode_strands([strands[0].replace("A", "P")] + strands) == DATA
+
+
+def test_codec_for():
+    assert isinstance(codec_for("ATCGPZ", "Lookup Table"), TableCodec)
+    assert codec_for("A, T, C, G", "DNA Fountain") is None
+    with pytest.raises(ValueError, match="modified bases"):
+        codec_for("A,T,C,G,5mC,6mA", "YYC")
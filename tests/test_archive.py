@@ -0,0 +1,52 @@
+import json
+import zlib
+
+import pytest
+
+from archive import HEADER, MAGIC, VERSION, ArchiveError, extract, pack, safe_name, unpack
+
+FILES = [("a.txt", b"hello world\n" * 5000), ("dir/b.bin", bytes(range(256)) * 300), ("empty", b"")]
+
+
+def _archive(names):
+    # An archive whose manifest is written by hand, as a crafted file would be
+    manifest = {"files": [{"name": n, "size": 0, "sha256": "", "chunks": []} for n in names], "chunks": []}
+    raw = zlib.compress(json.dumps(manifest).encode("utf-8"))
+    return HEADER.pack(MAGIC, VERSION, len(raw)) + raw
+
+
+def test_round_trip_deduplicates_chunks():
+    archive, stats = pack(FILES + [("copy.txt", FILES[0][1])])
+    assert unpack(archive) == FILES + [("copy.txt", FILES[0][1])]
+    assert extract(archive, "dir/b.bin") == FILES[1][1]
+    assert stats["unique_chunks"] < stats["total_chunks"]
+    with pytest.raises(KeyError):
+        extract(archive, "missing")
+
+
+@pytest.mark.parametrize("name", ["../evil", "a/../../evil", "/etc/passwd", "C:\\evil", "..\\evil", "", "a\0b"])
+def test_names_escaping_the_output_directory(name):
+    with pytest.raises(ArchiveError):
+        safe_name(name)
+    with pytest.raises(ArchiveError):
+        pack([(name, b"x")])
+    with pytest.raises(ArchiveError):
+        unpack(_archive([name]))
+
+
+def test_names_are_normalized():
+    assert safe_name("dir\\sub/./file") == "dir/sub/file"
+
+
+def test_corrupted_archives():
+    archive, _ = pack(FILES)
+    with pytest.raises(ArchiveError, match="Not an MMDNA archive"):
+        unpack(b"junk" + archive[4:])
+    with pytest.raises(ArchiveError, match="version"):
+        unpack(archive[:4] + bytes([VERSION + 1]) + archive[5:])
+    with pytest.raises(ArchiveError, match="Corrupted manifest"):
+        unpack(archive[:HEADER.size] + b"\0" * 8 + archive[HEADER.size + 8:])
+    flipped = bytearray(archive)
+    flipped[-10] ^= 0xFF
+    with pytest.raises(ArchiveError, match="Checksum mismatch"):
+        unpack(bytes(flipped))
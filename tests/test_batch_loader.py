@@ -0,0 +1,49 @@
+import pytest
+
+import batch_loader
+from archive import pack, relative_names, unpack
+from batch_loader import expand_paths, load_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a.txt").write_bytes(b"same content")
+    (tmp_path / "b" / "copy.txt").write_bytes(b"same content")
+    (tmp_path / "b" / "other.bin").write_bytes(b"other")
+    return tmp_path
+
+
+def test_expand_paths(tree):
+    assert expand_paths([tree / "a.txt", tree / "b", tree / "b" / "other.bin", tree / "missing"]) == [
+        tree / "a.txt", str(tree / "b" / "copy.txt"), str(tree / "b" / "other.bin")]
+
+
+def test_duplicate_content_keeps_every_name(tree):
+    progress = []
+    loaded, duplicates, errors = load_files([tree], workers=2, progress=lambda *p: progress.append(p))
+    assert [f.path for f in loaded] == [str(tree / "a.txt"), str(tree / "b" / "copy.txt"), str(tree / "b" / "other.bin")]
+    assert duplicates == [str(tree / "b" / "copy.txt")]
+    assert errors == []
+    assert loaded[0].data is loaded[1].data
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+    # Every file is listed in the archive; the repeated content is stored once
+    names = relative_names([f.path for f in loaded])
+    archive, stats = pack(zip(names, (f.data for f in loaded)))
+    assert unpack(archive) == [("a.txt", b"same content"), ("b/copy.txt", b"same content"), ("b/other.bin", b"other")]
+    assert stats["unique_chunks"] == 2
+
+
+def test_unreadable_files(tree, monkeypatch):
+    read = batch_loader.load_file
+
+    def load_file(path):
+        if path.endswith("other.bin"):
+            raise PermissionError(13, "Permission denied", path)
+        return read(path)
+
+    monkeypatch.setattr(batch_loader, "load_file", load_file)
+    loaded, _, errors = load_files([tree / "b"])
+    assert [f.path for f in loaded] == [str(tree / "b" / "copy.txt")]
+    assert [path for path, _ in errors] == [str(tree / "b" / "other.bin")]
@@ -0,0 +1,133 @@
+import io
+import os
+
+import pytest
+
+from bounded import BlockError, block_fasta, decode_file, encode_blocks, encode_stream, plan_blocks, unwrap_block
+from checkpoint import Checkpoint
+
+METHOD = "Lookup Table"
+DATA = os.urandom(5000)
+
+
+def _decode(path, **kwargs):
+    out = io.BytesIO()
+    stats = decode_file(path, out, "A, T, C, G", METHOD, **kwargs)
+    return out.getvalue(), stats
+
+
+def test_blocks_round_trip(tmp_path):
+    blocks = encode_blocks(DATA, "A, T, C, G", METHOD, block_size=1024)
+    assert len(blocks) == 5
+    path = tmp_path / "blocks.fasta"
+    path.write_text(block_fasta(blocks))
+    data, stats = _decode(path)
+    assert data == DATA
+    assert stats["blocks"] == 5
+
+
+def test_stream_round_trip(tmp_path):
+    path = tmp_path / "stream.fasta"
+    with open(path, "w") as out:
+        stats = encode_stream(io.BytesIO(DATA), out, "A, T, C, G", METHOD, budget=64 << 20, workers=1)
+    assert stats["blocks"] == 1
+    assert _decode(path)[0] == DATA
+    with open(path, "w") as out:
+        encode_stream(io.BytesIO(b""), out, "A, T, C, G", METHOD, budget=64 << 20, workers=1)
+    assert _decode(path)[0] == b""
+
+
+def test_small_budget():
+    with pytest.raises(ValueError):
+        plan_blocks(1 << 20)
+
+
+def test_missing_and_trailing_blocks(tmp_path):
+    blocks = encode_blocks(DATA, "A, T, C, G", METHOD, block_size=1024)
+    path = tmp_path / "blocks.fasta"
+    path.write_text(block_fasta(blocks[:2] + blocks[3:]))
+    with pytest.raises(BlockError, match="Block 2 is missing"):
+        _decode(path)
+    path.write_text(block_fasta(blocks[:-1]))
+    with pytest.raises(BlockError, match="without the last block"):
+        _decode(path)
+    path.write_text(block_fasta(blocks + blocks[:1]))
+    with pytest.raises(BlockError, match="follows the last block"):
+        _decode(path)
+
+
+def test_unwrap_block():
+    single = encode_blocks(DATA, "A, T, C, G", METHOD)[0]
+    from alphabet import TableCodec
+
+    assert unwrap_block(TableCodec("A, T, C, G").decode_strands(single)) == DATA
+    assert unwrap_block(b"plain") == b"plain"
+    several = encode_blocks(DATA, "A, T, C, G", METHOD, block_size=1024)
+    with pytest.raises(BlockError, match="more than one block"):
+        unwrap_block(TableCodec("A, T, C, G").decode_strands(several[1]))
+
+
+def test_checkpointed_encode_and_decode_resume(tmp_path):
+    expected = encode_blocks(DATA, "A, T, C, G", METHOD, block_size=1024)
+    # An encode interrupted after two blocks
+    checkpoint = Checkpoint("encode", directory=tmp_path)
+    for index in range(2):
+        checkpoint.record((0, index), expected[index])
+    checkpoint.close()
+    checkpoint = Checkpoint("encode", directory=tmp_path)
+    assert checkpoint.resumed == 2
+    blocks = encode_blocks(DATA, "A, T, C, G", METHOD, checkpoint=checkpoint, block_size=1024)
+    assert blocks == expected
+    assert sorted(checkpoint.done) == [(0, index) for index in range(5)]
+
+    path = tmp_path / "blocks.fasta"
+    path.write_text(block_fasta(blocks[:3]))
+    checkpoint = Checkpoint("decode", directory=tmp_path)
+    with open(tmp_path / "out", "w+b") as out, pytest.raises(BlockError):
+        decode_file(path, out, "A, T, C, G", METHOD, checkpoint=checkpoint)
+    checkpoint.close()
+
+    path.write_text(block_fasta(blocks))
+    checkpoint = Checkpoint("decode", directory=tmp_path)
+    with open(tmp_path / "out", "r+b") as out:
+        stats = decode_file(path, out, "A, T, C, G", METHOD, checkpoint=checkpoint)
+    assert stats["resumed"] == 3
+    assert (tmp_path / "out").read_bytes() == DATA
+
+
+def test_compressed_input_and_compressed_blocks(tmp_path):
+    from compression import compress, decompress
+
+    text = b"compressible text, " * 2000
+    frame = compress(text, "zlib-9")
+    path = tmp_path / "blocks.fasta"
+    # Compressed as a whole and then cut into blocks: the blocks carry the frame as opaque bytes
+    path.write_text(block_fasta(encode_blocks(frame, "A, T, C, G", METHOD, block_size=64)))
+    data, stats = _decode(path)
+    assert stats["blocks"] > 1
+    assert data == frame
+    assert decompress(data) == text
+
+    # Compressed block by block by the encoder, and decompressed by the decoder
+    with open(path, "w") as out:
+        encode_stream(io.BytesIO(text), out, "A, T, C, G", METHOD, budget=64 << 20, workers=1, compress=True)
+    assert _decode(path)[0] == text
+
+
+def test_tags_survive_simulation(tmp_path):
+    from bounded import read_tagged
+    from simulator import simulate
+
+    blocks = encode_blocks(DATA, "A, T, C, G", METHOD, block_size=1024)
+    path = tmp_path / "blocks.fasta"
+    path.write_text(block_fasta(blocks))
+    sequences, tags = read_tagged(path)
+    assert tags == [block for block, strands in enumerate(blocks) for _ in strands]
+    reads, read_tags = simulate(sequences, coverage=3.0, seed=2, blocks=tags)
+    assert set(zip(reads, read_tags)) <= set(zip(sequences, tags))
+    reads, read_tags = simulate(sequences, seed=2, blocks=tags)
+    path.write_text("".join(f">b{tag}_read_{i}\n{read}\n" for i, (read, tag) in enumerate(zip(reads, read_tags))))
+    assert _decode(path)[0] == DATA
+
+    path.write_text("".join(f">read_{i}\n{read}\n" for i, read in enumerate(reads)))
+    assert read_tagged(path) == (reads, None)
@@ -0,0 +1,64 @@
+import pytest
+
+from checkpoint import Checkpoint, job_key, run_units
+
+
+class Crash(Exception):
+    pass
+
+
+def test_resume_after_crash(tmp_path):
+    calls = []
+    crash = [True]
+
+    def square(value):
+        calls.append(value)
+        if value == 3 and crash.pop():
+            raise Crash
+        return value * value
+
+    units = [(i, i) for i in range(6)]
+    checkpoint = Checkpoint("job", directory=tmp_path)
+    with pytest.raises(Crash):
+        run_units(units, square, checkpoint)
+    checkpoint.save_state("rng", [1, 2, 3])
+    checkpoint.close()
+
+    calls.clear()
+    crash.append(False)
+    checkpoint = Checkpoint("job", directory=tmp_path)
+    assert checkpoint.resumed == 3
+    assert checkpoint.state == {"rng": [1, 2, 3]}
+    assert run_units(units, square, checkpoint) == [i * i for i in range(6)]
+    assert calls == [3, 4, 5]
+    checkpoint.discard()
+    assert not Checkpoint("job", directory=tmp_path).done
+
+
+def test_torn_record_is_dropped(tmp_path):
+    checkpoint = Checkpoint("job", directory=tmp_path)
+    for i in range(3):
+        checkpoint.record(i, b"x" * 100)
+    checkpoint.close()
+    size = (tmp_path / "job.ckpt").stat().st_size
+    with open(tmp_path / "job.ckpt", "r+b") as f:
+        f.truncate(size - 7)
+
+    checkpoint = Checkpoint("job", directory=tmp_path)
+    assert sorted(checkpoint.done) == [0, 1]
+    # The torn bytes are cut off, so records appended after resuming stay readable
+    checkpoint.record(2, b"y")
+    checkpoint.close()
+    assert Checkpoint("job", directory=tmp_path).done == {0: b"x" * 100, 1: b"x" * 100, 2: b"y"}
+
+
+def test_job_key(tmp_path):
+    path = tmp_path / "input"
+    path.write_bytes(b"one")
+    params = {"file_path": str(path), "method": "HybridCode"}
+    key = job_key(params, b"data")
+    assert key == job_key(params, b"data")
+    assert key != job_key(params, b"other")
+    assert key != job_key({**params, "method": "YYC"}, b"data")
+    path.write_bytes(b"longer")
+    assert key != job_key(params, b"data")
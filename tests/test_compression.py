@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from compression import CODEC_IDS, CompressionError, choose_codec, compress, decompress, frame_codec, is_compressed
+
+TEXT = b"The quick brown fox jumps over the lazy dog. " * 4000
+
+
+@pytest.mark.parametrize("codec", list(CODEC_IDS))
+def test_round_trip(codec):
+    frame = compress(TEXT, codec, block_size=50_000)
+    assert is_compressed(frame)
+    assert frame_codec(frame) == codec
+    assert decompress(frame) == TEXT
+
+
+def test_empty_input():
+    assert decompress(compress(b"", "zlib-6")) == b""
+
+
+def test_choice_is_deterministic_by_size():
+    assert choose_codec(os.urandom(100_000), cpu_weight=0)[0] == "store"
+    first = choose_codec(TEXT, cpu_weight=0)[0]
+    assert first != "store"
+    assert all(choose_codec(TEXT, cpu_weight=0)[0] == first for _ in range(3))
+
+
+def test_corrupted_frames():
+    frame = compress(TEXT, "zlib-6", block_size=50_000)
+    with pytest.raises(CompressionError, match="Not a compression frame"):
+        decompress(b"junk" + frame[4:])
+    with pytest.raises(CompressionError, match="Not a compression frame"):
+        decompress(frame[:3])
+    with pytest.raises(CompressionError, match="Unsupported frame"):
+        decompress(frame[:4] + bytes([0xFF]) + frame[5:])
+    with pytest.raises(CompressionError, match="Unsupported frame"):
+        decompress(frame[:5] + bytes([0xFF]) + frame[6:])
+
+
+def test_truncated_frames():
+    frame = compress(TEXT, "zlib-6", block_size=50_000)
+    for cut in (len(frame) - 10, 20):
+        with pytest.raises(CompressionError, match="Truncated frame"):
+            decompress(frame[:cut])
+    assert decompress(frame + bytes(16)) == TEXT
+
+
+@pytest.mark.parametrize("codec", ["zlib-6", "bz2-9", "lzma-6"])
+def test_corrupted_blocks(codec):
+    frame = bytearray(compress(TEXT, codec, block_size=50_000))
+    frame[-20:-10] = bytes(10)
+    with pytest.raises(CompressionError):
+        decompress(bytes(frame))
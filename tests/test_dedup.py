@@ -0,0 +1,81 @@
+import random
+
+from dedup import ReadRecord, collapse_reads, duplication_factor, read_records
+
+ALPHABET = "ACGT"
+
+
+def _reads(count, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = ["".join(rng.choice(ALPHABET) for _ in range(rng.randrange(1, 40))) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def test_counts_and_order():
+    records = collapse_reads(["ACGT", "ACGT", "TTTT", "A", "ACGT", "A"])
+    assert records == [ReadRecord("ACGT", 3, None), ReadRecord("A", 2, None), ReadRecord("TTTT", 1, None)]
+    assert duplication_factor(records) == 2.0
+    assert collapse_reads([]) == []
+
+
+def test_best_quality_is_kept():
+    records = collapse_reads([("ACGT", "!!!!"), ("ACGT", "IIII"), ("ACGT", "5555"), "ACGT", ("GG", "")])
+    assert records == [ReadRecord("ACGT", 4, "IIII"), ReadRecord("GG", 1, "")]
+
+
+def test_short_reads_do_not_collide():
+    # Reads that are prefixes of each other, or differ only in length, stay distinct
+    records = collapse_reads(["A", "AA", "AAA", "", "AA", "A" * 64, "A" * 65])
+    assert {r.sequence: r.count for r in records} == {"A": 1, "AA": 2, "AAA": 1, "": 1, "A" * 64: 1, "A" * 65: 1}
+
+
+def test_spilling_gives_the_same_records(tmp_path):
+    reads = _reads(20000, 3000)
+    marks = "!5I" * 20
+    pairs = [(r, marks[i % 3:i % 3 + len(r)]) for i, r in enumerate(reads)]
+    for source in (reads, pairs):
+        in_memory = collapse_reads(source)
+        spilled = collapse_reads(iter(source), max_entries=100, partitions=7, directory=tmp_path)
+        assert spilled == in_memory
+    assert sum(r.count for r in in_memory) == len(reads)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_read_records(tmp_path):
+    fasta = tmp_path / "reads.fasta"
+    fasta.write_text(">r1\nACGT\n>r2\nGGCC\n\n")
+    assert list(read_records(fasta)) == [("ACGT", None), ("GGCC", None)]
+    fastq = tmp_path / "reads.fastq"
+    fastq.write_text("@r1\nACGT\n+\nIIII\n@r2\nGG\n+\n!!\n")
+    assert list(read_records(fastq)) == [("ACGT", "IIII"), ("GG", "!!")]
+
+
+def test_table_stays_within_max_entries(tmp_path, monkeypatch):
+    import dedup
+
+    sizes = []
+    update = dedup.Counter.update
+
+    def tracked(self, *args, **kwargs):
+        update(self, *args, **kwargs)
+        sizes.append(len(self))
+
+    monkeypatch.setattr(dedup.Counter, "update", tracked)
+    reads = [str(i) for i in range(1000)] * 2
+    records = collapse_reads(reads, max_entries=64, partitions=4, directory=tmp_path)
+    assert max(sizes) <= 64
+    assert len(records) == 1000 and all(r.count == 2 for r in records)
+
+
+def test_external_decoder_gets_distinct_reads_and_weights(monkeypatch):
+    import sys
+    import types
+
+    from dedup import decode_reads
+
+    methods = types.ModuleType("methods")
+    methods.Decode = lambda reads, letters, method, weights=None: (reads, weights)
+    monkeypatch.setitem(sys.modules, "methods", methods)
+    (reads, weights), records = decode_reads(["AC", "GT", "AC", "AC"], "A, T, C, G", "YYC")
+    assert reads == ["AC", "GT"]
+    assert weights == [3, 1]
@@ -0,0 +1,58 @@
+import sys
+import types
+
+import pytest
+
+import external
+from bounded import encode_block
+
+
+@pytest.fixture
+def methods(monkeypatch):
+    # Stand-in for the external methods package with only the baseline Encode(data, letters, method)
+    module = types.ModuleType("methods")
+    module.calls = []
+
+    def Encode(data, letters, method):
+        module.calls.append((data, letters, method))
+        return ["ACGT"]
+
+    module.Encode = Encode
+    monkeypatch.setitem(sys.modules, "methods", module)
+    return module
+
+
+def test_baseline_signature(methods):
+    assert external.encode(b"data", "A, T, C, G", "YYC", 50, 4, seed=3) == ["ACGT"]
+    assert methods.calls == [(b"data", "A, T, C, G", "YYC")]
+    assert encode_block(b"data", "A, T, C, G", "YYC", seed=3) == ["ACGT"]
+
+
+def test_options_are_passed_when_accepted(methods):
+    def Encode(data, letters, method, gc_content=50, seed=None, **options):
+        methods.calls.append((gc_content, seed, options))
+        return ["ACGT"]
+
+    methods.Encode = Encode
+    external.encode(b"data", "A, T, C, G", "DNA Fountain", 45, 3, seed=7, extra={"c_dist": 0.1})
+    assert methods.calls == [(45, 7, {"homopolymer_limit": 3, "c_dist": 0.1})]
+
+
+def test_required_options_fail_clearly(methods):
+    from fountain_tuning import ENCODE_OPTIONS, encode_kwargs
+
+    with pytest.raises(ValueError, match="does not accept c_dist, delta, alpha"):
+        external.check_options(ENCODE_OPTIONS)
+    with pytest.raises(ValueError, match="does not accept"):
+        external.encode(b"data", "A, T, C, G", "DNA Fountain",
+                        extra=encode_kwargs({"c": 0.1, "delta": 0.5, "overhead": 0.2}))
+    assert methods.calls == []
+
+
+def test_decode(methods):
+    with pytest.raises(ValueError, match="no Decode"):
+        external.decode(["ACGT"], "A, T, C, G", "YYC")
+    methods.Decode = lambda reads, letters, method: (reads, letters, method)
+    assert external.decode(["ACGT"], "A, T, C, G", "YYC", weights=[3]) == (["ACGT"], "A, T, C, G", "YYC")
+    methods.Decode = lambda reads, letters, method, weights=None: weights
+    assert external.decode(["ACGT"], "A, T, C, G", "YYC", weights=[3]) == [3]
@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+import pytest
+
+from fountain_tuning import droplets_needed, estimate_loss, robust_soliton, segment_bucket, tune
+
+
+def test_robust_soliton():
+    probs = robust_soliton(100, 0.05, 0.5)
+    assert probs.shape == (100,)
+    assert (probs > 0).all()
+    assert math.isclose(probs.sum(), 1.0)
+    assert probs[1] > probs[9]  # Degree 2 is the most common after the spike
+
+
+def test_estimate_loss():
+    assert estimate_loss(coverage=10.0) < 0.01
+    assert estimate_loss(coverage=1.0) == pytest.approx(math.exp(-1.0), abs=0.03)
+    assert estimate_loss(sequencing="Nanopore", coverage=10.0) > estimate_loss(sequencing="Illumina", coverage=10.0)
+
+
+def test_droplets_needed():
+    rng = np.random.default_rng(0)
+    probs = robust_soliton(64, 0.1, 0.5)
+    lossless = [droplets_needed(64, probs, 0.0, rng) for _ in range(20)]
+    lossy = [droplets_needed(64, probs, 0.5, rng) for _ in range(20)]
+    assert min(lossless) >= 64
+    assert np.mean(lossy) > np.mean(lossless)
+
+
+def test_segment_bucket():
+    assert segment_bucket(1) == 1
+    assert segment_bucket(33 * 32) == 64
+    assert segment_bucket(10 ** 9) == 1024
+
+
+def test_tune_is_cached(tmp_path):
+    cache = tmp_path / "tuning.json"
+    params = tune(1000, sequencing="Illumina", trials=20, workers=1, cache_path=str(cache))
+    assert cache.exists()
+    assert params["segments"] == 32
+    assert params["droplets"] == math.ceil(32 * (1 + params["overhead"]))
+    assert params["overhead"] > 0
+    # Same bucket, read from the cache and scaled to the file's own segment count
+    again = tune(900, sequencing="Illumina", trials=20, workers=1, cache_path=str(cache))
+    assert (again["c"], again["delta"], again["overhead"]) == (params["c"], params["delta"], params["overhead"])
+    assert again["segments"] == 29
+
+
+def test_lossy_channel_is_rejected():
+    with pytest.raises(ValueError, match="increase coverage"):
+        tune(1000, coverage=0.01, trials=10, workers=1, cache_path=None)
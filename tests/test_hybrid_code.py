@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from alphabet import StrandDecodeError
+from hybrid_code import hybrid_code
+from sweep import max_homopolymer
+
+DATA = bytes(random.Random(0).randrange(256) for _ in range(3000))
+
+
+@pytest.mark.parametrize("letters,gc,limit", [("A, T, C, G", 50, 3), ("ATCGPZ", 45, 2),
+                                              ("A,T,C,G,5mC,6mA", 55, 4)])
+def test_round_trip_meets_constraints(letters, gc, limit):
+    codec = hybrid_code(letters, gc, limit)
+    strands = codec.encode_strands(DATA)
+    assert all(max_homopolymer(s) <= limit for s in strands)
+    assert codec.decode_strands(strands) == DATA
+
+
+def test_instances_are_cached():
+    assert hybrid_code("ATCGPZ", 50, 3) is hybrid_code("ATCGPZ", 50, 3)
+
+
+def test_outer_code_recovers_dropped_strands():
+    codec = hybrid_code("A, T, C, G", 50, 4)
+    strands = codec.encode_strands(DATA)
+    kept = list(strands)
+    for i in sorted(random.Random(1).sample(range(1, len(strands)), len(strands) // 20), reverse=True):
+        del kept[i]
+    random.Random(2).shuffle(kept)
+    assert codec.decode_strands(kept) == DATA
+
+
+def test_losing_a_whole_group_raises():
+    codec = hybrid_code("A, T, C, G", 50, 4)
+    strands = codec.encode_strands(DATA)
+    with pytest.raises(StrandDecodeError):
+        codec.decode_strands(strands[:len(strands) // 2])
+
+
+@pytest.mark.parametrize("letters,gc,limit", [("5mC+6mA", 50, 1), ("A, C", 50, 1)])
+def test_configurations_without_capacity(letters, gc, limit):
+    # Two symbols that must alternate leave no choice of base, so no data can be carried
+    with pytest.raises(ValueError, match="carries any data"):
+        hybrid_code(letters, gc, limit)
+
+
+def test_infeasible_constraints():
+    with pytest.raises(ValueError, match="No strand satisfies"):
+        hybrid_code("A, T", 50, 4)
@@ -0,0 +1,228 @@
+import base64
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+import checkpoint
+import job_server
+from job_server import JobClient, JobScheduler, JobServerError, start_server
+
+run_job = job_server.run_job
+
+
+def crash_or_run(kind, params):
+    """``run_job`` that kills its worker process for jobs with a ``crash`` parameter."""
+    if params.get("crash"):
+        os._exit(1)
+    return run_job(kind, params)
+
+
+@pytest.fixture
+def checkpoints(monkeypatch):
+    # Unix socket paths are limited to about 100 bytes, so the socket gets a short directory of its own
+    directory = tempfile.mkdtemp(prefix="mmdna-")
+    monkeypatch.setenv("MMDNA_CHECKPOINT_DIR", os.path.join(directory, "checkpoints"))
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DIR", os.path.join(directory, "checkpoints"))
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop(server):
+    server.shutdown()
+    server.scheduler.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def server(checkpoints):
+    socket_path = os.path.join(checkpoints, "jobs.sock")
+    server = _serve(start_server(socket_path, workers=2))
+    yield server, JobClient(f"unix://{socket_path}")
+    _stop(server)
+
+
+@pytest.fixture
+def tcp_server(checkpoints):
+    server = _serve(start_server(workers=1, host="127.0.0.1", port=0, token="secret"))
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    _stop(server)
+
+
+def _encode(client, data, **params):
+    params = {"data": base64.b64encode(data).decode("ascii"), "alphabet": "A, T, C, G", "method": "Lookup Table",
+              **params}
+    return client.wait(client.submit("encode", params), interval=0.05)
+
+
+def _decode(client, **params):
+    result = client.wait(client.submit("decode", {"alphabet": "A, T, C, G", "method": "Lookup Table", **params}),
+                         interval=0.05)
+    return base64.b64decode(result["data"])
+
+
+def test_compressed_encode_round_trip(server, tmp_path):
+    _, client = server
+    data = b"compressible text, " * 20000
+    result = _encode(client, data, compress=True)
+    assert result["compression"]["compressed_bytes"] < len(data)
+    strands = [seq for strands in result["blocks"] for seq in strands]
+    assert _decode(client, sequences=strands) == data
+
+    path = tmp_path / "encoded.fasta"
+    path.write_text("".join(f">b0_{i}\n{seq}\n" for i, seq in enumerate(strands)))
+    assert _decode(client, file_path=str(path)) == data
+
+
+def test_multi_block_encode_simulate_decode(server, tmp_path):
+    from bounded import block_fasta, encode_blocks
+
+    _, client = server
+    data = os.urandom(5000)
+    path = tmp_path / "encoded.fasta"
+    path.write_text(block_fasta(encode_blocks(data, "A, T, C, G", "Lookup Table", block_size=1024)))
+    result = client.wait(client.submit("simulate", {"file_path": str(path), "sequencing": "None", "seed": 1}),
+                         interval=0.05)
+    assert sorted(set(result["blocks"])) == [0, 1, 2, 3, 4]
+    reads = tmp_path / "reads.fasta"
+    reads.write_text("".join(f">b{block}_encoded_read_{i}\n{read}\n"
+                             for i, (read, block) in enumerate(zip(result["reads"], result["blocks"]))))
+    assert _decode(client, file_path=str(reads)) == data
+
+
+def test_jobs_belong_to_the_connecting_user(server):
+    srv, client = server
+    job_id = client.submit("encode", {"data": "", "alphabet": "A, T, C, G", "method": "Lookup Table"},
+                           priority=1)
+    client.wait(job_id, interval=0.05)
+    # A "user" in the request is ignored; the job belongs to the uid of the socket peer
+    assert srv.scheduler.jobs[job_id]["user"] == job_server.user_name(os.getuid())
+    other = srv.scheduler.submit("encode", {"data": ""}, user="someone-else")
+    assert [job["id"] for job in client._request("GET", "/jobs")] == [job_id]
+    for request in (lambda: client.status(other), lambda: client.result(other), lambda: client.cancel(other)):
+        with pytest.raises(JobServerError, match="404"):
+            request()
+
+
+def test_bad_requests(server):
+    _, client = server
+    for payload in ([1, 2], {"kind": "encode", "params": []}, {"params": {}}, {"kind": "format", "params": {}},
+                    {"kind": "encode", "params": {"files": "a.txt"}}):
+        with pytest.raises(JobServerError, match="400"):
+            client._request("POST", "/jobs", payload)
+    with pytest.raises(JobServerError, match="404"):
+        client._request("POST", "/other")
+
+
+def test_oversized_request_is_refused(server):
+    srv, client = server
+    srv.max_request = 1024
+    data = base64.b64encode(bytes(srv.max_request)).decode("ascii")
+    with pytest.raises(JobServerError, match="413"):
+        client.submit("encode", {"data": data, "alphabet": "A, T, C, G", "method": "Lookup Table"})
+    assert not srv.scheduler.jobs
+    # A body without a valid length is refused as well
+    connection = job_server._UnixHTTPConnection(client.url[len("unix://"):], 5)
+    connection.request("POST", "/jobs", headers={"Content-Length": "-1"})
+    assert connection.getresponse().status == 400
+    connection.close()
+
+
+def test_tcp_requires_token(tcp_server, tmp_path):
+    _, url = tcp_server
+    data = {"data": base64.b64encode(b"over tcp").decode("ascii"), "alphabet": "A, T, C, G",
+            "method": "Lookup Table"}
+    for token in ("wrong", None):
+        client = JobClient(url)
+        client.token = token  # Not taken from MMDNA_JOB_TOKEN
+        with pytest.raises(JobServerError, match="403"):
+            client.submit("encode", data)
+        with pytest.raises(JobServerError, match="403"):
+            client._request("GET", "/jobs")
+    client = JobClient(url, token="secret")
+    result = client.wait(client.submit("encode", data), interval=0.05)
+    strands = [seq for strands in result["blocks"] for seq in strands]
+    assert _decode(client, sequences=strands) == b"over tcp"
+    path = tmp_path / "input.bin"
+    path.write_bytes(b"local file")
+    with pytest.raises(JobServerError, match="403.*Unix socket"):
+        client.submit("encode", {**data, "file_path": str(path)})
+
+
+def test_finished_jobs_are_bounded(checkpoints):
+    scheduler = JobScheduler(workers=1, max_finished=2)
+    try:
+        params = {"data": "", "alphabet": "A, T, C, G", "method": "Lookup Table"}
+        job_ids = [scheduler.submit("encode", params) for _ in range(4)]
+        deadline = time.time() + 30
+        while scheduler.active or any(scheduler.queues.values()):
+            assert time.time() < deadline
+            time.sleep(0.05)
+        assert list(scheduler.jobs) == job_ids[2:]
+        assert set(scheduler.results) == set(job_ids[2:])
+        with pytest.raises(KeyError):
+            scheduler.result(job_ids[0])
+
+        scheduler.result_ttl = 0
+        scheduler._evict()
+        assert not scheduler.jobs and not scheduler.results
+    finally:
+        scheduler.shutdown()
+
+
+def test_fair_share_queue_positions(checkpoints):
+    scheduler = JobScheduler(workers=1)
+    scheduler.shutdown()  # Nothing is dispatched, so every job stays queued
+    a = [scheduler.submit("encode", {}, user="a") for _ in range(3)]
+    b = scheduler.submit("encode", {}, user="b")
+    urgent = scheduler.submit("encode", {}, user="a", priority=5)
+    # a and b take turns; a's own jobs run by priority, then in submission order
+    assert [scheduler.status(job_id)["position"] for job_id in [urgent, b, *a]] == [0, 1, 2, 3, 4]
+    with pytest.raises(KeyError):
+        scheduler.status(b, user="a")
+    assert scheduler.cancel(b, user="b")
+    assert scheduler.status(a[0])["position"] == 1
+    assert scheduler.status(b)["state"] == "cancelled"
+
+
+def test_pool_is_replaced_when_a_worker_dies(server, monkeypatch):
+    srv, client = server
+    monkeypatch.setattr(job_server, "run_job", crash_or_run)
+    params = {"data": base64.b64encode(b"after the crash").decode("ascii"), "alphabet": "A, T, C, G",
+              "method": "Lookup Table"}
+    pool = srv.scheduler.pool
+    with pytest.raises(RuntimeError, match="worker process died"):
+        client.wait(client.submit("encode", {**params, "crash": True}), interval=0.05)
+    for _ in range(2):
+        result = client.wait(client.submit("encode", params), interval=0.05)
+        strands = [seq for strands in result["blocks"] for seq in strands]
+        assert _decode(client, sequences=strands) == b"after the crash"
+    assert srv.scheduler.pool is not pool
+
+
+def test_in_process_encode_takes_bytes(checkpoints):
+    from checkpoint import Checkpoint, job_key
+
+    params = {"data": b"in-process bytes", "alphabet": "A, T, C, G", "method": "Lookup Table"}
+    result = run_job("encode", params)
+    assert list(result) == ["blocks"]
+    strands = result["blocks"][0]
+    decoded = run_job("decode", {"sequences": strands, "alphabet": "A, T, C, G", "method": "Lookup Table"})
+    assert base64.b64decode(decoded["data"]) == b"in-process bytes"
+
+    # A block left behind by an interrupted run is reused and reported
+    checkpoint = Checkpoint(job_key("encode", params))
+    checkpoint.record((0, 0), strands)
+    checkpoint.close()
+    assert run_job("encode", params) == {"blocks": [strands], "resumed": 1}
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from rs_code import ReedSolomon, ReedSolomonError, StrandOuterCode
+
+
+@pytest.mark.parametrize("bits", [8, 16])
+def test_round_trip_corrects_errors(bits):
+    rng = np.random.default_rng(0)
+    rs = ReedSolomon(8, bits)
+    messages = rng.integers(0, 2 ** bits, (50, 40))
+    codewords = rs.encode(messages).astype(np.int64)
+    assert not rs.syndromes(codewords).any()
+    for row in codewords:
+        row[rng.choice(codewords.shape[1], 4, replace=False)] ^= rng.integers(1, 2 ** bits, 4)
+    np.testing.assert_array_equal(rs.decode(codewords), messages)
+
+
+def test_erasures_up_to_nsym():
+    rs = ReedSolomon(6)
+    messages = np.random.default_rng(1).integers(0, 256, (10, 30))
+    codewords = rs.encode(messages)
+    np.testing.assert_array_equal(rs.decode(codewords, erase_pos=[0, 3, 7, 11, 20, 35]), messages)
+    with pytest.raises(ReedSolomonError):
+        rs.decode(codewords, erase_pos=list(range(7)))
+
+
+def test_too_many_errors_raise():
+    rs = ReedSolomon(4)
+    codewords = rs.encode(np.arange(20)).astype(np.int64)
+    codewords[0, :6] ^= 0x55
+    with pytest.raises(ReedSolomonError):
+        rs.decode(codewords)
+
+
+def test_codeword_length_limit():
+    with pytest.raises(ValueError):
+        ReedSolomon(10).encode(np.zeros(250, dtype=np.int64))
+
+
+def test_strand_outer_code_recovers_dropped_strands():
+    rng = np.random.default_rng(2)
+    strands = [rng.bytes(24) for _ in range(20)]
+    code = StrandOuterCode(4)
+    coded = code.encode(strands)
+    assert len(coded) == 24
+    for i in (1, 5, 20, 23):
+        coded[i] = None
+    assert code.decode(coded) == strands
+
+
+def test_strand_outer_code_groups_match_single_encode():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 256, (3, 10, 16)).astype(np.uint8)
+    code = StrandOuterCode(3)
+    coded = code.encode_groups(groups)
+    assert coded.shape == (3, 13, 16)
+    assert [row.tobytes() for row in coded[1].astype(np.uint8)] == code.encode([row.tobytes() for row in groups[1]])
+    np.testing.assert_array_equal(code.decode_groups(coded, erased=[0, 12]), groups)
+
+
+def test_strand_outer_code_rejects_ragged_strands():
+    with pytest.raises(ValueError):
+        StrandOuterCode(2).encode([b"abcd", b"abc"])
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from shards import MANIFEST_NAME, ShardError, decode_sharded, encode_sharded, finalize, plan
+
+METHOD = "Lookup Table"
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "input.bin"
+    path.write_bytes(os.urandom(2500) + b"text " * 1000)
+    return path
+
+
+def _parts(out_dir):
+    return {name: (out_dir / name).read_bytes() for name in sorted(os.listdir(out_dir))}
+
+
+@pytest.mark.parametrize("compress", [False, True, "zlib-9"])
+def test_round_trip(tmp_path, input_file, compress):
+    out_dir = tmp_path / "shards"
+    manifest = encode_sharded(input_file, out_dir, "ATCGPZ", METHOD, shard_size=1000, seed=7, workers=1,
+                              compress=compress)
+    assert len(manifest["shards"]) == 8
+    assert manifest["strands"] == sum(s["strands"] for s in manifest["shards"])
+    decode_sharded(out_dir, tmp_path / "output.bin", workers=1)
+    assert (tmp_path / "output.bin").read_bytes() == input_file.read_bytes()
+
+
+def test_parts_do_not_depend_on_workers(tmp_path, input_file):
+    encode_sharded(input_file, tmp_path / "one", "A, T, C, G", METHOD, shard_size=2000, workers=1, compress=True)
+    encode_sharded(input_file, tmp_path / "many", "A, T, C, G", METHOD, shard_size=2000, workers=2, compress=True)
+    one, many = _parts(tmp_path / "one"), _parts(tmp_path / "many")
+    assert json.loads(one.pop(MANIFEST_NAME))["shards"] == json.loads(many.pop(MANIFEST_NAME))["shards"]
+    assert one == many
+
+
+def test_unknown_codec(tmp_path, input_file):
+    with pytest.raises(ValueError, match="Unknown compression codec"):
+        plan(input_file, tmp_path / "shards", "A, T, C, G", METHOD, compress="gzip")
+
+
+def test_unfinished_and_unsupported_manifests(tmp_path, input_file):
+    out_dir = tmp_path / "shards"
+    plan(input_file, out_dir, "A, T, C, G", METHOD, shard_size=1000)
+    with pytest.raises(ShardError, match="has not been encoded"):
+        finalize(out_dir)
+    with pytest.raises(ShardError, match="not finalized"):
+        decode_sharded(out_dir, tmp_path / "output.bin")
+
+    encode_sharded(input_file, out_dir, "A, T, C, G", METHOD, shard_size=1000, workers=1)
+    path = out_dir / MANIFEST_NAME
+    manifest = json.loads(path.read_text())
+    path.write_text(json.dumps(dict(manifest, version=1)))
+    with pytest.raises(ShardError, match="Unsupported manifest version: 1"):
+        decode_sharded(out_dir, tmp_path / "output.bin", workers=1)
+
+
+def test_swapped_parts(tmp_path, input_file):
+    out_dir = tmp_path / "shards"
+    encode_sharded(input_file, out_dir, "A, T, C, G", METHOD, shard_size=1000, workers=1)
+    first, second = out_dir / "part-00000.fasta", out_dir / "part-00001.fasta"
+    text = first.read_text()
+    first.write_text(second.read_text())
+    second.write_text(text)
+    with pytest.raises(ShardError, match="Part of shard 0 holds shard 1"):
+        decode_sharded(out_dir, tmp_path / "output.bin", workers=1)
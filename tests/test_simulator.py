@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from checkpoint import Checkpoint
+from simulator import apply_errors, combined_profile, methylation_calling_errors, simulate
+
+
+def strands(count, length=40, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("ATCG") for _ in range(length)) for _ in range(count)]
+
+
+class Crash(Exception):
+    pass
+
+
+def test_combined_profile():
+    assert combined_profile() == {"sub": 0.0, "ins": 0.0, "del": 0.0, "dropout": 0.0}
+    profile = combined_profile("HT-Electrochemical", "Room Temperature Storage", "Illumina")
+    assert profile["dropout"] == pytest.approx(1 - (1 - 0.005) * (1 - 0.02))
+    assert profile["sub"] == pytest.approx(1 - (1 - 1e-3) * (1 - 1e-4) * (1 - 2e-3))
+
+
+def test_apply_errors():
+    pool = strands(50)
+    assert apply_errors(pool, rng=1) == pool
+    substituted = apply_errors(pool, sub=0.5, rng=1)
+    assert [len(s) for s in substituted] == [len(s) for s in pool]
+    assert substituted != pool
+    assert apply_errors(pool, dele=1.0, rng=1) == [""] * len(pool)
+    inserted = apply_errors(pool, ins=1.0, rng=1)
+    assert all(len(r) == 2 * len(s) and r[::2] == s for r, s in zip(inserted, pool))
+    assert apply_errors([], sub=1.0) == []
+
+
+def test_methylation_calling_errors():
+    assert methylation_calling_errors(["EEFF", "CCAA"], miss_5mC=1.0, miss_6mA=1.0) == ["CCAA", "CCAA"]
+    assert methylation_calling_errors(["CCAA"], false_5mC=1.0) == ["EEAA"]
+    assert methylation_calling_errors(["EF"], rng=0) == ["EF"]
+
+
+def test_every_strand_read_once_without_coverage():
+    pool = strands(200)
+    reads = simulate(pool, seed=3)
+    assert reads != pool
+    assert sorted(reads) == sorted(pool)
+    assert simulate(pool, seed=3) == reads
+
+
+def test_dropout_and_coverage():
+    pool = strands(2000, length=10)
+    survivors = simulate(pool, storage="Room Temperature Storage", sequencing="None", seed=1)
+    assert 0.95 * len(pool) < len(survivors) < len(pool)
+    sampled = simulate(pool, coverage=3.0, seed=1)
+    assert len(sampled) == pytest.approx(3 * len(pool), rel=0.05)
+    assert len(set(sampled)) == pytest.approx((1 - 2.718281828 ** -3) * len(pool), rel=0.05)
+
+
+def test_reads_keep_their_block():
+    pool = strands(300)
+    blocks = [i // 100 for i in range(len(pool))]
+    reads, read_blocks = simulate(pool, coverage=2.0, seed=5, chunk_size=64, blocks=blocks)
+    assert len(read_blocks) == len(reads)
+    assert all(read_blocks[i] == blocks[pool.index(read)] for i, read in enumerate(reads))
+    assert simulate([], blocks=[]) == ([], [])
+
+
+def test_checkpoint_resume_gives_the_same_reads(tmp_path):
+    pool = strands(500)
+    kwargs = {"synthesis": "Inkjet", "sequencing": "Nanopore", "coverage": 2.0, "seed": 7, "chunk_size": 64}
+    expected = simulate(pool, **kwargs)
+
+    class CrashingCheckpoint(Checkpoint):
+        def record(self, unit, result):
+            if len(self.done) == 3:
+                raise Crash
+            super().record(unit, result)
+
+    checkpoint = CrashingCheckpoint("sim", directory=tmp_path)
+    with pytest.raises(Crash):
+        simulate(pool, checkpoint=checkpoint, **kwargs)
+    checkpoint.close()
+
+    checkpoint = Checkpoint("sim", directory=tmp_path)
+    assert checkpoint.resumed == 3
+    assert simulate(pool, checkpoint=checkpoint, **kwargs) == expected
+    checkpoint.discard()
@@ -0,0 +1,91 @@
+import random
+import sys
+import types
+from multiprocessing import shared_memory
+
+import pytest
+
+import sweep
+from sweep import format_table, gc_content, max_homopolymer, pareto_front, recovery, run_sweep, sweep_configs
+
+
+def test_gc_content_and_homopolymer():
+    assert gc_content("") == 0.0
+    assert gc_content("ATGC") == 50.0
+    assert gc_content("EEAT") == 50.0
+    assert max_homopolymer("") == 0
+    assert max_homopolymer("AATTTGC") == 3
+
+
+def test_recovery():
+    data = random.Random(0).randbytes(1024)
+    assert recovery(b"", b"") == 1.0
+    assert recovery(data, data) == 1.0
+    assert recovery(data, b"") == 0.0
+    assert recovery(b"short", b"a short one") == 1.0
+    # Losing a piece in the middle only costs that piece, not the shifted tail
+    damaged = data[:100] + data[116:]
+    assert 0.9 < recovery(data, damaged) < 1.0
+    assert recovery(memoryview(data), damaged) == recovery(data, damaged)
+
+
+def test_lookup_table_is_not_crossed_with_constraints():
+    configs = sweep_configs(["Lookup Table", "HybridCode"], ["A, T, C, G", "ATCGPZ"], [45, 50], [3, 4, 5])
+    table = [c for c in configs if c["method"] == "Lookup Table"]
+    assert table == [{"method": "Lookup Table", "alphabet": a, "gc_content": None, "homopolymer_limit": None}
+                     for a in ("A, T, C, G", "ATCGPZ")]
+    assert len(configs) - len(table) == 2 * 2 * 3
+    assert len(sweep_configs()) == len(set(tuple(c.values()) for c in sweep_configs()))
+
+
+def test_pareto_front():
+    rows = [
+        {"density": 2.0, "recovery": 0.5, "time": 1.0},
+        {"density": 1.5, "recovery": 1.0, "time": 1.0},
+        {"density": 1.5, "recovery": 0.9, "time": 2.0},  # Dominated by the row above
+        {"density": 1.0, "constraint_rate": 1.0, "time": 0.1},
+        {"density": 3.0, "error": "failed", "time": 0.0},
+    ]
+    assert pareto_front(rows) == [rows[0], rows[1], rows[3]]
+
+
+def test_workers_view_the_shared_input():
+    shm = shared_memory.SharedMemory(create=True, size=8)
+    try:
+        shm.buf[:5] = b"hello"
+        sweep._attach_input(shm.name, 5)
+        data = sweep._worker_input["data"]
+        assert isinstance(data, memoryview) and bytes(data) == b"hello"
+        shm.buf[0:1] = b"j"
+        assert bytes(data) == b"jello"
+    finally:
+        sweep._worker_input.pop("data").release()
+        sweep._worker_input.pop("shm").close()
+        shm.close()
+        shm.unlink()
+
+
+def test_run_sweep(monkeypatch):
+    def Encode(data, letters, method):
+        assert type(data) is bytes
+        return ["ACGT" * 10] * (len(data) // 10 + 1)
+
+    # Forked workers inherit the stand-in external package
+    monkeypatch.setitem(sys.modules, "methods", types.ModuleType("methods"))
+    monkeypatch.setattr(sys.modules["methods"], "Encode", Encode, raising=False)
+
+    data = random.Random(0).randbytes(2000)
+    configs = sweep_configs(["Lookup Table", "HybridCode", "YYC"], ["A, T, C, G"], [50], [3])
+    progress = []
+    rows = run_sweep(data, configs, workers=2, simulate=True, progress=lambda *p: progress.append(p), seed=1)
+    assert [r["method"] for r in rows] == ["Lookup Table", "HybridCode", "YYC"]
+    assert progress[-1] == (3, 3)
+    table, hybrid, external = rows
+    assert table["recovery"] == 1.0 and "constraint_rate" not in table
+    assert hybrid["constraint_rate"] == 1.0 and hybrid["recovery"] == 1.0
+    assert hybrid["density"] < table["density"] == pytest.approx(8 * len(data) / table["bases"])
+    assert external["strands"] == len(data) // 10 + 1
+    assert "Decode" in external["error"]  # The stand-in package cannot decode
+
+    text = format_table(rows)
+    assert "Lookup Table" in text and "error: " in text